@@ -0,0 +1,287 @@
+# SPDX-License-Identifier: MIT
+"""Benchmark run_monitor against a local server farm.
+
+    python benchmarks/bench.py --sizes 1000 10000 --concurrency 64 \\
+        --backend threads asyncio --out bench.json
+
+The server farm (farm.py) runs in its own process, so its CPU time does
+not count against url-monitor. Each case (size x backend x concurrency x
+processes) runs run_monitor in a fresh process and records:
+
+- checks_per_s: results per second of wall time (load + checks + summary
+  + report)
+- cpu_s: user + system CPU time of the case process, and cpu_per_check_ms
+  (worker processes of --processes are included)
+- peak_rss_mb: peak resident set size of the case process (and, with
+  --processes, of the largest worker)
+- overhead_ms: p50/p99 of (measured latency - intended server delay) over
+  the OK checks, i.e. what url-monitor and the loopback network add
+
+The JSON output ({"meta": ..., "cases": [...]}) is meant to be kept and
+compared between versions with compare.py.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from farm import DEFAULT_MIX, ServerFarm, make_urls, parse_mix  # noqa: E402
+
+from url_monitor.pipeline import run_monitor  # noqa: E402
+from url_monitor.runner import BACKENDS  # noqa: E402
+from url_monitor.stats import percentile_inclusive  # noqa: E402
+
+
+def _serve(servers: int, conn: Any) -> None:
+    with ServerFarm(servers=servers) as farm:
+        conn.send(farm.base_urls)
+        conn.recv()  # until the parent asks to stop
+
+
+def _peak_rss_mb(who: int) -> float:
+    rss = resource.getrusage(who).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _cpu_s(who: int) -> float:
+    usage = resource.getrusage(who)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_case(
+    urls_path: Path,
+    delays: dict[str, int],
+    *,
+    backend: str,
+    concurrency: int,
+    processes: int,
+    timeout: float,
+    percentiles: str,
+) -> dict[str, Any]:
+    """Run one case in this process and measure it."""
+    cpu0 = _cpu_s(resource.RUSAGE_SELF) + _cpu_s(resource.RUSAGE_CHILDREN)
+    t0 = time.perf_counter()
+    results, summary, _report_md, _invalids = run_monitor(
+        urls_path,
+        timeout=timeout,
+        concurrency=concurrency,
+        backend=backend,
+        processes=processes,
+        compact=True,
+        percentiles=percentiles,
+    )
+    wall = time.perf_counter() - t0
+    cpu = _cpu_s(resource.RUSAGE_SELF) + _cpu_s(resource.RUSAGE_CHILDREN) - cpu0
+
+    overhead = sorted(
+        r.elapsed_ms - delays[r.url]
+        for r in results
+        if r.ok and r.elapsed_ms is not None
+    )
+    total = summary["total"]
+    return {
+        "urls": total,
+        "backend": backend,
+        "concurrency": concurrency,
+        "processes": processes,
+        "wall_s": wall,
+        "checks_per_s": total / wall if wall else None,
+        "cpu_s": cpu,
+        "cpu_per_check_ms": cpu * 1000.0 / total if total else None,
+        "peak_rss_mb": max(
+            _peak_rss_mb(resource.RUSAGE_SELF),
+            _peak_rss_mb(resource.RUSAGE_CHILDREN),
+        ),
+        "overhead_ms": {
+            "p50": percentile_inclusive(overhead, 500) if overhead else None,
+            "p99": percentile_inclusive(overhead, 990) if overhead else None,
+        },
+        "ok": summary["ok"],
+        "fail": summary["fail"],
+    }
+
+
+def _case_main(argv: list[str]) -> int:
+    # Child entry point: one case, JSON on stdout
+    p = argparse.ArgumentParser()
+    p.add_argument("--urls-file", required=True)
+    p.add_argument("--delays-file", required=True)
+    p.add_argument("--backend", required=True)
+    p.add_argument("--concurrency", type=int, required=True)
+    p.add_argument("--processes", type=int, required=True)
+    p.add_argument("--timeout", type=float, required=True)
+    p.add_argument("--percentiles", required=True)
+    args = p.parse_args(argv)
+    delays = json.loads(Path(args.delays_file).read_text(encoding="utf-8"))
+    case = run_case(
+        Path(args.urls_file),
+        delays,
+        backend=args.backend,
+        concurrency=args.concurrency,
+        processes=args.processes,
+        timeout=args.timeout,
+        percentiles=args.percentiles,
+    )
+    print(json.dumps(case))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1000, 10_000],
+        help="URL counts to run (default: 1000 10000; 100000 for a long run)",
+    )
+    p.add_argument(
+        "--backend",
+        nargs="+",
+        choices=BACKENDS,
+        default=["threads", "asyncio"],
+        help="Backends to run (default: threads asyncio)",
+    )
+    p.add_argument(
+        "--concurrency",
+        type=int,
+        nargs="+",
+        default=[64],
+        help="Concurrency levels to run (default: 64)",
+    )
+    p.add_argument(
+        "--processes",
+        type=int,
+        nargs="+",
+        default=[1],
+        help="Process counts to run (default: 1)",
+    )
+    p.add_argument(
+        "--servers",
+        type=int,
+        default=8,
+        help="Servers (distinct host:port) in the farm (default: 8)",
+    )
+    p.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=DEFAULT_MIX,
+        help=(
+            "Share of each behavior, e.g. ok=0.7,delay=0.2,error=0.05,"
+            "big=0.03,hang=0.01,drop=0.01 (the default)"
+        ),
+    )
+    p.add_argument(
+        "--timeout",
+        type=float,
+        default=1.0,
+        help="Check timeout seconds; /hang URLs take this long (default: 1.0)",
+    )
+    p.add_argument(
+        "--percentiles",
+        choices=("exact", "sketch"),
+        default="exact",
+        help="run_monitor percentiles mode (default: exact)",
+    )
+    p.add_argument("--seed", type=int, default=0, help="URL mix seed (default: 0)")
+    p.add_argument("--out", default=None, help="Write the JSON results here")
+    return p
+
+
+def main(argv: list[str] | None = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ["--case"]:
+        return _case_main(argv[1:])
+    args = build_parser().parse_args(argv)
+
+    ctx = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = ctx.Pipe()
+    server = ctx.Process(target=_serve, args=(args.servers, child_conn), daemon=True)
+    server.start()
+    base_urls = parent_conn.recv()
+
+    cases: list[dict[str, Any]] = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for size in args.sizes:
+                urls = make_urls(base_urls, size, mix=args.mix, seed=args.seed)
+                urls_path = Path(tmp) / f"urls-{size}.txt"
+                urls_path.write_text(
+                    "".join(f"{u}\n" for u, _b, _d in urls), encoding="utf-8"
+                )
+                delays_path = Path(tmp) / f"delays-{size}.json"
+                delays_path.write_text(
+                    json.dumps({u: d for u, _b, d in urls}), encoding="utf-8"
+                )
+                for backend in args.backend:
+                    for concurrency in args.concurrency:
+                        for processes in args.processes:
+                            out = subprocess.run(
+                                [
+                                    sys.executable,
+                                    __file__,
+                                    "--case",
+                                    f"--urls-file={urls_path}",
+                                    f"--delays-file={delays_path}",
+                                    f"--backend={backend}",
+                                    f"--concurrency={concurrency}",
+                                    f"--processes={processes}",
+                                    f"--timeout={args.timeout}",
+                                    f"--percentiles={args.percentiles}",
+                                ],
+                                check=True,
+                                capture_output=True,
+                                text=True,
+                            ).stdout
+                            case = json.loads(out.strip().splitlines()[-1])
+                            cases.append(case)
+                            print(
+                                f"{size:>7} urls  {backend:<7} c={concurrency:<4} "
+                                f"p={processes:<2} {case['checks_per_s']:9.0f} checks/s  "
+                                f"cpu {case['cpu_per_check_ms']:.3f} ms/check  "
+                                f"rss {case['peak_rss_mb']:.0f} MB  "
+                                f"overhead p99 {case['overhead_ms']['p99'] or 0:.1f} ms",
+                                file=sys.stderr,
+                            )
+    finally:
+        parent_conn.send("stop")
+        server.join(timeout=10)
+
+    doc = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": multiprocessing.cpu_count(),
+            "servers": args.servers,
+            "mix": args.mix,
+            "timeout": args.timeout,
+            "percentiles": args.percentiles,
+            "seed": args.seed,
+        },
+        "cases": cases,
+    }
+    text = json.dumps(doc, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+        print(f"Wrote: {args.out}", file=sys.stderr)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
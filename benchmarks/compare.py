@@ -0,0 +1,90 @@
+# SPDX-License-Identifier: MIT
+"""Compare two bench.py JSON outputs and flag regressions.
+
+    python benchmarks/compare.py base.json new.json [--threshold 10]
+
+Cases are matched on (urls, backend, concurrency, processes). A case
+regresses if checks/s dropped, or CPU per check, peak RSS or p99 overhead
+grew, by more than --threshold percent. Exits 1 if any case regressed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+# (label, getter, True if higher is better)
+METRICS = (
+    ("checks/s", lambda c: c["checks_per_s"], True),
+    ("cpu ms/check", lambda c: c["cpu_per_check_ms"], False),
+    ("peak RSS MB", lambda c: c["peak_rss_mb"], False),
+    ("overhead p99 ms", lambda c: c["overhead_ms"]["p99"], False),
+)
+
+
+def _key(case: dict[str, Any]) -> tuple[Any, ...]:
+    return (case["urls"], case["backend"], case["concurrency"], case["processes"])
+
+
+def compare(
+    base: dict[str, Any], new: dict[str, Any], *, threshold: float
+) -> tuple[list[str], list[str]]:
+    """(table lines, regression messages) for two bench.py documents."""
+    base_cases = {_key(c): c for c in base["cases"]}
+    lines = [
+        "| urls | backend | c | p | metric | base | new | change |",
+        "|---:|---|---:|---:|---|---:|---:|---:|",
+    ]
+    regressions: list[str] = []
+    for case in new["cases"]:
+        key = _key(case)
+        old = base_cases.get(key)
+        if old is None:
+            continue
+        for label, get, higher_is_better in METRICS:
+            a, b = get(old), get(case)
+            if a is None or b is None:
+                continue
+            change = (b - a) / a * 100.0 if a else 0.0
+            lines.append(
+                f"| {key[0]} | {key[1]} | {key[2]} | {key[3]} | {label} "
+                f"| {a:.3f} | {b:.3f} | {change:+.1f}% |"
+            )
+            worse = -change if higher_is_better else change
+            if worse > threshold:
+                regressions.append(
+                    f"{key[0]} urls {key[1]} c={key[2]} p={key[3]}: "
+                    f"{label} {a:.3f} -> {b:.3f} ({change:+.1f}%)"
+                )
+    return lines, regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("base", help="Baseline bench.py JSON")
+    p.add_argument("new", help="New bench.py JSON")
+    p.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="Percent change counted as a regression (default: 10)",
+    )
+    args = p.parse_args(argv)
+
+    base = json.loads(Path(args.base).read_text(encoding="utf-8"))
+    new = json.loads(Path(args.new).read_text(encoding="utf-8"))
+    lines, regressions = compare(base, new, threshold=args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print("\nRegressions:", file=sys.stderr)
+        for msg in regressions:
+            print(f"- {msg}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,185 @@
+# SPDX-License-Identifier: MIT
+"""Local HTTP server farm for benchmarks (127.0.0.1 only).
+
+`ServerFarm(servers=N)` listens on N ports, so a URL list can spread over N
+hosts (per-host scheduling and keep-alive pools work as with real hosts).
+Every server answers the same routes:
+
+  /ok                 200, small body
+  /delay?ms=N         200 after N ms
+  /status/N           status N
+  /big?bytes=N        200 with an N-byte body
+  /hang               no answer until the server stops (clients time out)
+  /drop               closes the connection without a response
+
+`make_urls` builds a URL list with a given mix of these behaviors; each URL
+carries its intended server delay so that client overhead can be computed
+(see bench.py).
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Behavior -> share of the URLs, for make_urls
+DEFAULT_MIX = {
+    "ok": 0.70,
+    "delay": 0.20,
+    "error": 0.05,
+    "big": 0.03,
+    "hang": 0.01,
+    "drop": 0.01,
+}
+BEHAVIORS = tuple(DEFAULT_MIX)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def _send(self, code: int, body: bytes = b"") -> None:
+        self.send_response(code)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_HEAD(self) -> None:
+        self.do_GET()
+
+    def do_GET(self) -> None:
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        path = parts.path
+
+        if path == "/ok":
+            self._send(200, b"ok")
+        elif path == "/delay":
+            self.server.stopping.wait(int(query.get("ms", ["0"])[0]) / 1000.0)  # type: ignore[attr-defined]
+            self._send(200, b"delayed")
+        elif path.startswith("/status/"):
+            self._send(int(path.rsplit("/", 1)[1]), b"status")
+        elif path == "/big":
+            self._send(200, b"x" * int(query.get("bytes", ["1048576"])[0]))
+        elif path == "/hang":
+            self.server.stopping.wait()  # type: ignore[attr-defined]
+            self.close_connection = True
+        elif path == "/drop":
+            self.close_connection = True
+        else:
+            self._send(404, b"not found")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, stopping: threading.Event) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.stopping = stopping
+
+    def handle_error(self, request, client_address) -> None:
+        # Clients time out or hang up on purpose
+        pass
+
+
+class ServerFarm:
+    """N threaded HTTP servers on 127.0.0.1; use as a context manager."""
+
+    def __init__(self, *, servers: int = 4) -> None:
+        if servers < 1:
+            raise ValueError(f"servers must be >= 1 (got {servers})")
+        self._stopping = threading.Event()
+        self._servers = [_Server(self._stopping) for _ in range(servers)]
+        self._threads: list[threading.Thread] = []
+
+    @property
+    def base_urls(self) -> list[str]:
+        return [
+            f"http://127.0.0.1:{s.server_address[1]}"  # type: ignore[index]
+            for s in self._servers
+        ]
+
+    def start(self) -> ServerFarm:
+        for s in self._servers:
+            t = threading.Thread(
+                target=s.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+            )
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self) -> None:
+        self._stopping.set()  # releases /delay and /hang handlers
+        for s in self._servers:
+            s.shutdown()
+            s.server_close()
+        for t in self._threads:
+            t.join()
+
+    def __enter__(self) -> ServerFarm:
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    """Behavior shares from "ok=0.9,delay=0.1" (normalized to sum to 1)."""
+    mix: dict[str, float] = {}
+    for item in spec.split(","):
+        name, sep, share = item.strip().partition("=")
+        if not sep or name not in BEHAVIORS:
+            raise ValueError(
+                f"mix entries must be BEHAVIOR=SHARE with BEHAVIOR in {BEHAVIORS} "
+                f"(got {item.strip()!r})"
+            )
+        mix[name] = float(share)
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError(f"mix shares must add up to > 0 (got {spec!r})")
+    return {k: v / total for k, v in mix.items()}
+
+
+def make_urls(
+    base_urls: list[str],
+    n: int,
+    *,
+    mix: dict[str, float] = DEFAULT_MIX,
+    delay_ms: tuple[int, int] = (5, 50),
+    big_bytes: int = 256 * 1024,
+    seed: int = 0,
+) -> list[tuple[str, str, int]]:
+    """
+    n (url, behavior, intended delay ms) tuples, hosts round-robin.
+
+    "delay" URLs get a uniform random delay in delay_ms; "error" URLs a
+    random 5xx status. Every URL is distinct (an `i` query parameter).
+    """
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[k] for k in names]
+    out: list[tuple[str, str, int]] = []
+    for i in range(n):
+        base = base_urls[i % len(base_urls)]
+        behavior = rng.choices(names, weights)[0]
+        delay = 0
+        if behavior == "ok":
+            path = f"/ok?i={i}"
+        elif behavior == "delay":
+            delay = rng.randint(*delay_ms)
+            path = f"/delay?ms={delay}&i={i}"
+        elif behavior == "error":
+            path = f"/status/{rng.choice((500, 502, 503))}?i={i}"
+        elif behavior == "big":
+            path = f"/big?bytes={big_bytes}&i={i}"
+        else:
+            path = f"/{behavior}?i={i}"
+        out.append((base + path, behavior, delay))
+    return out
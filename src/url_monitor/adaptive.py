@@ -0,0 +1,265 @@
+# SPDX-License-Identifier: MIT
+"""Per-URL adaptive timeouts and hedged requests from recent latencies.
+
+Each URL keeps its last `samples` successful latencies. Once it has
+`min_samples`, its timeout becomes
+
+    clamp(p99 * multiplier, min_timeout, timeout)
+
+so a fast endpoint that hangs is abandoned after a fraction of the global
+`timeout`, while slow endpoints keep the full budget. A check of that URL
+that times out doubles its timeout for the next check (up to `timeout`)
+until it succeeds again, so a URL that got slower is not failed forever.
+
+With hedging, a check still running after the URL's p95 gets a second,
+identical attempt; the first healthy result wins and the other attempt is
+cancelled (asyncio) or left to finish in the background (threads). This
+bounds the run by the healthy tail instead of the slowest attempt, at the
+cost of at most one extra request for the slowest ~5% of checks.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from typing import Any, Awaitable, Callable, Iterable, Mapping, Optional
+
+from .model import AdaptiveStats, CheckResult, Target, target_url
+from .stats import percentile_inclusive
+
+# Doublings of a URL's timeout after consecutive timeouts
+MAX_BACKOFF = 8
+
+
+def _timed_out(r: CheckResult) -> bool:
+    return r.error is not None and "timeout" in r.error.lower()
+
+
+class AdaptiveTimeouts:
+    """
+    Thread-safe per-URL latency windows; see the module docstring.
+
+    - `adapt`: derive per-URL timeouts (otherwise every check gets `timeout`)
+    - `hedge`: hedge checks that run past the URL's p95
+    - `seed` preloads latencies (e.g. HistoryStore.recent_latencies)
+    - `call` / `acall` run one check with both applied and learn from it
+    - at most `max_entries` URLs are tracked (least recently used evicted)
+
+    `stats` counts checks run with a learned timeout, hedges and hedge wins.
+    """
+
+    def __init__(
+        self,
+        *,
+        timeout: float = 5.0,
+        adapt: bool = True,
+        hedge: bool = False,
+        min_timeout: float = 0.25,
+        multiplier: float = 2.0,
+        samples: int = 32,
+        min_samples: int = 5,
+        max_entries: int = 10_000,
+    ) -> None:
+        if not 0 < min_timeout <= timeout:
+            raise ValueError(
+                f"min_timeout must be in (0, timeout] (got {min_timeout}, {timeout})"
+            )
+        if multiplier < 1.0:
+            raise ValueError(f"multiplier must be >= 1 (got {multiplier})")
+        if not 1 <= min_samples <= samples:
+            raise ValueError(
+                f"min_samples must be in [1, samples] (got {min_samples}, {samples})"
+            )
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be >= 1 (got {max_entries})")
+        self.timeout = timeout
+        self.adapt = adapt
+        self.hedge = hedge
+        self.min_timeout = min_timeout
+        self.multiplier = multiplier
+        self.samples = samples
+        self.min_samples = min_samples
+        self.max_entries = max_entries
+        self.stats = AdaptiveStats()
+        self._lock = threading.Lock()
+        # url -> (recent latencies in ms, timeout doublings)
+        self._entries: OrderedDict[str, tuple[deque[float], int]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _entry(self, url: str) -> tuple[deque[float], int]:
+        # Caller holds the lock
+        entry = self._entries.get(url)
+        if entry is None:
+            entry = self._entries[url] = (deque(maxlen=self.samples), 0)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(url)
+        return entry
+
+    def _percentile_s(self, url: str, permille: int) -> tuple[Optional[float], int]:
+        # (percentile in seconds or None if too few samples, doublings)
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return None, 0
+            window, backoff = entry
+            data = sorted(window)
+        if len(data) < self.min_samples:
+            return None, backoff
+        return percentile_inclusive(data, permille) / 1000.0, backoff
+
+    def seed(self, latencies: Mapping[str, Iterable[float]]) -> None:
+        """Add past successful latencies (ms, oldest first) per URL."""
+        with self._lock:
+            for url, values in latencies.items():
+                self._entry(url)[0].extend(values)
+
+    def observe(self, result: CheckResult) -> None:
+        """Learn from a finished check."""
+        with self._lock:
+            window, backoff = self._entry(result.url)
+            if result.ok and result.elapsed_ms is not None:
+                window.append(result.elapsed_ms)
+                backoff = 0
+            elif _timed_out(result):
+                backoff = min(backoff + 1, MAX_BACKOFF)
+            self._entries[result.url] = (window, backoff)
+
+    def timeout_for(self, url: str) -> float:
+        """Timeout (seconds) for the next check of url."""
+        if not self.adapt:
+            return self.timeout
+        p99, backoff = self._percentile_s(url, 990)
+        if p99 is None:
+            return self.timeout
+        t = max(p99 * self.multiplier, self.min_timeout) * 2**backoff
+        return min(t, self.timeout)
+
+    def hedge_after(self, url: str) -> Optional[float]:
+        """Seconds after which a check of url is hedged (None: not hedged)."""
+        if not self.hedge:
+            return None
+        p95, _backoff = self._percentile_s(url, 950)
+        return p95
+
+    def _count_adapted(self, timeout: float) -> None:
+        if timeout < self.timeout:
+            with self._lock:
+                self.stats.adapted += 1
+
+    def _pick(
+        self, first: Optional[CheckResult], second: Optional[CheckResult]
+    ) -> Optional[CheckResult]:
+        # A healthy result, preferring the original attempt's
+        if first is not None and first.ok:
+            return first
+        if second is not None and second.ok:
+            with self._lock:
+                self.stats.hedge_wins += 1
+            return second
+        return None
+
+    def call(
+        self,
+        check: Callable[..., CheckResult],
+        url: Target,
+        *,
+        executor: Optional[Executor] = None,
+        **kwargs: Any,
+    ) -> CheckResult:
+        """
+        check(url, timeout=..., **kwargs) with the URL's timeout; hedged on
+        `executor` (both attempts run there) when hedging is on and one is
+        given. url may be a CheckSpec (learned by its URL).
+        """
+        timeout = self.timeout_for(target_url(url))
+        self._count_adapted(timeout)
+        attempt = functools.partial(check, url, timeout=timeout, **kwargs)
+        delay = self.hedge_after(target_url(url)) if executor is not None else None
+        if executor is None or delay is None:
+            result = attempt()
+        else:
+            result = self._hedged(attempt, delay, executor)
+        self.observe(result)
+        return result
+
+    def _hedged(
+        self, attempt: Callable[[], CheckResult], delay: float, executor: Executor
+    ) -> CheckResult:
+        first = executor.submit(attempt)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+        second = executor.submit(attempt)
+        with self._lock:
+            self.stats.hedged += 1
+
+        pending: set[Future[CheckResult]] = {first, second}
+        while pending:
+            _done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = self._pick(
+                first.result() if first.done() else None,
+                second.result() if second.done() else None,
+            )
+            if winner is not None:
+                # A running loser cannot be interrupted; its result is dropped
+                for f in pending:
+                    f.cancel()
+                return winner
+        return first.result()
+
+    async def acall(
+        self,
+        check: Callable[..., Awaitable[CheckResult]],
+        url: Target,
+        **kwargs: Any,
+    ) -> CheckResult:
+        """Asyncio counterpart of `call`; the losing attempt is cancelled."""
+        timeout = self.timeout_for(target_url(url))
+        self._count_adapted(timeout)
+        delay = self.hedge_after(target_url(url))
+
+        def _start() -> asyncio.Task[CheckResult]:
+            return asyncio.ensure_future(check(url, timeout=timeout, **kwargs))
+
+        if delay is None:
+            result = await check(url, timeout=timeout, **kwargs)
+        else:
+            result = await self._ahedged(_start, delay)
+        self.observe(result)
+        return result
+
+    async def _ahedged(
+        self, start: Callable[[], asyncio.Task[CheckResult]], delay: float
+    ) -> CheckResult:
+        first = start()
+        pending: set[asyncio.Task[CheckResult]] = {first}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return first.result()
+            second = start()
+            pending.add(second)
+            with self._lock:
+                self.stats.hedged += 1
+
+            while pending:
+                _done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                winner = self._pick(
+                    first.result() if first.done() else None,
+                    second.result() if second.done() else None,
+                )
+                if winner is not None:
+                    return winner
+            return first.result()
+        finally:
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,769 @@
+# SPDX-License-Identifier: MIT
+"""Checking URLs with a minimal asyncio HTTP/1.1 client.
+
+This backend exists for very large URL lists: every check is a coroutine on a
+single event loop, so an in-flight check costs a socket and a small frame
+instead of a thread stack. Only what `check_url` needs is implemented: GET and
+HEAD, redirect following, draining the body (Content-Length, chunked, or
+read-until-close; optionally capped), and a keep-alive connection pool per
+host.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import socket
+import ssl
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Awaitable, Iterable, Optional, TypeVar
+from urllib.parse import urljoin, urlsplit
+
+from .adaptive import AdaptiveTimeouts
+from .breaker import CircuitBreaker, skipped_result
+from .dns import DnsCache
+from .http import MAX_HOST_POOLS
+from .model import (
+    HEAD_FALLBACK_STATUSES,
+    METHODS,
+    CheckResult,
+    ConnectionStats,
+    RetryStats,
+    Target,
+    target_url,
+)
+from .phases import PhaseTimer
+from .profiling import Profiler
+from .retry import Retrier, RetryPolicy
+from .schedule import HostQueue, RetryQueue, window_size
+from .validate import check_header, is_ok_status
+from .validators import ValidatorCache
+
+T = TypeVar("T")
+
+# Same limit as requests.Session.max_redirects
+MAX_REDIRECTS = 30
+REDIRECT_STATUSES = frozenset({301, 302, 303, 307, 308})
+
+# Headers not forwarded when a redirect leaves the original (scheme, host,
+# port): credentials, and validators that belong to the original URL
+_ORIGIN_ONLY_HEADERS = frozenset(
+    {
+        "authorization",
+        "proxy-authorization",
+        "cookie",
+        "if-none-match",
+        "if-modified-since",
+    }
+)
+
+_READ_CHUNK = 64 * 1024
+_ssl_context: ssl.SSLContext | None = None
+
+
+class ProtocolError(Exception):
+    """The server response could not be parsed as HTTP/1.x."""
+
+
+class TooManyRedirects(ProtocolError):
+    """More than MAX_REDIRECTS redirects were followed."""
+
+
+class ConnectionClosed(ProtocolError):
+    """The server closed the connection before sending a status line."""
+
+
+class ConnectTimeout(TimeoutError):
+    """The connection (DNS, TCP and TLS) was not established in time."""
+
+
+_PoolKey = tuple[str, str, int]
+_Conn = tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+def _get_ssl_context() -> ssl.SSLContext:
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = ssl.create_default_context()
+    return _ssl_context
+
+
+async def _with_timeout(aw: Awaitable[T], timeout: float) -> T:
+    try:
+        return await asyncio.wait_for(aw, timeout)
+    except TimeoutError:
+        raise TimeoutError(f"timed out after {timeout} s") from None
+
+
+async def _resolve(host: str, port: int, dns: Optional[DnsCache]) -> list[str]:
+    loop = asyncio.get_running_loop()
+    if dns is None:
+        infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        return list(dict.fromkeys(str(info[4][0]) for info in infos))
+    addresses = dns.cached(host)
+    if addresses is None:
+        # Blocking lookup in the default executor, like loop.getaddrinfo
+        addresses = await loop.run_in_executor(None, dns.resolve, host)
+    return addresses
+
+
+async def _open(
+    host: str,
+    port: int,
+    *,
+    https: bool,
+    timer: PhaseTimer,
+    dns: Optional[DnsCache],
+) -> _Conn:
+    # Resolve, connect and handshake as separate steps so each can be timed.
+    t0 = time.perf_counter_ns()
+    try:
+        addresses = await _resolve(host, port, dns)
+    finally:
+        t1 = time.perf_counter_ns()
+        timer.add("dns", t1 - t0)
+
+    try:
+        err: Optional[OSError] = None
+        for address in addresses:
+            try:
+                reader, writer = await asyncio.open_connection(address, port)
+                break
+            except OSError as e:
+                err = e
+        else:
+            raise err or OSError(f"No addresses for {host!r}")
+    finally:
+        t2 = time.perf_counter_ns()
+        timer.add("connect", t2 - t1)
+
+    if not https:
+        timer.add("tls", 0)
+        return reader, writer
+    try:
+        await writer.start_tls(_get_ssl_context(), server_hostname=host)
+    except BaseException:
+        writer.transport.abort()
+        raise
+    finally:
+        timer.add("tls", time.perf_counter_ns() - t2)
+    return reader, writer
+
+
+async def _close(writer: asyncio.StreamWriter) -> None:
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except (OSError, ssl.SSLError):
+        pass
+
+
+class ConnectionPool:
+    """
+    Keep-alive connections per (scheme, host, port), at most `pool_size` idle
+    connections each. `stats` counts new vs reused connections. New
+    connections resolve host names through `dns_cache`, if given.
+
+    Idle connections are kept for at most `max_hosts` keys (like the threads
+    backend's MAX_HOST_POOLS): releasing to a new key beyond that closes the
+    idle connections of the least recently used one, so open sockets stay
+    bounded however many hosts a run sees.
+    """
+
+    def __init__(
+        self,
+        *,
+        pool_size: int = 10,
+        dns_cache: Optional[DnsCache] = None,
+        max_hosts: int = MAX_HOST_POOLS,
+    ) -> None:
+        if max_hosts < 1:
+            raise ValueError(f"max_hosts must be >= 1 (got {max_hosts})")
+        self.pool_size = pool_size
+        self.dns_cache = dns_cache
+        self.max_hosts = max_hosts
+        self.stats = ConnectionStats()
+        self._idle: OrderedDict[_PoolKey, list[_Conn]] = OrderedDict()
+
+    async def acquire(
+        self, key: _PoolKey, timeout: float, timer: Optional[PhaseTimer] = None
+    ) -> tuple[_Conn, bool]:
+        """Return ((reader, writer), reused); new connections are timed."""
+        idle = self._idle.get(key)
+        while idle:
+            reader, writer = idle.pop()
+            if not idle and self._idle.get(key) is idle:
+                del self._idle[key]
+            if not writer.is_closing() and not reader.at_eof():
+                self.stats.reused += 1
+                return (reader, writer), True
+            await _close(writer)
+
+        scheme, host, port = key
+        try:
+            conn = await _with_timeout(
+                _open(
+                    host,
+                    port,
+                    https=scheme == "https",
+                    timer=timer or PhaseTimer(),
+                    dns=self.dns_cache,
+                ),
+                timeout,
+            )
+        except TimeoutError as e:
+            raise ConnectTimeout(str(e)) from None
+        self.stats.new += 1
+        return conn, False
+
+    async def release(self, key: _PoolKey, conn: _Conn) -> None:
+        idle = self._idle.get(key)
+        if idle is None:
+            idle = self._idle[key] = []
+        else:
+            self._idle.move_to_end(key)
+        if len(idle) >= self.pool_size:
+            await _close(conn[1])
+            return
+        idle.append(conn)
+        while len(self._idle) > self.max_hosts:
+            _key, evicted = self._idle.popitem(last=False)
+            for _reader, writer in evicted:
+                await _close(writer)
+
+    def idle_count(self) -> int:
+        """Idle connections currently kept, over all keys."""
+        return sum(len(conns) for conns in self._idle.values())
+
+    async def aclose(self) -> None:
+        idle, self._idle = self._idle, OrderedDict()
+        for conns in idle.values():
+            for _reader, writer in conns:
+                await _close(writer)
+
+
+async def _read_head(
+    reader: asyncio.StreamReader, timeout: float
+) -> tuple[str, int, dict[str, str]]:
+    status_line = await _with_timeout(reader.readline(), timeout)
+    if not status_line:
+        raise ConnectionClosed("Connection closed before status line")
+    parts = status_line.decode("latin-1").split(None, 2)
+    if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+        raise ProtocolError(f"Invalid status line: {status_line[:100]!r}")
+    version = parts[0]
+    status = int(parts[1])
+
+    headers: dict[str, str] = {}
+    while True:
+        line = await _with_timeout(reader.readline(), timeout)
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, sep, value = line.decode("latin-1").partition(":")
+        if not sep:
+            raise ProtocolError(f"Invalid header line: {line[:100]!r}")
+        headers[name.strip().lower()] = value.strip()
+    return version, status, headers
+
+
+async def _discard(reader: asyncio.StreamReader, n: int, timeout: float) -> None:
+    while n > 0:
+        chunk = await _with_timeout(reader.read(min(n, _READ_CHUNK)), timeout)
+        if not chunk:
+            raise asyncio.IncompleteReadError(b"", n)
+        n -= len(chunk)
+
+
+async def _drain_body(
+    reader: asyncio.StreamReader,
+    status: int,
+    headers: dict[str, str],
+    timeout: float,
+    *,
+    head: bool = False,
+    limit: Optional[int] = None,
+) -> tuple[bool, int]:
+    """
+    Read and discard the body, at most `limit` bytes of it.
+
+    Returns (reusable, body bytes read); reusable is False if the body ran
+    until EOF or was cut short by `limit`.
+    """
+    if head or status in (204, 304) or 100 <= status <= 199:
+        return True, 0
+
+    read = 0
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        while True:
+            size_line = await _with_timeout(reader.readline(), timeout)
+            try:
+                size = int(size_line.split(b";", 1)[0].strip(), 16)
+            except ValueError:
+                raise ProtocolError(
+                    f"Invalid chunk size: {size_line[:100]!r}"
+                ) from None
+            if size == 0:
+                # Trailer section ends with an empty line
+                while await _with_timeout(reader.readline(), timeout) not in (
+                    b"\r\n",
+                    b"\n",
+                    b"",
+                ):
+                    pass
+                return True, read
+            take = size if limit is None else min(size, limit - read)
+            await _discard(reader, take, timeout)
+            read += take
+            if take < size:
+                return False, read
+            await _discard(reader, 2, timeout)  # CRLF after the chunk data
+
+    length = headers.get("content-length")
+    if length is not None:
+        if not length.isdigit():
+            raise ProtocolError(f"Invalid Content-Length: {length!r}")
+        size = int(length)
+        take = size if limit is None else min(size, limit)
+        await _discard(reader, take, timeout)
+        return take == size, take
+
+    # No framing: the body runs until the server closes the connection
+    while limit is None or read < limit:
+        n = _READ_CHUNK if limit is None else min(_READ_CHUNK, limit - read)
+        chunk = await _with_timeout(reader.read(n), timeout)
+        if not chunk:
+            break
+        read += len(chunk)
+    return False, read
+
+
+async def _exchange(
+    pool: ConnectionPool,
+    key: _PoolKey,
+    request: bytes,
+    timeout: float,
+    timer: PhaseTimer,
+    *,
+    head: bool = False,
+    limit: Optional[int] = None,
+) -> tuple[int, dict[str, str], int]:
+    """(status, headers, body bytes read) of one request/response."""
+    # A pooled connection may have been closed by the server while idle;
+    # in that case retry once on a fresh connection.
+    for attempt in range(2):
+        (reader, writer), reused = await pool.acquire(key, timeout, timer)
+        keep_alive = False
+        try:
+            writer.write(request)
+            await _with_timeout(writer.drain(), timeout)
+            timer.sent()
+            try:
+                version, status, headers = await _read_head(reader, timeout)
+                timer.headers_received()
+            except (ConnectionClosed, ConnectionResetError, BrokenPipeError):
+                if reused and attempt == 0:
+                    continue
+                raise
+            reusable, nbytes = await _drain_body(
+                reader, status, headers, timeout, head=head, limit=limit
+            )
+            keep_alive = (
+                reusable
+                and version == "HTTP/1.1"
+                and headers.get("connection", "").lower() != "close"
+            )
+            return status, headers, nbytes
+        finally:
+            if keep_alive:
+                await pool.release(key, (reader, writer))
+            else:
+                await _close(writer)
+    raise AssertionError("unreachable")
+
+
+async def _get_status(
+    url: str,
+    *,
+    timeout: float,
+    pool: ConnectionPool,
+    timer: PhaseTimer,
+    head: bool = False,
+    limit: Optional[int] = None,
+    extra_headers: Optional[dict[str, str]] = None,
+) -> tuple[int, int, dict[str, str]]:
+    """
+    (final status, body bytes read over all hops, final headers) of a GET or
+    HEAD.
+
+    extra_headers are sent on every hop until a redirect leaves the original
+    (scheme, host, port); from then on the _ORIGIN_ONLY_HEADERS among them
+    are dropped (as requests drops Authorization). A header that would not
+    fit on one line raises ValueError before anything is sent.
+    """
+    verb = "HEAD" if head else "GET"
+    for k, v in (extra_headers or {}).items():
+        check_header(k, v)
+    extra = "".join(f"{k}: {v}\r\n" for k, v in (extra_headers or {}).items())
+    origin: Optional[_PoolKey] = None
+    total = 0
+    for _ in range(MAX_REDIRECTS + 1):
+        parts = urlsplit(url)
+        https = parts.scheme == "https"
+        host = parts.hostname or ""
+        port = parts.port or (443 if https else 80)
+        if origin is None:
+            origin = (parts.scheme, host, port)
+        elif extra and (parts.scheme, host, port) != origin:
+            extra = "".join(
+                f"{k}: {v}\r\n"
+                for k, v in (extra_headers or {}).items()
+                if k.lower() not in _ORIGIN_ONLY_HEADERS
+            )
+        host_header = parts.netloc.rpartition("@")[2]
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+
+        request = (
+            f"{verb} {target} HTTP/1.1\r\n"
+            f"Host: {host_header}\r\n"
+            "User-Agent: url-monitor\r\n"
+            "Accept: */*\r\n"
+            "Accept-Encoding: identity\r\n"
+            "Connection: keep-alive\r\n"
+            f"{extra}"
+            "\r\n"
+        ).encode("latin-1")
+        status, headers, nbytes = await _exchange(
+            pool,
+            (parts.scheme, host, port),
+            request,
+            timeout,
+            timer,
+            head=head,
+            limit=limit,
+        )
+        total += nbytes
+
+        location = headers.get("location")
+        if status in REDIRECT_STATUSES and location:
+            url = urljoin(url, location)
+            continue
+        return status, total, headers
+
+    raise TooManyRedirects(f"Exceeded {MAX_REDIRECTS} redirects.")
+
+
+async def _request(
+    url: str,
+    *,
+    timeout: float,
+    pool: ConnectionPool,
+    timer: PhaseTimer,
+    method: str,
+    max_bytes: Optional[int],
+    validators: Optional[ValidatorCache],
+    headers: Optional[dict[str, str]] = None,
+) -> tuple[int, int]:
+    extra_headers = validators.request_headers(url) if validators else None
+    if headers:
+        extra_headers = {**headers, **(extra_headers or {})}
+    total = 0
+    if method == "head":
+        status, total, headers = await _get_status(
+            url,
+            timeout=timeout,
+            pool=pool,
+            timer=timer,
+            head=True,
+            extra_headers=extra_headers,
+        )
+        consumed = True
+    if method != "head" or status in HEAD_FALLBACK_STATUSES:
+        limit = max_bytes if method == "get" else 0
+        status, nbytes, headers = await _get_status(
+            url,
+            timeout=timeout,
+            pool=pool,
+            timer=timer,
+            limit=limit,
+            extra_headers=extra_headers,
+        )
+        total += nbytes
+        consumed = limit is None
+    if validators is not None:
+        validators.update(url, status, headers, total if consumed else None)
+    return status, total
+
+
+async def check_url_async(
+    url: str,
+    *,
+    timeout: float = 5.0,
+    pool: Optional[ConnectionPool] = None,
+    method: str = "get",
+    max_bytes: Optional[int] = None,
+    validators: Optional[ValidatorCache] = None,
+    headers: Optional[dict[str, str]] = None,
+    expected_status: Optional[frozenset[int]] = None,
+) -> CheckResult:
+    """
+    Asyncio counterpart of `url_monitor.http.check_url`.
+
+    ok:
+      - True for 2xx responses and 304 Not Modified, or, if expected_status
+        is given, for exactly those statuses
+      - False for other responses and exceptions
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS} (got {method!r})")
+    if max_bytes is not None and max_bytes < 0:
+        raise ValueError(f"max_bytes must be >= 0 (got {max_bytes})")
+
+    owns_pool = pool is None
+    conns = pool or ConnectionPool()
+    timer = PhaseTimer()
+
+    t0 = time.perf_counter()
+    try:
+        status_code, nbytes = await _request(
+            url,
+            timeout=timeout,
+            pool=conns,
+            timer=timer,
+            method=method,
+            max_bytes=max_bytes,
+            validators=validators,
+            headers=headers,
+        )
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0
+        return CheckResult(
+            url=url,
+            ok=(
+                is_ok_status(status_code)
+                if expected_status is None
+                else status_code in expected_status
+            ),
+            status_code=status_code,
+            elapsed_ms=elapsed_ms,
+            error=None,
+            phases=timer.finish(),
+            bytes_received=nbytes,
+        )
+    except (OSError, ProtocolError, asyncio.IncompleteReadError, ValueError) as e:
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0
+        return CheckResult(
+            url=url,
+            ok=False,
+            status_code=None,
+            elapsed_ms=elapsed_ms,
+            error=f"{type(e).__name__}: {e}",
+            phases=timer.finish(),
+        )
+    finally:
+        if owns_pool:
+            await conns.aclose()
+
+
+async def check_target_async(
+    target: Target,
+    *,
+    timeout: float = 5.0,
+    pool: Optional[ConnectionPool] = None,
+    method: str = "get",
+    max_bytes: Optional[int] = None,
+    validators: Optional[ValidatorCache] = None,
+) -> CheckResult:
+    """Asyncio counterpart of `url_monitor.http.check_target`."""
+    if isinstance(target, str):
+        return await check_url_async(
+            target,
+            timeout=timeout,
+            pool=pool,
+            method=method,
+            max_bytes=max_bytes,
+            validators=validators,
+        )
+    return await check_url_async(
+        target.url,
+        timeout=timeout if target.timeout is None else target.timeout,
+        pool=pool,
+        method=method if target.method is None else target.method,
+        max_bytes=max_bytes,
+        validators=validators,
+        headers=target.headers,
+        expected_status=target.expected_status,
+    )
+
+
+async def aiter_check_results(
+    urls: Iterable[Target],
+    *,
+    timeout: float = 5.0,
+    concurrency: int = 100,
+    per_host: Optional[int] = None,
+    pool_size: int = 10,
+    connections: Optional[ConnectionStats] = None,
+    dns_cache: Optional[DnsCache] = None,
+    method: str = "get",
+    max_bytes: Optional[int] = None,
+    validators: Optional[ValidatorCache] = None,
+    adaptive: Optional[AdaptiveTimeouts] = None,
+    retry: Optional[RetryPolicy] = None,
+    retry_stats: Optional[RetryStats] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    profiler: Optional[Profiler] = None,
+) -> AsyncIterator[CheckResult]:
+    """
+    Check URLs on the running event loop and yield CheckResults in input order.
+
+    At most `concurrency` checks are in flight (at most `per_host` per host),
+    hosts are served round-robin, and input is read at most `window_size`
+    URLs ahead of the oldest unfinished check, so memory stays flat
+    regardless of how many URLs are fed in.
+
+    With `adaptive`, each check gets its URL's learned timeout (at most
+    `adaptive.timeout`, which replaces `timeout`) and may be hedged.
+    With `retry`, failed checks the policy selects are rescheduled after
+    their backoff while other checks keep running, and with `breaker` checks
+    of hosts whose circuit is open are skipped (see iter_check_results).
+    `profiler` records scheduling and check timings and queue depth.
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be >= 1 (got {concurrency})")
+
+    window = window_size(concurrency)
+    it = enumerate(urls)
+    exhausted = False
+    hosts = HostQueue(per_host=per_host)
+    pool = ConnectionPool(pool_size=pool_size, dns_cache=dns_cache)
+    in_flight: dict[
+        asyncio.Task[CheckResult], tuple[int, str, Target, Optional[int]]
+    ] = {}
+    delayed = RetryQueue()
+    retrier = Retrier(retry, stats=retry_stats) if retry is not None else None
+    done: dict[int, CheckResult] = {}
+    next_index = 0
+    buffered = 0  # read from input but not yet yielded
+
+    try:
+        while True:
+            while not exhausted and buffered < window:
+                item = next(it, None)
+                if item is None:
+                    exhausted = True
+                    break
+                hosts.push(*item)
+                buffered += 1
+                if retrier is not None:
+                    retrier.started()
+                if profiler is not None:
+                    profiler.queued(item[0])
+            delayed.push_due(hosts)
+
+            while len(in_flight) < concurrency:
+                ready = hosts.pop_ready()
+                if ready is None:
+                    break
+                i, u, host = ready
+                ticket = None if breaker is None else breaker.allow(host)
+                if breaker is not None and ticket is None:
+                    hosts.release(host)
+                    done[i] = delayed.finish(i, skipped_result(target_url(u)))
+                    continue
+                check = functools.partial(
+                    check_target_async,
+                    pool=pool,
+                    method=method,
+                    max_bytes=max_bytes,
+                    validators=validators,
+                )
+                if profiler is not None:
+                    profiler.started(i)
+                task = asyncio.create_task(
+                    check(u, timeout=timeout)
+                    if adaptive is None
+                    else adaptive.acall(check, u)
+                )
+                in_flight[task] = (i, host, u, ticket)
+
+            if profiler is not None:
+                profiler.sample(
+                    queued=len(hosts) + len(delayed), in_flight=len(in_flight)
+                )
+            if in_flight:
+                finished, _ = await asyncio.wait(
+                    in_flight,
+                    timeout=delayed.wait_s(),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in finished:
+                    i, host, u, ticket = in_flight.pop(task)
+                    hosts.release(host)
+                    r = task.result()
+                    if profiler is not None:
+                        profiler.finished(i, r)
+                    if breaker is not None:
+                        breaker.record(host, r, ticket)
+                    final = delayed.settle(retrier, i, u, r)
+                    if final is not None:
+                        done[i] = final
+            elif delayed:
+                await asyncio.sleep(delayed.wait_s() or 0.0)
+
+            while next_index in done:
+                yield done.pop(next_index)
+                next_index += 1
+                buffered -= 1
+
+            if exhausted and not (in_flight or delayed or hosts):
+                break
+    finally:
+        for task in in_flight:
+            task.cancel()
+        await pool.aclose()
+        if connections is not None:
+            connections.new += pool.stats.new
+            connections.reused += pool.stats.reused
+
+
+async def check_urls_async(
+    urls: Iterable[Target],
+    *,
+    timeout: float = 5.0,
+    concurrency: int = 100,
+    per_host: Optional[int] = None,
+    pool_size: int = 10,
+    connections: Optional[ConnectionStats] = None,
+    dns_cache: Optional[DnsCache] = None,
+    method: str = "get",
+    max_bytes: Optional[int] = None,
+    validators: Optional[ValidatorCache] = None,
+    adaptive: Optional[AdaptiveTimeouts] = None,
+    retry: Optional[RetryPolicy] = None,
+    retry_stats: Optional[RetryStats] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    profiler: Optional[Profiler] = None,
+) -> list[CheckResult]:
+    """Check URLs concurrently on one event loop; results keep input order."""
+    return [
+        r
+        async for r in aiter_check_results(
+            urls,
+            timeout=timeout,
+            concurrency=concurrency,
+            per_host=per_host,
+            pool_size=pool_size,
+            connections=connections,
+            dns_cache=dns_cache,
+            method=method,
+            max_bytes=max_bytes,
+            validators=validators,
+            adaptive=adaptive,
+            retry=retry,
+            retry_stats=retry_stats,
+            breaker=breaker,
+            profiler=profiler,
+        )
+    ]
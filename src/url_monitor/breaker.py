@@ -0,0 +1,130 @@
+# SPDX-License-Identifier: MIT
+"""Per-host circuit breaker: stop checking hosts that do not answer."""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from .model import BreakerStats, CheckResult
+from .retry import classify_failure
+
+SKIPPED_ERROR = "skipped: circuit open"
+
+# Failures that mean "the host could not be reached"; any response, whatever
+# its status, shows the host is up. Of timeouts, only connect timeouts
+# count: a read timeout means the host accepted the connection (it is slow,
+# not down).
+CONNECT_FAILURES = frozenset({"timeout", "dns", "tls", "connection"})
+
+# Error types of a timeout before the connection was established: requests
+# (threads backend) and async_http.ConnectTimeout (asyncio backend)
+_CONNECT_TIMEOUT_ERRORS = frozenset({"ConnectTimeout", "ConnectTimeoutError"})
+
+
+def is_connect_failure(r: CheckResult) -> bool:
+    """True if r failed without reaching its host (see CONNECT_FAILURES)."""
+    kind = classify_failure(r)
+    if kind == "timeout":
+        type_name = (r.error or "").partition(": ")[0]
+        # classify_failure reports requests' ConnectionError wrapping a
+        # ConnectTimeoutError as a timeout, too
+        return type_name in _CONNECT_TIMEOUT_ERRORS or type_name == "ConnectionError"
+    return kind in CONNECT_FAILURES
+
+
+def skipped_result(url: str) -> CheckResult:
+    """Result for a check not run because its host's circuit is open."""
+    return CheckResult(
+        url=url,
+        ok=False,
+        status_code=None,
+        elapsed_ms=None,
+        error=SKIPPED_ERROR,
+        skipped=True,
+    )
+
+
+@dataclass(slots=True)
+class _Circuit:
+    failures: int = 0  # consecutive connect failures
+    opened_at: float | None = None  # None: closed
+    probe: int = 0  # ticket of the half-open probe in flight (0: none)
+
+
+class CircuitBreaker:
+    """
+    Circuit per host (the HostQueue key, see validate.url_host).
+
+    - closed: checks run; `threshold` consecutive connect failures (see
+      CONNECT_FAILURES; read timeouts are not among them) open the circuit
+    - open: checks of the host are skipped for `reset_after` seconds
+    - half-open: then one probe check runs (others are still skipped); any
+      response closes the circuit, another connect failure re-opens it
+
+    `allow` hands out a ticket per admitted check, to pass back to `record`
+    with its result: only the probe's own result ends the half-open state,
+    not a failure of a check dispatched before the circuit opened.
+
+    Only hosts with recent connect failures are kept.
+
+    Not thread-safe; a dispatcher calls it from one thread (or the event
+    loop). `stats` counts circuits opened and half-open probes.
+    """
+
+    def __init__(
+        self,
+        *,
+        threshold: int = 5,
+        reset_after: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if threshold < 1:
+            raise ValueError(f"threshold must be >= 1 (got {threshold})")
+        if reset_after <= 0:
+            raise ValueError(f"reset_after must be > 0 (got {reset_after})")
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.clock = clock
+        self.stats = BreakerStats()
+        self._circuits: dict[str, _Circuit] = {}
+        self._tickets = 0
+
+    def is_open(self, host: str) -> bool:
+        c = self._circuits.get(host)
+        return c is not None and c.opened_at is not None
+
+    def allow(self, host: str) -> int | None:
+        """
+        Whether a check of host may run now: None to skip it, else its
+        ticket (a positive int) for `record`.
+        """
+        c = self._circuits.get(host)
+        if c is not None and c.opened_at is not None:
+            if c.probe or self.clock() - c.opened_at < self.reset_after:
+                return None
+        self._tickets += 1
+        if c is not None and c.opened_at is not None:
+            c.probe = self._tickets
+            self.stats.probes += 1
+        return self._tickets
+
+    def record(self, host: str, r: CheckResult, ticket: int | None = None) -> None:
+        """
+        Update host's circuit with the result of a check that ran; ticket
+        is what `allow` returned for it.
+        """
+        if not is_connect_failure(r):
+            # The host was reached (whatever the status): close its circuit
+            self._circuits.pop(host, None)
+            return
+        c = self._circuits.setdefault(host, _Circuit())
+        c.failures += 1
+        probe = ticket is not None and ticket == c.probe
+        if probe or (c.opened_at is None and c.failures >= self.threshold):
+            if c.opened_at is None:
+                self.stats.opened += 1
+            c.opened_at = self.clock()
+        if probe:
+            c.probe = 0
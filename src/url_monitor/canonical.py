@@ -0,0 +1,122 @@
+# SPDX-License-Identifier: MIT
+"""URL canonicalization and deduplication of the input.
+
+`canonical_url` maps spellings of a URL that RFC 3986 makes equivalent to
+one key:
+
+- scheme and host are lower-cased (userinfo, path and query keep their case)
+- the default port (80 for http, 443 for https) is dropped
+- an empty path becomes "/"
+- the fragment is dropped (it is never sent to the server)
+
+The path and query string are kept as is: a server may treat "/a/" and "/a"
+as different resources, and parameter order can matter to it.
+
+`UrlIndex` checks each canonical URL once: `unique` passes on the first
+spelling of each one and records the rest as aliases, and `fan_out` turns
+the results of the unique URLs back into one result per input line, in
+input order, each alias getting a copy of its endpoint's result with its
+own spelling as url. Both work lazily, so the input can be streamed; the
+results of unique URLs are kept for aliases still to come in a
+ResultStore (typed columns), not as CheckResult objects.
+Inventory entries (CheckSpec) are only aliases of entries with the same
+canonical URL and the same settings.
+"""
+
+from __future__ import annotations
+
+from array import array
+from dataclasses import replace
+from typing import Iterable, Iterator
+from urllib.parse import urlsplit, urlunsplit
+
+from .model import CheckResult, CheckSpec, DedupStats, Target
+from .store import ResultStore
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonical_url(url: str) -> str:
+    p = urlsplit(url)
+    scheme = p.scheme.lower()
+    try:
+        port = p.port
+    except ValueError:
+        return url  # not a port; leave the URL alone
+
+    host = (p.hostname or "").lower()
+    if ":" in host:
+        host = f"[{host}]"  # IPv6 literal
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    userinfo, at, _hostport = p.netloc.rpartition("@")
+    netloc = f"{userinfo}{at}{host}"
+
+    return urlunsplit((scheme, netloc, p.path or "/", p.query, ""))
+
+
+class UrlIndex:
+    """
+    Hash index of canonical URLs for one run (see the module docstring).
+
+    Keeps a 4-byte id per input line, the spellings of the aliases, one
+    dict entry per unique URL and, while fanning out, the results of the
+    unique URLs in a ResultStore (a few dozen bytes each). stats counts
+    input URLs, unique URLs and aliases (the requests saved).
+    """
+
+    def __init__(self) -> None:
+        self._ids: dict[str | CheckSpec, int] = {}  # canonical URL/spec -> id
+        self._slots = array("I")  # input position -> unique id
+        self._aliases: dict[int, str] = {}  # input position -> alias spelling
+        self.stats = DedupStats()
+
+    def unique(self, urls: Iterable[Target]) -> Iterator[Target]:
+        """The first spelling of each canonical URL, in input order."""
+        for url in urls:
+            if isinstance(url, str):
+                key: str | CheckSpec = canonical_url(url)
+            else:
+                key = replace(url, url=canonical_url(url.url), host="")
+            uid = self._ids.get(key)
+            self.stats.urls += 1
+            if uid is None:
+                uid = self._ids[key] = len(self._ids)
+                self._slots.append(uid)
+                self.stats.unique += 1
+                yield url
+            else:
+                self._aliases[len(self._slots)] = (
+                    url if isinstance(url, str) else url.url
+                )
+                self._slots.append(uid)
+                self.stats.aliases += 1
+
+    def fan_out(self, results: Iterable[CheckResult]) -> Iterator[CheckResult]:
+        """
+        One result per input URL, in input order, from the results of the
+        URLs `unique` passed on (in that order).
+
+        Unique ids follow input order, so when the result of unique URL k
+        arrives every input line up to the next new URL can be emitted; no
+        line is held back beyond that. The first spelling of a URL gets
+        its result object as is; aliases get a copy built from the store,
+        since a streamed input may still bring more of them.
+        """
+        done = ResultStore()
+        pos = 0
+        for r in results:
+            done.append(r)
+            while pos < len(self._slots) and self._slots[pos] < len(done):
+                alias = self._aliases.pop(pos, None)
+                if alias is None:
+                    # The first spelling of a URL: the result just received
+                    yield r
+                else:
+                    yield replace(done[self._slots[pos]], url=alias)
+                pos += 1
+        while pos < len(self._slots):
+            # Only aliases are left once every unique URL has its result
+            alias = self._aliases.pop(pos)
+            yield replace(done[self._slots[pos]], url=alias)
+            pos += 1
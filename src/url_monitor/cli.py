@@ -4,16 +4,81 @@
 from __future__ import annotations
 
 import argparse
+import json
+import signal
+import sys
+import threading
+from contextlib import nullcontext
 from pathlib import Path
+from typing import Any, Sequence
 
-from .outputs import save_outputs
+from .adaptive import AdaptiveTimeouts
+from .breaker import CircuitBreaker
+from .dns import DnsCache
+from .inventory import check_readable, inventory_format, load_targets
+from .metrics import MetricsRegistry, MetricsServer, write_textfile
+from .model import METHODS, CheckResult, target_url
+from .outputs import FSYNC_POLICIES, JsonlSink, jsonl_to_json, save_outputs
 from .pipeline import run_monitor
+from .profiling import Profiler, cprofile, render_profile
+from .retry import DEFAULT_RETRY_ON, RetryPolicy, parse_retry_on
+from .runner import BACKENDS
+from .shard import Shard, merge_partials, parse_shard
+from .stats import PERCENTILE_MODES
+from .validators import ValidatorCache
+from .watch import Watcher
+
+
+def _positive_int(value: str) -> int:
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be >= 1 (got {n})")
+    return n
+
+
+def _non_negative_int(value: str) -> int:
+    n = int(value)
+    if n < 0:
+        raise argparse.ArgumentTypeError(f"must be >= 0 (got {n})")
+    return n
+
+
+def _positive_float(value: str) -> float:
+    x = float(value)
+    if x <= 0:
+        raise argparse.ArgumentTypeError(f"must be > 0 (got {x})")
+    return x
+
+
+def _retry_on(value: str) -> frozenset[str]:
+    try:
+        return parse_retry_on(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def _shard(value: str) -> Shard:
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
 
 
 def build_parser() -> argparse.ArgumentParser:
-    p = argparse.ArgumentParser(prog="url-monitor")
+    p = argparse.ArgumentParser(
+        prog="url-monitor",
+        epilog=(
+            "Continuous mode: url-monitor watch --help; "
+            "merging sharded runs: url-monitor merge --help"
+        ),
+    )
     p.add_argument(
-        "--input", default="urls.txt", help="Path to input file (default: urls.txt)"
+        "--input",
+        default="urls.txt",
+        help=(
+            "Path to input file: a URL list, or a .jsonl/.json/.csv/.yaml "
+            "inventory with per-URL settings (default: urls.txt)"
+        ),
     )
     p.add_argument(
         "--out",
@@ -34,34 +99,652 @@ def build_parser() -> argparse.ArgumentParser:
     p.add_argument(
         "--strict", action="store_true", help="Fail fast on invalid input URLs"
     )
+    p.add_argument(
+        "--concurrency",
+        type=_positive_int,
+        default=1,
+        help="Number of checks to run in parallel (default: 1)",
+    )
+    p.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="threads",
+        help="HTTP backend: threads (requests) or asyncio (default: threads)",
+    )
+    p.add_argument(
+        "--per-host",
+        type=_positive_int,
+        default=None,
+        help="Max concurrent checks per host (default: no per-host cap)",
+    )
+    p.add_argument(
+        "--pool-size",
+        type=_positive_int,
+        default=10,
+        help="Keep-alive connections kept per host (default: 10)",
+    )
+    p.add_argument(
+        "--stream",
+        action="store_true",
+        help="Parse the input lazily and start checking before it is fully read",
+    )
+    p.add_argument(
+        "--percentiles",
+        choices=PERCENTILE_MODES,
+        default="exact",
+        help=(
+            "Latency percentiles: exact (keeps every sample) or sketch "
+            "(bounded memory, within 1%% relative error) (default: exact)"
+        ),
+    )
+    p.add_argument(
+        "--jsonl",
+        action="store_true",
+        help=(
+            "With --out-dir: append each result to results.jsonl as it completes "
+            "instead of writing results.json at the end"
+        ),
+    )
+    p.add_argument(
+        "--fsync",
+        choices=FSYNC_POLICIES,
+        default="batch",
+        help="When --jsonl syncs results to disk (default: batch)",
+    )
+    p.add_argument(
+        "--pretty-json",
+        action="store_true",
+        help="With --jsonl: also write results.json, converted from results.jsonl",
+    )
+    p.add_argument(
+        "--compact",
+        action="store_true",
+        help="Keep results in a compact columnar store (less memory on large runs)",
+    )
+    p.add_argument(
+        "--history",
+        default=None,
+        help="SQLite file to append this run to; adds a Trends section to the report",
+    )
+    p.add_argument(
+        "--trend-hours",
+        type=_positive_int,
+        default=24,
+        help="With --history: hours of history the Trends section covers (default: 24)",
+    )
+    p.add_argument(
+        "--dns-cache",
+        action="store_true",
+        help="Resolve each host once (prefetched before checks start) and reuse it",
+    )
+    p.add_argument(
+        "--dns-ttl",
+        type=_positive_float,
+        default=300.0,
+        help="With --dns-cache: seconds a resolved address is reused (default: 300.0)",
+    )
+    p.add_argument(
+        "--method",
+        choices=METHODS,
+        default="get",
+        help=(
+            "How URLs are requested: get (full body), head (falls back to GET "
+            "if HEAD is rejected) or get-headers-only (default: get)"
+        ),
+    )
+    p.add_argument(
+        "--max-bytes",
+        type=_non_negative_int,
+        default=None,
+        help="With --method get: stop reading a body after this many bytes",
+    )
+    p.add_argument(
+        "--validator-cache",
+        default=None,
+        help=(
+            "JSON file of ETag/Last-Modified validators kept between runs; "
+            "URLs seen before are requested conditionally"
+        ),
+    )
+    p.add_argument(
+        "--validator-cache-size",
+        type=_positive_int,
+        default=10_000,
+        help="With --validator-cache: most URLs remembered (default: 10000)",
+    )
+    p.add_argument(
+        "--adaptive-timeout",
+        action="store_true",
+        help=(
+            "Per-URL timeouts from recent successful latencies "
+            "(2 x p99, at most --timeout); learned from --history"
+        ),
+    )
+    p.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Send a second attempt for checks running past their URL's p95",
+    )
+    p.add_argument(
+        "--retries",
+        type=_non_negative_int,
+        default=0,
+        help="Retry a failed check up to N times (default: 0, no retries)",
+    )
+    p.add_argument(
+        "--retry-on",
+        type=_retry_on,
+        default=DEFAULT_RETRY_ON,
+        help=(
+            "With --retries: comma-separated failure kinds (timeout, dns, tls, "
+            "connection, protocol, other), status classes (5xx) and status "
+            "codes (503) to retry (default: timeout,connection,429,502,503,504)"
+        ),
+    )
+    p.add_argument(
+        "--retry-budget",
+        type=float,
+        default=10.0,
+        help=(
+            "With --retries: retries may add at most this percentage of the "
+            "checks (at least 3 retries; default: 10)"
+        ),
+    )
+    p.add_argument(
+        "--retry-backoff",
+        type=float,
+        default=0.2,
+        help=(
+            "With --retries: base backoff seconds, doubled per attempt (up to "
+            "5 s) with full jitter (default: 0.2)"
+        ),
+    )
+    p.add_argument(
+        "--circuit-breaker",
+        type=_non_negative_int,
+        default=0,
+        metavar="N",
+        help=(
+            "Skip the remaining URLs of a host after N consecutive connect "
+            "failures (default: 0, off)"
+        ),
+    )
+    p.add_argument(
+        "--circuit-reset",
+        type=_positive_float,
+        default=30.0,
+        help=(
+            "With --circuit-breaker: seconds before an open host gets a "
+            "half-open probe (default: 30.0)"
+        ),
+    )
+    p.add_argument(
+        "--shard",
+        type=_shard,
+        default=None,
+        metavar="I/N",
+        help=(
+            "Check only the hosts of shard I (0-based) of N, assigned by "
+            "consistent hashing of the host"
+        ),
+    )
+    p.add_argument(
+        "--dedupe",
+        action="store_true",
+        help=(
+            "Check each canonical URL once (case of scheme/host, default "
+            "port, empty path and fragment ignored) and copy its result to "
+            "the other spellings"
+        ),
+    )
+    p.add_argument(
+        "--processes",
+        type=_positive_int,
+        default=1,
+        help=(
+            "Worker processes, each checking its share of the hosts with "
+            "--concurrency checks at a time (default: 1)"
+        ),
+    )
+    p.add_argument(
+        "--profile",
+        action="store_true",
+        help=(
+            "Time each stage of the run (load, validate, scheduling, checks, "
+            "summarize, report, save) and print the breakdown to stderr; with "
+            "--out-dir also write profile.json"
+        ),
+    )
+    p.add_argument(
+        "--profile-dump",
+        default=None,
+        help="Run under cProfile and write pstats data to this file",
+    )
+    p.add_argument(
+        "--partial",
+        default=None,
+        help="Write a partial summary for url-monitor merge to this JSON file",
+    )
+    p.add_argument(
+        "--metrics-textfile",
+        default=None,
+        metavar="PATH",
+        help=(
+            "Write Prometheus metrics (latency histograms, status class and "
+            "exception counters) to this file for node_exporter's textfile "
+            "collector"
+        ),
+    )
+    p.add_argument(
+        "--metrics-hosts-only",
+        action="store_true",
+        help="Export latency histograms per host only, not per URL",
+    )
     return p
 
 
-def main(argv: list[str] | None = None) -> int:
-    args = build_parser().parse_args(argv)
+def build_watch_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="url-monitor watch",
+        description=(
+            "Check URLs continuously and refresh report.md + results.json "
+            "from a rolling window until interrupted."
+        ),
+    )
+    p.add_argument(
+        "--input",
+        default="urls.txt",
+        help=(
+            "Path to input file: a URL list, or a .jsonl/.json/.csv/.yaml "
+            "inventory with per-URL settings (default: urls.txt)"
+        ),
+    )
+    p.add_argument(
+        "--out-dir",
+        default="out",
+        help="Directory for report.md + results.json (default: out)",
+    )
+    p.add_argument(
+        "--interval",
+        type=_positive_float,
+        default=60.0,
+        help="Seconds between checks of the same URL (default: 60.0)",
+    )
+    p.add_argument(
+        "--jitter",
+        type=float,
+        default=0.1,
+        help="Random +/- fraction of the interval per check (default: 0.1)",
+    )
+    p.add_argument(
+        "--window",
+        type=_positive_float,
+        default=900.0,
+        help="Seconds of results the outputs are computed from (default: 900.0)",
+    )
+    p.add_argument(
+        "--refresh",
+        type=_positive_float,
+        default=60.0,
+        help="Seconds between output refreshes (default: 60.0)",
+    )
+    p.add_argument(
+        "--timeout",
+        type=float,
+        default=5.0,
+        help="Request timeout seconds (default: 5.0)",
+    )
+    p.add_argument(
+        "--strict", action="store_true", help="Fail fast on invalid input URLs"
+    )
+    p.add_argument(
+        "--concurrency",
+        type=_positive_int,
+        default=4,
+        help="Number of checks to run in parallel (default: 4)",
+    )
+    p.add_argument(
+        "--pool-size",
+        type=_positive_int,
+        default=10,
+        help="Keep-alive connections kept per host (default: 10)",
+    )
+    p.add_argument(
+        "--dns-cache",
+        action="store_true",
+        help="Resolve each host once per --dns-ttl instead of on every connection",
+    )
+    p.add_argument(
+        "--dns-ttl",
+        type=_positive_float,
+        default=300.0,
+        help="With --dns-cache: seconds a resolved address is reused (default: 300.0)",
+    )
+    p.add_argument(
+        "--adaptive-timeout",
+        action="store_true",
+        help=(
+            "Per-URL timeouts from recent successful latencies "
+            "(2 x p99, at most --timeout)"
+        ),
+    )
+    p.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Send a second attempt for checks running past their URL's p95",
+    )
+    p.add_argument(
+        "--metrics-port",
+        type=_positive_int,
+        default=None,
+        metavar="PORT",
+        help=(
+            "Serve Prometheus metrics (latency histograms, status class and "
+            "exception counters) at http://HOST:PORT/metrics"
+        ),
+    )
+    p.add_argument(
+        "--metrics-host",
+        default="127.0.0.1",
+        help="With --metrics-port: address to listen on (default: 127.0.0.1)",
+    )
+    p.add_argument(
+        "--metrics-hosts-only",
+        action="store_true",
+        help="Export latency histograms per host only, not per URL",
+    )
+    return p
+
+
+def build_merge_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="url-monitor merge",
+        description=(
+            "Combine the partial summaries of sharded runs (--partial) into one report."
+        ),
+    )
+    p.add_argument("partials", nargs="+", help="Partial summary JSON files")
+    p.add_argument(
+        "--out",
+        default="report.md",
+        help="Path to output report.md (default: report.md)",
+    )
+    p.add_argument(
+        "--out-dir",
+        default=None,
+        help="If set, write report.md + summary.json into OUT_DIR directory",
+    )
+    return p
+
+
+def _adaptive(
+    args: argparse.Namespace, parser: argparse.ArgumentParser
+) -> AdaptiveTimeouts | None:
+    if not (args.adaptive_timeout or args.hedge):
+        return None
+    timeout = float(args.timeout)
+    try:
+        return AdaptiveTimeouts(
+            timeout=timeout,
+            adapt=bool(args.adaptive_timeout),
+            hedge=bool(args.hedge),
+            # Learned timeouts never go above --timeout, however short it is
+            min_timeout=min(0.25, timeout),
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+
+def _retry(
+    args: argparse.Namespace, parser: argparse.ArgumentParser
+) -> RetryPolicy | None:
+    if not args.retries:
+        return None
+    try:
+        return RetryPolicy(
+            max_attempts=int(args.retries) + 1,
+            retry_on=args.retry_on,
+            backoff_base=float(args.retry_backoff),
+            budget=float(args.retry_budget) / 100.0,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+
+def watch_main(argv: list[str]) -> int:
+    parser = build_watch_parser()
+    args = parser.parse_args(argv)
 
     input_path = Path(args.input)
+    try:
+        check_readable(str(input_path))
+    except ValueError as e:
+        parser.error(str(e))
+    urls, invalids = load_targets(str(input_path), strict=bool(args.strict))
+    out_dir = Path(args.out_dir)
+    metrics = None
+    if args.metrics_port is not None:
+        metrics = MetricsRegistry(per_url=not args.metrics_hosts_only)
+        metrics.preallocate(target_url(u) for u in urls)
 
-    results, summary, report_md, _invalids = run_monitor(
-        input_path,
+    watcher = Watcher(
+        urls,
+        source=str(input_path),
+        out_dir=out_dir,
+        interval=float(args.interval),
+        jitter=float(args.jitter),
+        window=float(args.window),
+        refresh=float(args.refresh),
         timeout=float(args.timeout),
-        strict=bool(args.strict),
+        concurrency=int(args.concurrency),
+        pool_size=int(args.pool_size),
+        invalids=invalids,
+        dns_cache=DnsCache(ttl=float(args.dns_ttl)) if args.dns_cache else None,
+        adaptive=_adaptive(args, parser),
+        metrics=metrics,
     )
 
+    server = None
+    if metrics is not None:
+        server = MetricsServer(
+            metrics, host=str(args.metrics_host), port=int(args.metrics_port)
+        ).start()
+        host, port = server.address
+        print(f"Serving metrics at http://{host}:{port}/metrics")
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda _signum, _frame: stop.set())
+    print(f"Watching {len(urls)} URLs; writing to {out_dir} (Ctrl-C to stop)")
+    try:
+        watcher.run(stop)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server is not None:
+            server.close()
+    return 0
+
+
+def merge_main(argv: list[str]) -> int:
+    parser = build_merge_parser()
+    args = parser.parse_args(argv)
+    paths = [Path(p) for p in args.partials]
+    out_dir = Path(args.out_dir) if args.out_dir else None
+    if out_dir is not None:
+        out_dir.mkdir(parents=True, exist_ok=True)
+    report_path = out_dir / "report.md" if out_dir is not None else Path(args.out)
+    try:
+        _aggregates, summary, _report_md, _invalids = merge_partials(
+            paths, report_path=report_path
+        )
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    if out_dir is not None:
+        (out_dir / "summary.json").write_text(
+            json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        print(f"Wrote: {out_dir / 'report.md'}")
+        print(f"Wrote: {out_dir / 'summary.json'}")
+    else:
+        print(f"Wrote: {report_path}")
+    return 0
+
+
+def _run(
+    args: argparse.Namespace,
+    parser: argparse.ArgumentParser,
+    profiler: Profiler | None,
+) -> None:
+    input_path = Path(args.input)
+    metrics = (
+        MetricsRegistry(per_url=not args.metrics_hosts_only)
+        if args.metrics_textfile
+        else None
+    )
+    validators = None
+    if args.validator_cache:
+        validators = ValidatorCache.load(
+            Path(args.validator_cache), max_entries=int(args.validator_cache_size)
+        )
+
+    sink = None
+    if args.jsonl:
+        sink = JsonlSink(Path(args.out_dir) / "results.jsonl", fsync=str(args.fsync))
     if args.out_dir:
+        Path(args.out_dir).mkdir(parents=True, exist_ok=True)
+
+    try:
+        results, summary, _report_md, _invalids = run_monitor(
+            input_path,
+            timeout=float(args.timeout),
+            strict=bool(args.strict),
+            concurrency=int(args.concurrency),
+            backend=str(args.backend),
+            per_host=args.per_host,
+            pool_size=int(args.pool_size),
+            stream=bool(args.stream),
+            percentiles=str(args.percentiles),
+            on_result=sink.write if sink is not None else None,
+            compact=bool(args.compact),
+            history=Path(args.history) if args.history else None,
+            trend_hours=int(args.trend_hours),
+            dns_cache=(DnsCache(ttl=float(args.dns_ttl)) if args.dns_cache else None),
+            method=str(args.method),
+            max_bytes=args.max_bytes,
+            validators=validators,
+            adaptive=_adaptive(args, parser),
+            retry=_retry(args, parser),
+            breaker=(
+                CircuitBreaker(
+                    threshold=int(args.circuit_breaker),
+                    reset_after=float(args.circuit_reset),
+                )
+                if args.circuit_breaker
+                else None
+            ),
+            shard=args.shard,
+            partial=Path(args.partial) if args.partial else None,
+            processes=int(args.processes),
+            profiler=profiler,
+            metrics=metrics,
+            dedupe=bool(args.dedupe),
+            report_path=_report_path(args),
+        )
+        if validators is not None:
+            validators.save(Path(args.validator_cache))
+        if sink is not None:
+            sink.write_summary(summary, source=str(input_path))
+    finally:
+        if sink is not None:
+            sink.close()
+
+    with profiler.stage("save_outputs") if profiler is not None else nullcontext():
+        _write_outputs(args, sink, results, summary)
+        if metrics is not None:
+            write_textfile(metrics, Path(args.metrics_textfile))
+            print(f"Wrote: {args.metrics_textfile}")
+
+
+def _report_path(args: argparse.Namespace) -> Path:
+    # run_monitor streams the report straight into this file
+    return Path(args.out_dir) / "report.md" if args.out_dir else Path(args.out)
+
+
+def _write_outputs(
+    args: argparse.Namespace,
+    sink: JsonlSink | None,
+    results: Sequence[CheckResult],
+    summary: dict[str, Any],
+) -> None:
+    input_path = Path(args.input)
+    if sink is not None:
+        out_dir = Path(args.out_dir)
+        print(f"Wrote: {out_dir / 'report.md'}")
+        print(f"Wrote: {sink.path}")
+        if args.pretty_json:
+            jsonl_to_json(sink.path, out_dir / "results.json")
+            print(f"Wrote: {out_dir / 'results.json'}")
+    elif args.out_dir:
         out_dir = Path(args.out_dir)
         save_outputs(
             results=results,
             summary=summary,
-            report_md=report_md,
+            report_md=None,
             source=str(input_path),
             out_dir=out_dir,
         )
         print(f"Wrote: {out_dir / 'report.md'}")
         print(f"Wrote: {out_dir / 'results.json'}")
     else:
-        out_path = Path(args.out)
-        out_path.write_text(report_md, encoding="utf-8")
-        print(f"Wrote: {out_path}")
+        print(f"Wrote: {args.out}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ["watch"]:
+        return watch_main(argv[1:])
+    if argv[:1] == ["merge"]:
+        return merge_main(argv[1:])
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.jsonl and not args.out_dir:
+        parser.error("--jsonl requires --out-dir")
+    if args.max_bytes is not None and args.method != "get":
+        parser.error(f"--max-bytes requires --method get (got {args.method})")
+    if args.processes > 1 and (
+        args.dns_cache
+        or args.validator_cache
+        or args.adaptive_timeout
+        or args.hedge
+        or args.shard
+        or args.dedupe
+    ):
+        parser.error(
+            "--processes does not support --dns-cache, --validator-cache, "
+            "--adaptive-timeout, --hedge, --shard or --dedupe"
+        )
+    if args.processes > 1 and inventory_format(args.input) != "txt":
+        parser.error("--processes reads plain URL lists only")
+    try:
+        check_readable(str(args.input))
+    except ValueError as e:
+        parser.error(str(e))
+
+    profiler = Profiler() if args.profile else None
+    with cprofile(Path(args.profile_dump) if args.profile_dump else None):
+        _run(args, parser, profiler)
+    if args.profile_dump:
+        print(f"Wrote: {args.profile_dump}")
+
+    if profiler is not None:
+        profile = profiler.as_dict()
+        print(render_profile(profile), file=sys.stderr)
+        if args.out_dir:
+            profile_path = Path(args.out_dir) / "profile.json"
+            profile_path.write_text(json.dumps(profile, indent=2), encoding="utf-8")
+            print(f"Wrote: {profile_path}")
 
     return 0
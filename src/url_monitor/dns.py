@@ -0,0 +1,178 @@
+# SPDX-License-Identifier: MIT
+"""In-process DNS cache shared by the HTTP backends."""
+
+from __future__ import annotations
+
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Optional
+from urllib.parse import urlsplit
+
+from .model import DnsStats
+
+# (address family, address) pairs in resolver order
+Addresses = list[tuple[int, str]]
+Resolver = Callable[[str], Addresses]
+
+
+def system_resolve(host: str) -> Addresses:
+    """All addresses for host from getaddrinfo, in order, without duplicates."""
+    infos = socket.getaddrinfo(host, None, socket.AF_UNSPEC, socket.SOCK_STREAM)
+    return list(dict.fromkeys((info[0], str(info[4][0])) for info in infos))
+
+
+def _of_family(addresses: Addresses, host: str, family: int) -> list[str]:
+    out = [a for f, a in addresses if family in (socket.AF_UNSPEC, f)]
+    if not out:
+        raise socket.gaierror(
+            socket.EAI_NONAME, f"No address of the requested family for {host!r}"
+        )
+    return out
+
+
+def url_hostnames(urls: Iterable[str]) -> list[str]:
+    """Unique hostnames (no port, lowercased) of urls, in first-seen order."""
+    return list(dict.fromkeys(h for u in urls if (h := urlsplit(u).hostname)))
+
+
+class DnsCache:
+    """
+    Thread-safe cache of resolved addresses per hostname.
+
+    - each host is resolved once for all address families; lookups filter
+      the cached answer by family
+    - positive answers are kept for `ttl` seconds; getaddrinfo does not
+      expose record TTLs, so one fixed TTL applies to every host
+    - failed lookups (socket.gaierror) are cached for `negative_ttl`
+      seconds and re-raised from the cache
+    - concurrent misses for the same host wait for a single lookup
+    - at most `max_entries` hosts are kept (least recently used evicted)
+
+    `stats` counts hits, misses (lookups made on demand), negative hits and
+    lookups made by `prefetch`.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl: float = 300.0,
+        negative_ttl: float = 30.0,
+        max_entries: int = 10_000,
+        resolver: Resolver = system_resolve,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if ttl <= 0 or negative_ttl < 0:
+            raise ValueError(
+                f"ttl must be > 0 and negative_ttl >= 0 (got {ttl}, {negative_ttl})"
+            )
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be >= 1 (got {max_entries})")
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.stats = DnsStats()
+        self._resolver = resolver
+        self._clock = clock
+        self._lock = threading.Lock()
+        # host -> (expires_at, addresses or the cached gaierror)
+        self._entries: OrderedDict[str, tuple[float, Addresses | socket.gaierror]] = (
+            OrderedDict()
+        )
+        self._pending: dict[str, threading.Event] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _fresh(self, key: str) -> bool:
+        # Caller holds the lock
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        if self._clock() >= entry[0]:
+            del self._entries[key]
+            return False
+        return True
+
+    def _get(self, key: str) -> Optional[Addresses]:
+        # Caller holds the lock
+        if not self._fresh(key):
+            return None
+        value = self._entries[key][1]
+        self._entries.move_to_end(key)
+        if isinstance(value, socket.gaierror):
+            self.stats.negative_hits += 1
+            raise socket.gaierror(value.errno, value.strerror)
+        self.stats.hits += 1
+        return value
+
+    def _put(self, key: str, value: Addresses | socket.gaierror, ttl: float) -> None:
+        # Caller holds the lock
+        self._entries[key] = (self._clock() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def cached(self, host: str, family: int = socket.AF_UNSPEC) -> Optional[list[str]]:
+        """Cached addresses (None on a miss) without resolving."""
+        with self._lock:
+            addresses = self._get(host.lower())
+        return None if addresses is None else _of_family(addresses, host, family)
+
+    def resolve(self, host: str, family: int = socket.AF_UNSPEC) -> list[str]:
+        """Addresses for host, from the cache or the resolver (blocking)."""
+        return self._resolve(host, family, prefetch=False)
+
+    def _resolve(self, host: str, family: int, *, prefetch: bool) -> list[str]:
+        key = host.lower()
+        while True:
+            with self._lock:
+                addresses = self._get(key)
+                if addresses is not None:
+                    return _of_family(addresses, host, family)
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = threading.Event()
+                    if prefetch:
+                        self.stats.prefetched += 1
+                    else:
+                        self.stats.misses += 1
+                    break
+            pending.wait()
+
+        try:
+            addresses = self._resolver(host)
+        except socket.gaierror as e:
+            with self._lock:
+                if self.negative_ttl > 0:
+                    self._put(key, e, self.negative_ttl)
+            raise
+        else:
+            with self._lock:
+                self._put(key, addresses, self.ttl)
+            return _of_family(addresses, host, family)
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+
+    def prefetch(self, hosts: Iterable[str], *, concurrency: int = 16) -> None:
+        """Resolve hosts in parallel ahead of use; failures are cached too."""
+        with self._lock:
+            todo = [h for h in dict.fromkeys(hosts) if not self._fresh(h.lower())]
+        if not todo:
+            return
+
+        def _one(host: str) -> None:
+            try:
+                self._resolve(host, socket.AF_UNSPEC, prefetch=True)
+            except OSError:
+                pass
+
+        with ThreadPoolExecutor(
+            max_workers=min(concurrency, len(todo)),
+            thread_name_prefix="url-monitor-dns",
+        ) as pool:
+            list(pool.map(_one, todo))
@@ -0,0 +1,374 @@
+# SPDX-License-Identifier: MIT
+"""Historical check results in a local SQLite database."""
+
+from __future__ import annotations
+
+import math
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+from .model import CheckResult
+from .sketch import QuantileSketch
+from .validate import url_host
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hosts (
+    id INTEGER PRIMARY KEY,
+    host TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS urls (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    host_id INTEGER NOT NULL REFERENCES hosts(id)
+);
+CREATE TABLE IF NOT EXISTS checks (
+    ts REAL NOT NULL,
+    url_id INTEGER NOT NULL REFERENCES urls(id),
+    host_id INTEGER NOT NULL REFERENCES hosts(id),
+    ok INTEGER NOT NULL,
+    status INTEGER,
+    elapsed_ms REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS checks_host_ts ON checks(host_id, ts, ok, elapsed_ms);
+CREATE INDEX IF NOT EXISTS checks_url_ts ON checks(url_id, ts, ok, elapsed_ms);
+CREATE INDEX IF NOT EXISTS checks_ts ON checks(ts, ok, elapsed_ms);
+-- Per-host hourly counters, maintained on insert, for cheap trend queries
+CREATE TABLE IF NOT EXISTS hourly (
+    host_id INTEGER NOT NULL REFERENCES hosts(id),
+    hour INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    failures INTEGER NOT NULL,
+    PRIMARY KEY (host_id, hour)
+) WITHOUT ROWID;
+-- Per-host (host_id 0: all hosts) hourly latency histograms of successful
+-- checks, in QuantileSketch buckets, for percentiles over many checks
+CREATE TABLE IF NOT EXISTS hourly_latency (
+    host_id INTEGER NOT NULL,
+    hour INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (host_id, hour, bucket)
+) WITHOUT ROWID;
+"""
+
+HOUR_S = 3600
+
+# Relative accuracy of percentiles read from the hourly_latency rollup
+ROLLUP_ACCURACY = 0.01
+# hourly_latency bucket of QuantileSketch's zero bucket
+_ZERO_BUCKET = -(1 << 31)
+
+
+class HistoryStore:
+    """
+    Append-only history of CheckResults, indexed by host, URL and time.
+
+    - `record` stores one run (all results share the run timestamp)
+    - `latency_percentile` answers e.g. "p95 for host X over the last 24h"
+      from a covering index (host/url, ts, ok, elapsed_ms); SQLite counts
+      and orders the samples, and only the percentile's rows are fetched
+    - `error_rate_by_hour` and `error_rate_by_host` read the `hourly` rollup
+      table, so they cost one row per host-hour no matter how many checks
+      were stored; `hourly_latency_percentile` likewise reads per-hour
+      latency histograms (within 1%) instead of the checks
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._host_ids: dict[str, int] = {}
+        self._url_ids: dict[str, tuple[int, int]] = {}
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> HistoryStore:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _host_id(self, host: str) -> int:
+        hid = self._host_ids.get(host)
+        if hid is None:
+            self._conn.execute("INSERT OR IGNORE INTO hosts(host) VALUES (?)", (host,))
+            (hid,) = self._conn.execute(
+                "SELECT id FROM hosts WHERE host = ?", (host,)
+            ).fetchone()
+            self._host_ids[host] = hid
+        return hid
+
+    def _ids(self, url: str) -> tuple[int, int]:
+        ids = self._url_ids.get(url)
+        if ids is None:
+            hid = self._host_id(url_host(url))
+            self._conn.execute(
+                "INSERT OR IGNORE INTO urls(url, host_id) VALUES (?, ?)", (url, hid)
+            )
+            (uid,) = self._conn.execute(
+                "SELECT id FROM urls WHERE url = ?", (url,)
+            ).fetchone()
+            ids = self._url_ids[url] = (uid, hid)
+        return ids
+
+    def record(
+        self, results: Iterable[CheckResult], *, ts: Optional[float] = None
+    ) -> int:
+        """Store results checked at `ts` (default: now). Returns the row count."""
+        ts = time.time() if ts is None else ts
+        hour = int(ts // HOUR_S)
+        rollup: dict[int, list[int]] = {}
+        buckets = QuantileSketch(relative_accuracy=ROLLUP_ACCURACY)
+        latency: dict[tuple[int, int], int] = {}
+
+        def _rows() -> Iterator[tuple[Any, ...]]:
+            for r in results:
+                uid, hid = self._ids(r.url)
+                counts = rollup.setdefault(hid, [0, 0])
+                counts[0] += 1
+                counts[1] += 0 if r.ok else 1
+                if r.ok and r.elapsed_ms is not None:
+                    b = buckets.key(r.elapsed_ms)
+                    b = _ZERO_BUCKET if b is None else b
+                    for key in ((hid, b), (0, b)):
+                        latency[key] = latency.get(key, 0) + 1
+                yield (ts, uid, hid, int(r.ok), r.status_code, r.elapsed_ms, r.error)
+
+        with self._conn:
+            cur = self._conn.executemany(
+                "INSERT INTO checks(ts, url_id, host_id, ok, status, elapsed_ms, error)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                _rows(),
+            )
+            self._conn.executemany(
+                "INSERT INTO hourly(host_id, hour, total, failures) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(host_id, hour) DO UPDATE SET"
+                " total = total + excluded.total,"
+                " failures = failures + excluded.failures",
+                [(hid, hour, n, f) for hid, (n, f) in rollup.items()],
+            )
+            self._conn.executemany(
+                "INSERT INTO hourly_latency(host_id, hour, bucket, n)"
+                " VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(host_id, hour, bucket) DO UPDATE SET n = n + excluded.n",
+                [(hid, hour, b, n) for (hid, b), n in latency.items()],
+            )
+        return cur.rowcount
+
+    def _lookup(self, table: str, column: str, value: str) -> Optional[int]:
+        row = self._conn.execute(
+            f"SELECT id FROM {table} WHERE {column} = ?", (value,)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def latency_percentile(
+        self,
+        *,
+        since: float,
+        until: Optional[float] = None,
+        host: Optional[str] = None,
+        url: Optional[str] = None,
+        permille: int = 950,
+    ) -> Optional[float]:
+        """
+        Exact latency percentile of successful checks in [since, until),
+        optionally for one host or URL. None if there are no samples.
+        """
+        until = time.time() + 1.0 if until is None else until
+        if url is not None:
+            key_id = self._lookup("urls", "url", url)
+            where = "url_id = ? AND "
+        elif host is not None:
+            key_id = self._lookup("hosts", "host", host.lower())
+            where = "host_id = ? AND "
+        else:
+            key_id, where = None, ""
+        if (url is not None or host is not None) and key_id is None:
+            return None
+
+        params: tuple[Any, ...] = (since, until)
+        if key_id is not None:
+            params = (key_id, *params)
+        samples = (
+            f"FROM checks WHERE {where}ts >= ? AND ts < ?"
+            " AND ok = 1 AND elapsed_ms IS NOT NULL"
+        )
+        (n,) = self._conn.execute(f"SELECT COUNT(*) {samples}", params).fetchone()
+        if not n:
+            return None
+        # Only the one or two order statistics the percentile interpolates
+        # between leave SQLite (see stats.percentile_inclusive)
+        j, delta = divmod(permille * (n - 1), 1000)
+        data = [
+            x
+            for (x,) in self._conn.execute(
+                f"SELECT elapsed_ms {samples} ORDER BY elapsed_ms LIMIT ? OFFSET ?",
+                (*params, 1 if delta == 0 else 2, j),
+            )
+        ]
+        if delta == 0:
+            return data[0]
+        return (data[0] * (1000 - delta) + data[1] * delta) / 1000
+
+    def hourly_latency_percentile(
+        self,
+        *,
+        since: float,
+        until: Optional[float] = None,
+        host: Optional[str] = None,
+        permille: int = 950,
+    ) -> Optional[float]:
+        """
+        Latency percentile of successful checks in the hours that overlap
+        [since, until) (as error_rate_by_hour), optionally for one host.
+
+        Read from the hourly_latency rollup: within ROLLUP_ACCURACY of the
+        exact order statistic, at a cost of one row per hour and bucket no
+        matter how many checks were stored. None if there are no samples.
+        """
+        until = time.time() + 1.0 if until is None else until
+        hid = 0
+        if host is not None:
+            hid = self._lookup("hosts", "host", host.lower()) or 0
+            if not hid:
+                return None
+        sketch = QuantileSketch(relative_accuracy=ROLLUP_ACCURACY)
+        for b, n in self._conn.execute(
+            "SELECT bucket, SUM(n) FROM hourly_latency"
+            " WHERE host_id = ? AND hour >= ? AND hour < ? GROUP BY bucket",
+            (hid, math.floor(since / HOUR_S), math.ceil(until / HOUR_S)),
+        ):
+            sketch.add_bucket(None if b == _ZERO_BUCKET else b, n)
+        return sketch.quantile(permille / 1000)
+
+    def error_rate_by_hour(
+        self,
+        *,
+        since: float,
+        until: Optional[float] = None,
+        host: Optional[str] = None,
+    ) -> list[dict[str, Any]]:
+        """
+        {"hour_start", "total", "failures", "error_rate"} for each hour that
+        overlaps [since, until) and has checks, optionally for one host.
+        """
+        until = time.time() + 1.0 if until is None else until
+        params: tuple[Any, ...] = (
+            math.floor(since / HOUR_S),
+            math.ceil(until / HOUR_S),
+        )
+        where = ""
+        if host is not None:
+            hid = self._lookup("hosts", "host", host.lower())
+            if hid is None:
+                return []
+            where = "host_id = ? AND "
+            params = (hid, *params)
+
+        rows = self._conn.execute(
+            f"SELECT hour, SUM(total), SUM(failures) FROM hourly"
+            f" WHERE {where}hour >= ? AND hour < ? GROUP BY hour ORDER BY hour",
+            params,
+        )
+        return [
+            {
+                "hour_start": hour * HOUR_S,
+                "total": total,
+                "failures": failures,
+                "error_rate": failures / total if total else 0.0,
+            }
+            for hour, total, failures in rows
+        ]
+
+    def error_rate_by_host(
+        self, *, since: float, until: Optional[float] = None
+    ) -> list[dict[str, Any]]:
+        """
+        {"host", "total", "failures", "error_rate"} for each host with checks
+        in the hours that overlap [since, until), from the `hourly` rollup.
+        """
+        until = time.time() + 1.0 if until is None else until
+        rows = self._conn.execute(
+            "SELECT h.host, SUM(r.total), SUM(r.failures)"
+            " FROM hourly AS r JOIN hosts AS h ON h.id = r.host_id"
+            " WHERE r.hour >= ? AND r.hour < ? GROUP BY r.host_id ORDER BY h.host",
+            (math.floor(since / HOUR_S), math.ceil(until / HOUR_S)),
+        )
+        return [
+            {
+                "host": host,
+                "total": total,
+                "failures": failures,
+                "error_rate": failures / total if total else 0.0,
+            }
+            for host, total, failures in rows
+        ]
+
+    def recent_latencies(
+        self, *, since: float, per_url: int = 32
+    ) -> dict[str, list[float]]:
+        """
+        Latencies of the last `per_url` successful checks of each URL since
+        `since`, oldest first.
+        """
+        rows = self._conn.execute(
+            "SELECT u.url, c.elapsed_ms FROM ("
+            "  SELECT url_id, ts, elapsed_ms, ROW_NUMBER() OVER ("
+            "    PARTITION BY url_id ORDER BY ts DESC, rowid DESC) AS n"
+            "  FROM checks"
+            "  WHERE ts >= ? AND ok = 1 AND elapsed_ms IS NOT NULL"
+            ") AS c JOIN urls AS u ON u.id = c.url_id"
+            " WHERE c.n <= ? ORDER BY c.url_id, c.n DESC",
+            (since, per_url),
+        )
+        out: dict[str, list[float]] = {}
+        for url, elapsed_ms in rows:
+            out.setdefault(url, []).append(elapsed_ms)
+        return out
+
+    def hosts(self) -> list[str]:
+        return [
+            h for (h,) in self._conn.execute("SELECT host FROM hosts ORDER BY host")
+        ]
+
+
+def compute_trends(
+    store: HistoryStore,
+    *,
+    now: Optional[float] = None,
+    hours: int = 24,
+    max_hosts: int = 20,
+) -> dict[str, Any]:
+    """Trend data for the report: overall and per-host p95/error rate."""
+    now = time.time() if now is None else now
+    since = now - hours * HOUR_S
+    hourly = store.error_rate_by_hour(since=since, until=now)
+
+    # Only hosts with checks in the window; p95 only for those reported
+    rates = [r for r in store.error_rate_by_host(since=since, until=now) if r["total"]]
+    rates.sort(key=lambda r: (-r["error_rate"], r["host"]))
+    by_host = [
+        {
+            "host": r["host"],
+            "checks": r["total"],
+            "error_rate": r["error_rate"],
+            "p95_ms": store.hourly_latency_percentile(
+                since=since, until=now, host=r["host"]
+            ),
+        }
+        for r in rates[:max_hosts]
+    ]
+
+    return {
+        "hours": hours,
+        "p95_ms": store.hourly_latency_percentile(since=since, until=now),
+        "hourly": hourly,
+        "by_host": by_host,
+    }
@@ -3,12 +3,308 @@
 
 from __future__ import annotations
 
+import socket
+import threading
 import time
-from typing import Optional
+from typing import Any, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import (
+    ConnectTimeoutError,
+    HTTPError,
+    NameResolutionError,
+    NewConnectionError,
+)
+from urllib3.util.connection import allowed_gai_family
 
-from .model import CheckResult
+from .dns import DnsCache
+from .model import (
+    HEAD_FALLBACK_STATUSES,
+    METHODS,
+    CheckResult,
+    ConnectionStats,
+    Target,
+)
+from .phases import PhaseTimer
+from .validate import is_ok_status
+from .validators import ValidatorCache
+
+# Number of per-host connection pools a session keeps before evicting the
+# least recently used one.
+MAX_HOST_POOLS = 256
+
+
+# PhaseTimer of the check running on this thread (if any)
+_local = threading.local()
+
+
+def _timer() -> Optional[PhaseTimer]:
+    return getattr(_local, "timer", None)
+
+
+def _resolve(host: str, port: int) -> list[str]:
+    """
+    Addresses for host, in getaddrinfo order, without duplicates; through the
+    DnsCache of the running check, if its session has one.
+    """
+    host = host.strip("[]")  # IPv6 literal
+    dns: Optional[DnsCache] = getattr(_local, "dns", None)
+    if dns is not None:
+        return dns.resolve(host, allowed_gai_family())
+    infos = socket.getaddrinfo(host, port, allowed_gai_family(), socket.SOCK_STREAM)
+    return list(dict.fromkeys(str(info[4][0]) for info in infos))
+
+
+class _TimedConnectionMixin:
+    """
+    Records DNS, connect, TTFB (and, for https, TLS) into the thread's
+    PhaseTimer. Name resolution is done here (then each address is tried in
+    order, like urllib3's create_connection) so it can be timed separately
+    from the TCP handshake. Without an active timer nothing changes.
+    """
+
+    _dns_host: str
+    host: str
+    port: int
+    _tls = False
+
+    def _new_conn(self) -> socket.socket:
+        timer = _timer()
+        if timer is None:
+            return super()._new_conn()  # type: ignore[misc]
+
+        t0 = time.perf_counter_ns()
+        host = self._dns_host
+        try:
+            addresses = _resolve(host, self.port)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e  # type: ignore[arg-type]
+        finally:
+            t1 = time.perf_counter_ns()
+            timer.add("dns", t1 - t0)
+
+        try:
+            err: Optional[Exception] = None
+            for address in addresses:
+                self._dns_host = address
+                try:
+                    sock = super()._new_conn()  # type: ignore[misc]
+                    break
+                except (NewConnectionError, ConnectTimeoutError) as e:
+                    err = e
+            else:
+                assert err is not None
+                raise err
+        finally:
+            self._dns_host = host
+            timer.add("connect", time.perf_counter_ns() - t1)
+        if not self._tls:
+            timer.add("tls", 0)
+        return sock
+
+    def request(self, *args: Any, **kwargs: Any) -> None:
+        super().request(*args, **kwargs)  # type: ignore[misc]
+        timer = _timer()
+        if timer is not None:
+            timer.sent()
+
+    def getresponse(self) -> Any:
+        resp = super().getresponse()  # type: ignore[misc]
+        timer = _timer()
+        if timer is not None:
+            timer.headers_received()
+        return resp
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    _tls = True
+
+    def connect(self) -> None:
+        timer = _timer()
+        if timer is None:
+            return super().connect()
+        before = timer.spent("dns", "connect")
+        t0 = time.perf_counter_ns()
+        try:
+            super().connect()
+        finally:
+            # connect() = _new_conn() (dns + connect) + TLS handshake
+            spent = time.perf_counter_ns() - t0
+            timer.add("tls", max(spent - (timer.spent("dns", "connect") - before), 0))
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class PooledAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that keeps a keep-alive pool per host and remembers every pool
+    it handed out, so new vs reused connections can be counted after a run.
+    Its connections record phase timings for `check_url`.
+    """
+
+    def __init__(
+        self, *, pool_size: int = 10, dns_cache: Optional[DnsCache] = None
+    ) -> None:
+        super().__init__(
+            pool_connections=MAX_HOST_POOLS, pool_maxsize=pool_size, pool_block=False
+        )
+        self._pools: set[Any] = set()
+        self._pools_lock = threading.Lock()
+        self.dns_cache = dns_cache
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+    def get_connection_with_tls_context(self, *args: Any, **kwargs: Any) -> Any:
+        pool = super().get_connection_with_tls_context(*args, **kwargs)
+        with self._pools_lock:
+            self._pools.add(pool)
+        return pool
+
+    def connection_stats(self) -> ConnectionStats:
+        with self._pools_lock:
+            pools = list(self._pools)
+        new = sum(p.num_connections for p in pools)
+        requests_made = sum(p.num_requests for p in pools)
+        return ConnectionStats(new=new, reused=max(requests_made - new, 0))
+
+
+def make_session(
+    *, pool_size: int = 10, dns_cache: Optional[DnsCache] = None
+) -> requests.Session:
+    """
+    Session whose http/https adapters are PooledAdapter(pool_size=...);
+    with `dns_cache`, check_url resolves host names through it.
+    """
+    sess = requests.Session()
+    adapter = PooledAdapter(pool_size=pool_size, dns_cache=dns_cache)
+    sess.mount("http://", adapter)
+    sess.mount("https://", adapter)
+    return sess
+
+
+def session_connection_stats(session: requests.Session) -> ConnectionStats:
+    """Connection counts of a session created by make_session (zeros otherwise)."""
+    adapter = session.adapters.get("https://")
+    if isinstance(adapter, PooledAdapter):
+        return adapter.connection_stats()
+    return ConnectionStats()
+
+
+class ThreadSessions:
+    """
+    One requests.Session per thread, all mounted on one PooledAdapter.
+
+    requests does not promise that a Session is thread-safe (cookies and
+    redirect state live on it), so each worker thread gets its own. The
+    adapter's urllib3 pools are thread-safe and shared, so keep-alive
+    connections are reused across threads and counted once.
+    """
+
+    def __init__(
+        self, *, pool_size: int = 10, dns_cache: Optional[DnsCache] = None
+    ) -> None:
+        self.adapter = PooledAdapter(pool_size=pool_size, dns_cache=dns_cache)
+        self._local = threading.local()
+        self._sessions: list[requests.Session] = []
+        self._lock = threading.Lock()
+
+    def get(self) -> requests.Session:
+        """The calling thread's session, created on first use."""
+        sess = getattr(self._local, "session", None)
+        if sess is None:
+            sess = requests.Session()
+            sess.mount("http://", self.adapter)
+            sess.mount("https://", self.adapter)
+            self._local.session = sess
+            with self._lock:
+                self._sessions.append(sess)
+        return sess
+
+    def connection_stats(self) -> ConnectionStats:
+        return self.adapter.connection_stats()
+
+    def close(self) -> None:
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for sess in sessions:
+            sess.close()
+        self.adapter.close()
+
+    def __enter__(self) -> ThreadSessions:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+_READ_CHUNK = 64 * 1024
+
+
+def _read_capped(resp: requests.Response, limit: int) -> None:
+    # Read at most `limit` body bytes of a streamed response. A fully read
+    # body hands the connection back to the pool; otherwise it is closed.
+    remaining = limit
+    while remaining > 0:
+        chunk = resp.raw.read(min(remaining, _READ_CHUNK), decode_content=False)
+        if not chunk:
+            resp.raw.release_conn()
+            return
+        remaining -= len(chunk)
+    resp.close()
+
+
+def _send(
+    sess: requests.Session,
+    url: str,
+    *,
+    timeout: float,
+    method: str,
+    max_bytes: Optional[int],
+    headers: Optional[dict[str, str]] = None,
+) -> tuple[requests.Response, bool]:
+    """The final response and whether its body was read completely."""
+    if method == "head":
+        resp = sess.head(url, timeout=timeout, headers=headers, allow_redirects=True)
+        if resp.status_code not in HEAD_FALLBACK_STATUSES:
+            return resp, True
+        method = "get-headers-only"
+    if method == "get" and max_bytes is None:
+        return sess.get(url, timeout=timeout, headers=headers), True
+
+    resp = sess.get(url, timeout=timeout, headers=headers, stream=True)
+    _read_capped(resp, 0 if method == "get-headers-only" else max_bytes or 0)
+    return resp, False
+
+
+def _bytes_received(resp: requests.Response, *, consumed: bool) -> Optional[int]:
+    # Body bytes of all hops. raw.tell() counts bytes off the wire but stays
+    # 0 for chunked bodies, so fall back to the size of read content.
+    def _body(r: requests.Response, consumed: bool) -> int:
+        n = int(r.raw.tell())
+        return max(n, len(r.content)) if consumed else n
+
+    try:
+        return sum(_body(r, True) for r in resp.history) + _body(resp, consumed)
+    except AttributeError:
+        return None
 
 
 def check_url(
@@ -16,32 +312,79 @@ def check_url(
     *,
     timeout: float = 5.0,
     session: Optional[requests.Session] = None,
+    method: str = "get",
+    max_bytes: Optional[int] = None,
+    validators: Optional[ValidatorCache] = None,
+    headers: Optional[dict[str, str]] = None,
+    expected_status: Optional[frozenset[int]] = None,
 ) -> CheckResult:
     """
-    Perform HTTP GET and return CheckResult.
+    Request the URL (HTTP GET by default) and return CheckResult.
 
     ok:
-      - True only for 2xx responses
-      - False for non-2xx responses and exceptions
+      - True for 2xx responses and 304 Not Modified, or, if expected_status
+        is given, for exactly those statuses
+      - False for other responses and exceptions
+
+    method is one of METHODS; with "get", max_bytes caps how much of the
+    body is read (the connection is closed if the cap cuts it short).
+    `bytes_received` is the number of body bytes read.
+
+    With `validators`, the request is conditional (If-None-Match /
+    If-Modified-Since) when the URL was seen before, and the response's
+    validators are stored for the next run. `headers` are sent with the
+    request (the conditional headers, if any, take precedence).
+
+    With a session from make_session (the default), the result also carries
+    per-phase timings (`phases`); other sessions leave it None.
     """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS} (got {method!r})")
+    if max_bytes is not None and max_bytes < 0:
+        raise ValueError(f"max_bytes must be >= 0 (got {max_bytes})")
+
     owns_session = session is None
-    sess = session or requests.Session()
+    sess = session or make_session()
+    timer = _local.timer = PhaseTimer()
+    adapter = sess.adapters.get("https://")
+    _local.dns = adapter.dns_cache if isinstance(adapter, PooledAdapter) else None
+
+    request_headers = validators.request_headers(url) if validators else None
+    if headers:
+        request_headers = {**headers, **(request_headers or {})}
 
     t0 = time.perf_counter()
     try:
-        resp = sess.get(url, timeout=timeout)
+        resp, consumed = _send(
+            sess,
+            url,
+            timeout=timeout,
+            method=method,
+            max_bytes=max_bytes,
+            headers=request_headers,
+        )
         elapsed_ms = (time.perf_counter() - t0) * 1000.0
 
         status_code = resp.status_code
-        ok = 200 <= status_code <= 299
+        nbytes = _bytes_received(resp, consumed=consumed)
+        if validators is not None:
+            validators.update(
+                url, status_code, resp.headers, nbytes if consumed else None
+            )
         return CheckResult(
             url=url,
-            ok=ok,
+            ok=(
+                is_ok_status(status_code)
+                if expected_status is None
+                else status_code in expected_status
+            ),
             status_code=status_code,
             elapsed_ms=elapsed_ms,
             error=None,
+            phases=timer.finish(),
+            bytes_received=nbytes,
         )
-    except requests.RequestException as e:
+    except (requests.RequestException, HTTPError) as e:
         elapsed_ms = (time.perf_counter() - t0) * 1000.0
         return CheckResult(
             url=url,
@@ -49,7 +392,40 @@ def check_url(
             status_code=None,
             elapsed_ms=elapsed_ms,
             error=f"{type(e).__name__}: {e}",
+            phases=timer.finish(),
         )
     finally:
+        _local.timer = _local.dns = None
         if owns_session:
             sess.close()
+
+
+def check_target(
+    target: Target,
+    *,
+    timeout: float = 5.0,
+    session: Optional[requests.Session] = None,
+    method: str = "get",
+    max_bytes: Optional[int] = None,
+    validators: Optional[ValidatorCache] = None,
+) -> CheckResult:
+    """check_url for a plain URL or a CheckSpec (its settings win over the run's)."""
+    if isinstance(target, str):
+        return check_url(
+            target,
+            timeout=timeout,
+            session=session,
+            method=method,
+            max_bytes=max_bytes,
+            validators=validators,
+        )
+    return check_url(
+        target.url,
+        timeout=timeout if target.timeout is None else target.timeout,
+        session=session,
+        method=method if target.method is None else target.method,
+        max_bytes=max_bytes,
+        validators=validators,
+        headers=target.headers,
+        expected_status=target.expected_status,
+    )
@@ -0,0 +1,316 @@
+# SPDX-License-Identifier: MIT
+"""Structured inventories: URLs with per-entry check settings.
+
+The format follows the file extension:
+
+- .jsonl: one JSON object (or URL string) per line
+- .json: a JSON array of objects (or URL strings)
+- .csv: a header row with a `url` column, then one entry per row
+- .yaml / .yml: a YAML list of mappings (or URL strings); needs PyYAML
+  (the "yaml" extra)
+- anything else: the plain one-URL-per-line format of io.load_urls
+
+Entry keys, all optional but `url`:
+
+- timeout: seconds (> 0)
+- method: one of METHODS
+- expected_status: a status or a list of them; only these count as OK
+- headers: {name: value} sent with every request
+- priority: integer; with a fully loaded inventory, higher priorities are
+  checked first (ties keep input order)
+- interval: seconds between checks of this entry in watch mode (> 0)
+
+In CSV, expected_status is a space- or comma-separated list and headers
+is a JSON object ({"Name": "value"}, so values may contain any
+character); empty cells are unset.
+
+Each entry is compiled once into a CheckSpec, so the checks only read
+its attributes. JSON Lines, JSON and CSV are parsed incrementally (one
+entry in memory at a time); YAML is loaded whole. Invalid entries are
+reported like invalid lines of a plain list ("<file>:<line>: ..." or
+"<file>: entry <n>: ...").
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+from pathlib import Path
+from typing import Any, Iterator, Optional, TextIO, Tuple
+
+from .io import iter_urls
+from .model import METHODS, CheckSpec, Target
+from .profiling import Profiler
+from .validate import check_header, is_valid_url, url_host
+
+try:  # optional: YAML inventories only
+    import yaml
+except ImportError:  # pragma: no cover - depends on the environment
+    yaml = None
+
+FORMATS = ("txt", "jsonl", "json", "csv", "yaml")
+KEYS = frozenset(
+    {"url", "timeout", "method", "expected_status", "headers", "priority", "interval"}
+)
+
+_JSON_CHUNK = 1 << 16
+
+
+def inventory_format(path: str) -> str:
+    """One of FORMATS, from the file extension."""
+    suffix = Path(path).suffix.lower().lstrip(".")
+    if suffix == "yml":
+        return "yaml"
+    return suffix if suffix in FORMATS else "txt"
+
+
+def check_readable(path: str) -> None:
+    """Raise ValueError if reading path needs an optional extra not installed."""
+    if inventory_format(path) == "yaml" and yaml is None:
+        raise ValueError(
+            "YAML inventories need PyYAML: pip install 'url-monitor[yaml]'"
+        )
+
+
+def _positive(entry: dict[str, Any], key: str) -> Optional[float]:
+    value = entry.get(key)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        raise ValueError(f"{key} must be a number > 0 (got {value!r})")
+    return float(value)
+
+
+def _statuses(value: Any) -> Optional[frozenset[int]]:
+    if value is None:
+        return None
+    items = value if isinstance(value, list) else [value]
+    if not items or not all(
+        isinstance(s, int) and not isinstance(s, bool) and 100 <= s <= 599
+        for s in items
+    ):
+        raise ValueError(
+            f"expected_status must be a status or a list of statuses (got {value!r})"
+        )
+    return frozenset(items)
+
+
+def compile_entry(entry: Any) -> CheckSpec:
+    """CheckSpec from one parsed entry (a mapping or a URL string)."""
+    if isinstance(entry, str):
+        entry = {"url": entry}
+    if not isinstance(entry, dict):
+        raise ValueError(f"entry must be a mapping or a URL (got {entry!r})")
+    unknown = set(entry) - KEYS
+    if unknown:
+        raise ValueError(f"unknown keys {sorted(unknown)}")
+
+    url = entry.get("url")
+    if not isinstance(url, str) or not is_valid_url(url.strip()):
+        raise ValueError(f"Invalid URL: {url!r}")
+    url = url.strip()
+
+    method = entry.get("method")
+    if method is not None and method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS} (got {method!r})")
+    headers = entry.get("headers")
+    if headers is not None and not (
+        isinstance(headers, dict)
+        and all(isinstance(k, str) and isinstance(v, str) for k, v in headers.items())
+    ):
+        raise ValueError(f"headers must map names to strings (got {headers!r})")
+    for name, value in (headers or {}).items():
+        check_header(name, value)
+    priority = entry.get("priority", 0)
+    if isinstance(priority, bool) or not isinstance(priority, int):
+        raise ValueError(f"priority must be an integer (got {priority!r})")
+
+    return CheckSpec(
+        url=url,
+        host=url_host(url),
+        timeout=_positive(entry, "timeout"),
+        method=method,
+        expected_status=_statuses(entry.get("expected_status")),
+        headers=dict(headers) if headers else None,
+        priority=priority,
+        interval=_positive(entry, "interval"),
+    )
+
+
+def _csv_entry(row: dict[str, Any]) -> dict[str, Any]:
+    # CSV cells are strings: convert them to what compile_entry expects
+    if None in row:
+        raise ValueError("more cells than header columns")
+    entry: dict[str, Any] = {k: v.strip() for k, v in row.items() if v and v.strip()}
+    try:
+        for key in ("timeout", "interval"):
+            if key in entry:
+                entry[key] = float(entry[key])
+        if "priority" in entry:
+            entry["priority"] = int(entry["priority"])
+        if "expected_status" in entry:
+            entry["expected_status"] = [
+                int(s) for s in entry["expected_status"].replace(",", " ").split()
+            ]
+    except ValueError as e:
+        raise ValueError(f"bad number: {e}") from None
+    if "headers" in entry:
+        try:
+            entry["headers"] = json.loads(entry["headers"])
+        except json.JSONDecodeError as e:
+            raise ValueError(f"headers must be a JSON object: {e}") from None
+    return entry
+
+
+def _iter_json_array(f: TextIO) -> Iterator[Any]:
+    """Items of a top-level JSON array, decoded one at a time."""
+    decoder = json.JSONDecoder()
+    buf = f.read(_JSON_CHUNK)
+    eof = not buf
+    pos = 0
+
+    def skip_ws() -> None:
+        nonlocal buf, pos, eof
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            buf, pos = f.read(_JSON_CHUNK), 0
+            eof = not buf
+
+    skip_ws()
+    if buf[pos : pos + 1] != "[":
+        raise ValueError("a JSON inventory must be an array")
+    pos += 1
+    first = True
+    while True:
+        skip_ws()
+        if buf[pos : pos + 1] == "]":
+            return
+        if not first:
+            if buf[pos : pos + 1] != ",":
+                got = buf[pos : pos + 20]
+                raise ValueError(f"expected ',' or ']' in the array (got {got!r})")
+            pos += 1
+            skip_ws()
+        first = False
+        while True:
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                end = -1
+            # A value may run into the end of the buffer (e.g. a number)
+            if end != -1 and (end < len(buf) or eof):
+                break
+            more = f.read(_JSON_CHUNK)
+            eof = not more
+            buf, pos = buf[pos:] + more, 0
+        pos = end
+        yield item
+
+
+def _iter_entries(path: Path, fmt: str) -> Iterator[Tuple[str, Any]]:
+    # (where, raw entry) of a structured inventory
+    name = path.name
+    if fmt == "yaml":
+        check_readable(str(path))
+        with path.open(encoding="utf-8") as f:
+            data = yaml.safe_load(f)
+        if not isinstance(data, list):
+            raise ValueError(f"{name}: a YAML inventory must be a list")
+        for n, entry in enumerate(data, start=1):
+            yield f"{name}: entry {n}", entry
+        return
+
+    with path.open(encoding="utf-8", newline="" if fmt == "csv" else None) as f:
+        if fmt == "jsonl":
+            for i, line in enumerate(f, start=1):
+                s = line.strip()
+                if not s or s.startswith("#"):
+                    continue
+                try:
+                    yield f"{name}:{i}", json.loads(s)
+                except json.JSONDecodeError as e:
+                    yield f"{name}:{i}", ValueError(f"invalid JSON: {e}")
+        elif fmt == "json":
+            try:
+                for n, entry in enumerate(_iter_json_array(f), start=1):
+                    yield f"{name}: entry {n}", entry
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{name}: invalid JSON: {e}") from None
+            except ValueError as e:
+                raise ValueError(f"{name}: {e}") from None
+        else:
+            reader = csv.DictReader(f)
+            if reader.fieldnames is None or "url" not in reader.fieldnames:
+                raise ValueError(f"{name}: a CSV inventory needs a 'url' column")
+            for row in reader:
+                where = f"{name}:{reader.line_num}"
+                try:
+                    yield where, _csv_entry(row)
+                except ValueError as e:
+                    yield where, e
+
+
+def iter_targets(
+    path: str,
+    *,
+    strict: bool = True,
+    profiler: Optional[Profiler] = None,
+) -> Iterator[Tuple[Optional[Target], Optional[str]]]:
+    """
+    Stream the entries of an inventory of any format in FORMATS.
+
+    Like io.iter_urls: yields (target, None) or (None, invalid_message), or
+    raises ValueError on the first invalid entry with strict=True. Plain
+    lists yield URL strings (through iter_urls), structured inventories
+    CheckSpecs. profiler, if given, times entry compilation as "validate".
+    """
+    fmt = inventory_format(path)
+    if fmt == "txt":
+        yield from iter_urls(path, strict=strict, profiler=profiler)
+        return
+
+    for where, entry in _iter_entries(Path(path), fmt):
+        t0 = profiler.clock() if profiler is not None else 0
+        spec: Optional[CheckSpec] = None
+        msg = None
+        try:
+            if isinstance(entry, ValueError):
+                raise entry
+            spec = compile_entry(entry)
+        except ValueError as e:
+            msg = f"{where}: {e}"
+        if profiler is not None:
+            profiler.add("validate", profiler.clock() - t0)
+        if msg is not None and strict:
+            raise ValueError(msg)
+        yield spec, msg
+
+
+def load_targets(
+    path: str, *, strict: bool = True, profiler: Optional[Profiler] = None
+) -> Tuple[list[Target], list[str]]:
+    """
+    Load an inventory of any format in FORMATS: (targets, invalids).
+
+    Entries are ordered by priority, highest first; entries of equal
+    priority (and every entry of a plain list) keep input order.
+    """
+    targets: list[Target] = []
+    invalids: list[str] = []
+    prioritized = False
+    for target, invalid in iter_targets(path, strict=strict, profiler=profiler):
+        if target is not None:
+            targets.append(target)
+            prioritized = prioritized or (
+                not isinstance(target, str) and target.priority != 0
+            )
+        else:
+            invalids.append(invalid or "")
+    if prioritized:
+        targets.sort(key=lambda t: 0 if isinstance(t, str) else -t.priority)
+    return targets, invalids
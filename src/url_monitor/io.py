@@ -3,13 +3,76 @@
 
 from __future__ import annotations
 
+import zlib
 from pathlib import Path
-from typing import Tuple
+from typing import Iterator, Optional, Tuple
 
+from .profiling import Profiler
 from .validate import is_valid_url
 
 
-def load_urls(path: str, *, strict: bool = True) -> Tuple[list[str], list[str]]:
+def partition_of(line: str, count: int) -> int:
+    """
+    Partition (0 <= partition < count) of an input line, by host.
+
+    Much cheaper than parsing the URL: the host is cut out with string
+    operations (same value as url_host for valid URLs) and hashed with
+    CRC-32, which, unlike hash(), is the same in every process.
+    """
+    rest = line.partition("://")[2]
+    for sep in "/?#":
+        rest = rest.partition(sep)[0]
+    host = rest.rpartition("@")[2].lower()
+    return zlib.crc32(host.encode("utf-8", "surrogatepass")) % count
+
+
+def iter_urls(
+    path: str,
+    *,
+    strict: bool = True,
+    partition: Optional[Tuple[int, int]] = None,
+    profiler: Optional[Profiler] = None,
+) -> Iterator[Tuple[Optional[str], Optional[str]]]:
+    """
+    Stream URLs from a text file, one line at a time.
+
+    Same rules as load_urls, but nothing is buffered: each non-blank,
+    non-comment line yields either (url, None) or (None, invalid_message).
+    With strict=True the first invalid line raises ValueError instead.
+
+    partition=(index, count) keeps only the lines of that partition (see
+    partition_of); the other lines are skipped without being validated.
+    profiler, if given, times validation as its "validate" stage.
+    """
+    p = Path(path)
+    with p.open(encoding="utf-8") as f:
+        for i, raw in enumerate(f, start=1):
+            s = raw.strip()
+            if not s or s.startswith("#"):
+                continue
+            if partition is not None and (
+                partition_of(s, partition[1]) != partition[0]
+            ):
+                continue
+
+            if profiler is None:
+                valid = is_valid_url(s)
+            else:
+                t0 = profiler.clock()
+                valid = is_valid_url(s)
+                profiler.add("validate", profiler.clock() - t0)
+            if valid:
+                yield s, None
+            else:
+                msg = f"{p.name}:{i}: Invalid URL: {s!r}"
+                if strict:
+                    raise ValueError(msg)
+                yield None, msg
+
+
+def load_urls(
+    path: str, *, strict: bool = True, profiler: Optional[Profiler] = None
+) -> Tuple[list[str], list[str]]:
     """
     Load URLs from a text file.
 
@@ -21,23 +84,13 @@ def load_urls(path: str, *, strict: bool = True) -> Tuple[list[str], list[str]]:
     Returns:
       (urls, invalids)
     """
-    p = Path(path)
-    lines = p.read_text(encoding="utf-8").splitlines()
-
     urls: list[str] = []
     invalids: list[str] = []
 
-    for i, raw in enumerate(lines, start=1):
-        s = raw.strip()
-        if not s or s.startswith("#"):
-            continue
-
-        if is_valid_url(s):
-            urls.append(s)
+    for url, invalid in iter_urls(path, strict=strict, profiler=profiler):
+        if url is not None:
+            urls.append(url)
         else:
-            msg = f"{p.name}:{i}: Invalid URL: {s!r}"
-            if strict:
-                raise ValueError(msg)
-            invalids.append(msg)
+            invalids.append(invalid or "")
 
     return urls, invalids
@@ -0,0 +1,259 @@
+# SPDX-License-Identifier: MIT
+"""Prometheus metrics: latency histograms and check/exception counters.
+
+MetricsRegistry keeps, in the Prometheus text exposition format:
+
+- url_monitor_url_duration_seconds{url, host}: latency histogram per URL
+- url_monitor_host_duration_seconds{host}: latency histogram per host
+- url_monitor_checks_total{host, status_class}: checks by status class
+  (summed over hosts this is summarize()'s by_status_class)
+- url_monitor_exceptions_total{host, type}: checks that raised, by
+  exception type (skipped checks are not exceptions, as in summarize)
+
+Histograms cover every check with a latency (OK or not) and use fixed
+buckets, allocated once per series. Updates come from one thread (the
+dispatcher or watch loop) and take no lock: each is a few list/dict
+increments. Readers (`render`, a scrape) do not lock either, so a scrape
+that races an update may see a check in a bucket but not yet in _sum;
+the next scrape is consistent.
+
+Output: `write_textfile` for node_exporter's textfile collector (one-shot
+runs), `MetricsServer` for a /metrics endpoint (watch mode).
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .model import CheckResult
+from .stats import STATUS_CLASSES
+from .validate import classify_status, url_host
+
+# Bucket upper bounds in seconds (Prometheus client defaults, plus 30 s for
+# checks that run into long timeouts)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+
+
+def _fmt(x: float) -> str:
+    return repr(float(x)) if x != int(x) else str(int(x))
+
+
+class _Histogram:
+    """Bucket counts (not cumulative) plus count and sum."""
+
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self, n_buckets: int) -> None:
+        self.counts = [0] * (n_buckets + 1)  # last: above the highest bound
+        self.count = 0
+        self.sum = 0.0
+
+
+class MetricsRegistry:
+    """
+    Metrics for the checks of a run or a watch (see the module docstring).
+
+    `per_url=False` drops the per-URL histograms (one series per URL can
+    be too many for very large inventories). `preallocate(urls)` creates
+    the series of known URLs up front, so they are exported (at 0) before
+    their first check.
+    """
+
+    def __init__(
+        self,
+        *,
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+        per_url: bool = True,
+    ) -> None:
+        self.buckets = tuple(sorted(buckets))
+        if not self.buckets:
+            raise ValueError("buckets must not be empty")
+        self.per_url = per_url
+        self._by_url: dict[str, tuple[str, _Histogram]] = {}
+        self._by_host: dict[str, _Histogram] = {}
+        self._checks: dict[tuple[str, str], int] = {}
+        self._exceptions: dict[tuple[str, str], int] = {}
+
+    def _host_hist(self, host: str) -> _Histogram:
+        h = self._by_host.get(host)
+        if h is None:
+            h = self._by_host[host] = _Histogram(len(self.buckets))
+        return h
+
+    def _url_series(self, url: str) -> tuple[str, _Histogram]:
+        series = self._by_url.get(url)
+        if series is None:
+            host = url_host(url)
+            series = self._by_url[url] = (host, _Histogram(len(self.buckets)))
+            self._host_hist(host)
+        return series
+
+    def preallocate(self, urls: Iterable[str]) -> None:
+        for url in urls:
+            if self.per_url:
+                self._url_series(url)
+            else:
+                self._host_hist(url_host(url))
+
+    def observe(self, r: CheckResult) -> None:
+        if self.per_url:
+            host, url_hist = self._url_series(r.url)
+        else:
+            host, url_hist = url_host(r.url), None
+        key = (host, classify_status(r.status_code))
+        self._checks[key] = self._checks.get(key, 0) + 1
+        if not r.ok and not r.skipped and r.error is not None:
+            exc = (host, r.error.partition(":")[0])
+            self._exceptions[exc] = self._exceptions.get(exc, 0) + 1
+        if r.elapsed_ms is None:
+            return
+        seconds = r.elapsed_ms / 1000.0
+        i = bisect_left(self.buckets, seconds)
+        for h in (url_hist, self._host_hist(host)):
+            if h is not None:
+                h.counts[i] += 1
+                h.count += 1
+                h.sum += seconds
+
+    def observe_all(self, results: Iterable[CheckResult]) -> None:
+        for r in results:
+            self.observe(r)
+
+    def _histogram_lines(self, name: str, labels: str, h: _Histogram) -> list[str]:
+        lines = []
+        cumulative = 0
+        sep = "," if labels else ""
+        for bound, n in zip(self.buckets, h.counts):
+            cumulative += n
+            lines.append(
+                f'{name}_bucket{{{labels}{sep}le="{_fmt(bound)}"}} {cumulative}'
+            )
+        cumulative += h.counts[-1]
+        lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {h.sum!r}")
+        lines.append(f"{name}_count{{{labels}}} {h.count}")
+        return lines
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines: list[str] = []
+        if self.per_url:
+            name = "url_monitor_url_duration_seconds"
+            lines.append(f"# HELP {name} Check latency per URL.")
+            lines.append(f"# TYPE {name} histogram")
+            for url, (host, h) in list(self._by_url.items()):
+                lines += self._histogram_lines(name, _labels(url=url, host=host), h)
+
+        name = "url_monitor_host_duration_seconds"
+        lines.append(f"# HELP {name} Check latency per host.")
+        lines.append(f"# TYPE {name} histogram")
+        for host, h in list(self._by_host.items()):
+            lines += self._histogram_lines(name, _labels(host=host), h)
+
+        name = "url_monitor_checks_total"
+        lines.append(f"# HELP {name} Checks by host and status class.")
+        lines.append(f"# TYPE {name} counter")
+        checks = dict(self._checks)
+        for host in sorted({h for h, _c in checks}):
+            for cls in STATUS_CLASSES:
+                n = checks.get((host, cls))
+                if n is not None:
+                    lines.append(
+                        f"{name}{{{_labels(host=host, status_class=cls)}}} {n}"
+                    )
+
+        name = "url_monitor_exceptions_total"
+        lines.append(f"# HELP {name} Checks that raised, by host and exception type.")
+        lines.append(f"# TYPE {name} counter")
+        for (host, exc), n in sorted(dict(self._exceptions).items()):
+            lines.append(f"{name}{{{_labels(host=host, type=exc)}}} {n}")
+        return "\n".join(lines) + "\n"
+
+
+def write_textfile(
+    registry: MetricsRegistry, path: Path, *, timestamp: Optional[float] = None
+) -> None:
+    """
+    Write the metrics for node_exporter's textfile collector, plus
+    url_monitor_last_run_timestamp_seconds. The file is replaced
+    atomically, so the collector never reads a partial file.
+    """
+    ts = time.time() if timestamp is None else timestamp
+    name = "url_monitor_last_run_timestamp_seconds"
+    text = registry.render() + (
+        f"# HELP {name} When the run that wrote these metrics finished.\n"
+        f"# TYPE {name} gauge\n"
+        f"{name} {ts!r}\n"
+    )
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode("utf-8")  # type: ignore[attr-defined]
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MetricsServer:
+    """Serve registry at http://host:port/metrics from a daemon thread."""
+
+    def __init__(
+        self, registry: MetricsRegistry, *, host: str = "127.0.0.1", port: int = 9464
+    ) -> None:
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.registry = registry  # type: ignore[attr-defined]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={"poll_interval": 0.2},
+            name="url-monitor-metrics",
+            daemon=True,
+        )
+
+    @property
+    def address(self) -> tuple[str, int]:
+        host, port = self._server.server_address[:2]
+        return str(host), int(port)
+
+    def start(self) -> MetricsServer:
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self) -> MetricsServer:
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
@@ -3,14 +3,174 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Optional, Union
 
+# How a check requests the URL:
+#   - "get": GET and read the whole body (optionally capped at max_bytes)
+#   - "head": HEAD, falling back to a headers-only GET if HEAD is rejected
+#   - "get-headers-only": GET, closing the connection after the headers
+METHODS = ("get", "head", "get-headers-only")
 
-@dataclass(frozen=True)
+# Statuses that mean "this server does not support HEAD"
+HEAD_FALLBACK_STATUSES = frozenset({405, 501})
+
+
+@dataclass(frozen=True, slots=True)
+class Phases:
+    """
+    Where the time of one check went, in milliseconds, summed over redirects.
+
+    dns/connect/tls are 0 when a keep-alive connection was reused (tls is
+    also 0 for plain http); a phase that was never reached is None.
+    """
+
+    dns_ms: Optional[float]
+    connect_ms: Optional[float]
+    tls_ms: Optional[float]
+    ttfb_ms: Optional[float]
+    body_ms: Optional[float]
+
+
+@dataclass(frozen=True, slots=True)
+class CheckSpec:
+    """
+    One entry of a structured inventory: a URL and its own check settings,
+    resolved when the inventory is read (see url_monitor.inventory).
+
+    None means "the run's setting" (timeout, method); expected_status None
+    means the default rule (2xx or 304). host is url_host(url).
+    """
+
+    url: str
+    host: str
+    timeout: Optional[float] = None
+    method: Optional[str] = None
+    expected_status: Optional[frozenset[int]] = None
+    headers: Optional[dict[str, str]] = field(default=None, hash=False)
+    priority: int = 0
+    interval: Optional[float] = None
+
+
+# What the runners check: a plain URL or an inventory entry
+Target = Union[str, CheckSpec]
+
+
+def target_url(target: Target) -> str:
+    return target if isinstance(target, str) else target.url
+
+
+@dataclass(frozen=True, slots=True)
 class CheckResult:
     url: str
     ok: bool
     status_code: Optional[int]
     elapsed_ms: Optional[float]
     error: Optional[str]
+    phases: Optional[Phases] = None
+    bytes_received: Optional[int] = None
+    # Attempts made (> 1 when the check was retried); the other fields
+    # describe the last attempt
+    attempts: int = 1
+    # True when the check was not run (its host's circuit breaker was open)
+    skipped: bool = False
+
+
+@dataclass
+class ConnectionStats:
+    """Counts of connections opened vs reused from a keep-alive pool."""
+
+    new: int = 0
+    reused: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {"new": self.new, "reused": self.reused}
+
+
+@dataclass
+class DnsStats:
+    """Lookups answered from the DNS cache vs sent to the system resolver."""
+
+    hits: int = 0
+    misses: int = 0
+    negative_hits: int = 0
+    prefetched: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "negative_hits": self.negative_hits,
+            "prefetched": self.prefetched,
+        }
+
+
+@dataclass
+class ConditionalStats:
+    """Conditional requests sent vs answered 304, and body bytes not re-sent."""
+
+    conditional: int = 0
+    not_modified: int = 0
+    bytes_saved: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {
+            "conditional": self.conditional,
+            "not_modified": self.not_modified,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+@dataclass
+class AdaptiveStats:
+    """Checks run with a learned timeout, and hedged requests (and their wins)."""
+
+    adapted: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {
+            "adapted": self.adapted,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+        }
+
+
+@dataclass
+class RetryStats:
+    """Retries scheduled (by failure kind) and retries refused by the budget."""
+
+    retries: int = 0
+    budget_denied: int = 0
+    by_kind: dict[str, int] = field(default_factory=dict)
+
+    def as_dict(self) -> dict[str, object]:
+        return {
+            "retries": self.retries,
+            "budget_denied": self.budget_denied,
+            "by_kind": dict(self.by_kind),
+        }
+
+
+@dataclass
+class BreakerStats:
+    """Host circuits opened by the circuit breaker, and half-open probes sent."""
+
+    opened: int = 0
+    probes: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {"opened": self.opened, "probes": self.probes}
+
+
+@dataclass
+class DedupStats:
+    """Input URLs, unique canonical URLs checked, and aliases (requests saved)."""
+
+    urls: int = 0
+    unique: int = 0
+    aliases: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {"urls": self.urls, "unique": self.unique, "aliases": self.aliases}
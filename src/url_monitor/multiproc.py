@@ -0,0 +1,210 @@
+# SPDX-License-Identifier: MIT
+"""Run checks in several worker processes to use more than one core.
+
+Each worker reads the input itself and keeps only the lines of its host
+partition (io.partition_of), so URL validation is spread over the workers
+too and all URLs of a host go to one worker (per-host caps, keep-alive and
+the circuit breaker work as in one process). A worker runs its own
+iter_check_results loop, summarizes its results into its own
+SummaryAccumulator and streams them back as ResultStore chunks (compact
+columns, cheap to pickle). The parent only merges.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import multiprocessing
+import queue
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from .breaker import CircuitBreaker
+from .io import iter_urls
+from .model import BreakerStats, ConnectionStats, RetryStats
+from .retry import RetryPolicy
+from .runner import iter_check_results
+from .stats import SummaryAccumulator
+from .store import ResultStore
+
+# Results per chunk sent from a worker to the parent
+CHUNK_SIZE = 1000
+
+
+def _add_stats(into: Any, other: Any) -> None:
+    # Add up the counters of two stats dataclasses of the same type
+    for f in dataclasses.fields(into):
+        mine, theirs = getattr(into, f.name), getattr(other, f.name)
+        if isinstance(mine, dict):
+            for k, n in theirs.items():
+                mine[k] = mine.get(k, 0) + n
+        else:
+            setattr(into, f.name, mine + theirs)
+
+
+def _work(
+    index: int,
+    processes: int,
+    urls_path: str,
+    strict: bool,
+    acc: SummaryAccumulator,
+    options: dict[str, Any],
+    chunk_size: int,
+    out: Any,
+) -> None:
+    try:
+        invalids: list[str] = []
+
+        def urls() -> Iterator[str]:
+            for url, invalid in iter_urls(
+                urls_path, strict=strict, partition=(index, processes)
+            ):
+                if url is not None:
+                    yield url
+                else:
+                    invalids.append(invalid or "")
+
+        connections = ConnectionStats()
+        retry_stats = RetryStats() if options["retry"] is not None else None
+        chunk = ResultStore()
+        for r in iter_check_results(
+            urls(), connections=connections, retry_stats=retry_stats, **options
+        ):
+            chunk.append(r)
+            acc.add(r)
+            if len(chunk) >= chunk_size:
+                out.put(("results", index, chunk))
+                chunk = ResultStore()
+        if len(chunk):
+            out.put(("results", index, chunk))
+        breaker = options["breaker"]
+        out.put(
+            (
+                "done",
+                index,
+                (
+                    acc,
+                    connections,
+                    retry_stats,
+                    breaker.stats if breaker is not None else None,
+                    invalids,
+                ),
+            )
+        )
+    except BaseException as e:
+        out.put(("error", index, e))
+
+
+def iter_result_chunks(
+    urls_path: Path,
+    *,
+    processes: int,
+    strict: bool = False,
+    acc: SummaryAccumulator,
+    connections: Optional[ConnectionStats] = None,
+    retry_stats: Optional[RetryStats] = None,
+    breaker_stats: Optional[BreakerStats] = None,
+    invalids: Optional[list[str]] = None,
+    timeout: float = 5.0,
+    concurrency: int = 1,
+    backend: str = "threads",
+    per_host: Optional[int] = None,
+    pool_size: int = 10,
+    method: str = "get",
+    max_bytes: Optional[int] = None,
+    retry: Optional[RetryPolicy] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[ResultStore]:
+    """
+    Check the URLs of urls_path in `processes` worker processes and yield
+    their results as ResultStore chunks, as the chunks arrive.
+
+    Results are in input order within a worker, not across workers.
+    Each worker runs `concurrency` checks at a time with the given options
+    (see iter_check_results) and its own copy of `breaker`, if any.
+
+    Once the iterator is exhausted, `acc` has the workers' results merged
+    in (in worker order), and `connections`, `retry_stats`, `breaker_stats`
+    and `invalids`, if given, hold the totals of all workers. With
+    strict=True an invalid line raises ValueError here.
+    """
+    if processes < 1:
+        raise ValueError(f"processes must be >= 1 (got {processes})")
+    options: dict[str, Any] = {
+        "timeout": timeout,
+        "concurrency": concurrency,
+        "backend": backend,
+        "per_host": per_host,
+        "pool_size": pool_size,
+        "method": method,
+        "max_bytes": max_bytes,
+        "retry": retry,
+        "breaker": breaker,
+    }
+    # spawn: workers start clean instead of forking a parent that may
+    # already run threads
+    ctx = multiprocessing.get_context("spawn")
+    out = ctx.Queue(maxsize=4 * processes)
+    workers = [
+        ctx.Process(
+            target=_work,
+            args=(
+                i,
+                processes,
+                str(urls_path),
+                strict,
+                SummaryAccumulator(
+                    slowest_k=acc.slowest_k,
+                    percentiles=acc.percentile_mode,
+                    relative_accuracy=acc.relative_accuracy,
+                ),
+                options,
+                chunk_size,
+                out,
+            ),
+            daemon=True,
+        )
+        for i in range(processes)
+    ]
+    for w in workers:
+        w.start()
+
+    finals: dict[int, tuple[Any, ...]] = {}
+    try:
+        while len(finals) < processes:
+            try:
+                kind, index, payload = out.get(timeout=1.0)
+            except queue.Empty:
+                dead = [
+                    i
+                    for i, w in enumerate(workers)
+                    if i not in finals and w.exitcode not in (None, 0)
+                ]
+                if dead:
+                    raise RuntimeError(
+                        f"worker {dead[0]} exited with code {workers[dead[0]].exitcode}"
+                    ) from None
+                continue
+            if kind == "results":
+                yield payload
+            elif kind == "done":
+                finals[index] = payload
+            else:
+                raise payload
+    finally:
+        for w in workers:
+            if w.is_alive() and len(finals) < processes:
+                w.terminate()
+            w.join()
+
+    for i in range(processes):
+        w_acc, w_connections, w_retry, w_breaker, w_invalids = finals[i]
+        acc.merge(w_acc)
+        if connections is not None:
+            _add_stats(connections, w_connections)
+        if retry_stats is not None and w_retry is not None:
+            _add_stats(retry_stats, w_retry)
+        if breaker_stats is not None and w_breaker is not None:
+            _add_stats(breaker_stats, w_breaker)
+        if invalids is not None:
+            invalids.extend(w_invalids)
@@ -4,31 +4,166 @@
 from __future__ import annotations
 
 import json
+import os
 from dataclasses import asdict
 from pathlib import Path
-from typing import Any
+from typing import IO, Any, Iterable, Iterator, Optional
 
 from .model import CheckResult
 
+FSYNC_POLICIES = ("never", "batch", "always")
+
+
+def _indent_json(obj: Any, prefix: str) -> str:
+    # json.dumps(indent=2) of a nested value, re-indented to its depth.
+    # Newlines inside strings are escaped, so only structural ones move.
+    return json.dumps(obj, ensure_ascii=False, indent=2).replace("\n", "\n" + prefix)
+
+
+def write_results_json(
+    f: IO[str],
+    *,
+    source: str,
+    summary: dict[str, Any],
+    records: Iterable[dict[str, Any]],
+) -> None:
+    """
+    Stream a results.json document one record at a time.
+
+    The output is byte-identical to
+    json.dumps({"source", "summary", "results": [...]}, ensure_ascii=False,
+    indent=2) without building the payload or the full string in memory.
+    """
+    f.write("{\n")
+    f.write(f'  "source": {json.dumps(source, ensure_ascii=False)},\n')
+    f.write(f'  "summary": {_indent_json(summary, "  ")},\n')
+    f.write('  "results": [')
+    first = True
+    for rec in records:
+        f.write("\n    " if first else ",\n    ")
+        f.write(_indent_json(rec, "    "))
+        first = False
+    f.write("]\n}" if first else "\n  ]\n}")
+
 
 def save_outputs(
     *,
-    results: list[CheckResult],
+    results: Iterable[CheckResult],
     summary: dict[str, Any],
-    report_md: str,
+    report_md: Optional[str],
     source: str,
     out_dir: Path,
 ) -> None:
+    """
+    Write results.json and, unless report_md is None (the caller writes
+    it, e.g. with write_report_md), report.md into out_dir.
+    """
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    payload = {
-        "source": source,
-        "summary": summary,
-        "results": [asdict(r) for r in results],
-    }
-
-    (out_dir / "results.json").write_text(
-        json.dumps(payload, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
-    (out_dir / "report.md").write_text(report_md, encoding="utf-8")
+    with (out_dir / "results.json").open("w", encoding="utf-8") as f:
+        write_results_json(
+            f,
+            source=source,
+            summary=summary,
+            records=(asdict(r) for r in results),
+        )
+    if report_md is not None:
+        (out_dir / "report.md").write_text(report_md, encoding="utf-8")
+
+
+class JsonlSink:
+    """
+    Append CheckResults to a JSON Lines file as they complete.
+
+    Each result is one {"type": "result", ...} line; `write_summary` adds a
+    trailing {"type": "summary", "source": ..., "summary": ...} line. Writes
+    are buffered; `fsync` controls durability:
+      - "never": flush only on close
+      - "batch": flush + fsync every `batch_size` results (default)
+      - "always": flush + fsync after every result
+
+    A crash mid-run therefore loses at most the unsynced tail, and the file
+    can be read back with `iter_jsonl`.
+    """
+
+    def __init__(
+        self, path: Path, *, fsync: str = "batch", batch_size: int = 100
+    ) -> None:
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES} (got {fsync!r})")
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1 (got {batch_size})")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.fsync = fsync
+        self.batch_size = batch_size
+        self.count = 0
+        self._f = path.open("w", encoding="utf-8")
+
+    def _sync(self) -> None:
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def _write(self, record: dict[str, Any]) -> None:
+        self._f.write(json.dumps(record, ensure_ascii=False))
+        self._f.write("\n")
+
+    def write(self, r: CheckResult) -> None:
+        self._write({"type": "result", **asdict(r)})
+        self.count += 1
+        if self.fsync == "always" or (
+            self.fsync == "batch" and self.count % self.batch_size == 0
+        ):
+            self._sync()
+
+    def write_summary(self, summary: dict[str, Any], *, source: str) -> None:
+        self._write({"type": "summary", "source": source, "summary": summary})
+        if self.fsync != "never":
+            self._sync()
+
+    def close(self) -> None:
+        if self._f.closed:
+            return
+        if self.fsync != "never":
+            self._sync()
+        self._f.close()
+
+    def __enter__(self) -> JsonlSink:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def iter_jsonl(path: Path) -> Iterator[dict[str, Any]]:
+    """Records of a JsonlSink file; a torn last line (crash) is skipped."""
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            yield json.loads(line)
+
+
+def jsonl_to_json(jsonl_path: Path, json_path: Path) -> None:
+    """
+    Write the pretty results.json equivalent of a JsonlSink file.
+
+    Two streaming passes: the first finds the trailing summary record, the
+    second copies result records; memory does not depend on the run size.
+    """
+    source = ""
+    summary: Optional[dict[str, Any]] = None
+    for rec in iter_jsonl(jsonl_path):
+        if rec.get("type") == "summary":
+            source = rec.get("source", "")
+            summary = rec.get("summary")
+
+    def _results() -> Iterator[dict[str, Any]]:
+        for rec in iter_jsonl(jsonl_path):
+            if rec.pop("type", None) == "result":
+                yield rec
+
+    tmp = json_path.with_name(json_path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        write_results_json(f, source=source, summary=summary or {}, records=_results())
+    os.replace(tmp, json_path)
@@ -0,0 +1,71 @@
+# SPDX-License-Identifier: MIT
+"""Per-phase timing (DNS, connect, TLS, TTFB, body) of a single check."""
+
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+from .model import Phases
+
+PHASES = ("dns", "connect", "tls", "ttfb", "body")
+
+
+class PhaseTimer:
+    """
+    Collects phase durations while one check runs; `finish` turns them into
+    a Phases record.
+
+    The HTTP layers call `add` around name resolution, TCP connect and the
+    TLS handshake, `sent` once a request is written and `headers_received`
+    once the response head is parsed. Redirect hops add up. Timestamps use
+    time.perf_counter_ns, so a check costs a handful of clock reads.
+    """
+
+    __slots__ = ("_ns", "_sent", "_headers")
+
+    def __init__(self) -> None:
+        self._ns: dict[str, int] = {}
+        self._sent: Optional[int] = None
+        self._headers: Optional[int] = None
+
+    def add(self, phase: str, ns: int) -> None:
+        self._ns[phase] = self._ns.get(phase, 0) + ns
+
+    def spent(self, *phases: str) -> int:
+        """Nanoseconds recorded so far for the given phases."""
+        return sum(self._ns.get(p, 0) for p in phases)
+
+    def sent(self) -> None:
+        self._sent = time.perf_counter_ns()
+
+    def headers_received(self) -> None:
+        now = time.perf_counter_ns()
+        if self._sent is not None:
+            self.add("ttfb", now - self._sent)
+            self._sent = None
+        self._headers = now
+
+    def finish(self) -> Optional[Phases]:
+        """Phases of the check so far; None if it never touched the network."""
+        end = time.perf_counter_ns()
+        ns = dict(self._ns)
+        if not ns and self._headers is None and self._sent is None:
+            return None
+        if "connect" not in ns and (self._sent is not None or "ttfb" in ns):
+            # Every request went over a reused keep-alive connection
+            ns.update(dns=0, connect=0, tls=0)
+        if self._headers is not None:
+            ns["body"] = end - self._headers
+
+        def ms(phase: str) -> Optional[float]:
+            x = ns.get(phase)
+            return None if x is None else x / 1e6
+
+        return Phases(
+            dns_ms=ms("dns"),
+            connect_ms=ms("connect"),
+            tls_ms=ms("tls"),
+            ttfb_ms=ms("ttfb"),
+            body_ms=ms("body"),
+        )
@@ -1,15 +1,28 @@
 from __future__ import annotations
 
+import time
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator, MutableSequence, Sequence
 
-import requests
-
-from .http import check_url
-from .io import load_urls
-from .model import CheckResult
-from .report import render_report_md
-from .stats import summarize
+from .adaptive import AdaptiveTimeouts
+from .breaker import CircuitBreaker
+from .canonical import UrlIndex
+from .dns import DnsCache, url_hostnames
+from .history import HOUR_S, HistoryStore, compute_trends
+from .inventory import inventory_format, iter_targets, load_targets
+from .io import iter_urls, load_urls
+from .metrics import MetricsRegistry
+from .model import CheckResult, ConnectionStats, RetryStats, Target, target_url
+from .multiproc import iter_result_chunks
+from .profiling import Profiler
+from .report import ReportAggregates, render_report_md, write_report_md
+from .retry import RetryPolicy
+from .runner import iter_check_results
+from .shard import Shard, write_partial
+from .stats import SummaryAccumulator
+from .store import ResultStore
+from .validators import ValidatorCache
 
 
 def run_monitor(
@@ -17,19 +30,294 @@ def run_monitor(
     *,
     timeout: float = 5.0,
     strict: bool = False,
-) -> tuple[list[CheckResult], dict[str, Any], str, list[str]]:
-    urls, invalids = load_urls(str(urls_path), strict=strict)
-
-    results: list[CheckResult] = []
-    with requests.Session() as sess:
-        for u in urls:
-            results.append(check_url(u, timeout=timeout, session=sess))
-
-    summary = summarize(results)
-    report_md = render_report_md(
-        source=str(urls_path),
-        summary=summary,
-        results=results,
-        invalids=invalids,
+    concurrency: int = 1,
+    backend: str = "threads",
+    per_host: int | None = None,
+    pool_size: int = 10,
+    stream: bool = False,
+    percentiles: str = "exact",
+    on_result: Callable[[CheckResult], None] | None = None,
+    compact: bool = False,
+    history: Path | None = None,
+    trend_hours: int = 24,
+    dns_cache: DnsCache | None = None,
+    method: str = "get",
+    max_bytes: int | None = None,
+    validators: ValidatorCache | None = None,
+    adaptive: AdaptiveTimeouts | None = None,
+    retry: RetryPolicy | None = None,
+    breaker: CircuitBreaker | None = None,
+    shard: Shard | None = None,
+    partial: Path | None = None,
+    processes: int = 1,
+    profiler: Profiler | None = None,
+    metrics: MetricsRegistry | None = None,
+    dedupe: bool = False,
+    report_path: Path | None = None,
+) -> tuple[Sequence[CheckResult], dict[str, Any], str, list[str]]:
+    """
+    Load URLs, check them, summarize and render the report.
+
+    urls_path is a plain URL list or a structured inventory (JSON Lines,
+    JSON, CSV or YAML, by extension) whose entries carry their own timeout,
+    method, expected statuses, headers and priority; see
+    url_monitor.inventory. An entry's own settings win over the run's.
+
+    With stream=True the input is parsed lazily while checks run, so the
+    first checks start as soon as the first lines are read; invalid lines
+    are still collected into `invalids` (or raise ValueError when strict).
+
+    percentiles="sketch" bounds the memory used for latency percentiles
+    (see url_monitor.sketch for the error bounds); "exact" keeps all samples.
+
+    on_result, if given, is called with each CheckResult as soon as it is
+    available (in input order), e.g. to append it to a JsonlSink.
+
+    compact=True returns the results as a columnar ResultStore (a read-only
+    sequence of CheckResult views) instead of a list, for very large runs.
+
+    history, if given, is a SQLite HistoryStore path: the run is appended to
+    it and summary["trends"] (p95 and error rate over the last `trend_hours`
+    hours, overall and per host) is computed from it for the report.
+
+    dns_cache, if given, is shared by all checks; unless streaming, every
+    unique host name is resolved into it before the first check starts, and
+    its hit/miss counts are reported as summary["dns"].
+
+    method ("get", "head" or "get-headers-only") and max_bytes select how
+    each URL is requested; see url_monitor.http.check_url.
+
+    validators, if given, makes checks of URLs seen before conditional
+    (If-None-Match / If-Modified-Since) and is updated from the responses;
+    its counts are reported as summary["conditional"]. Loading and saving it
+    between runs is up to the caller (ValidatorCache.load / save).
+
+    adaptive, if given, applies per-URL timeouts (at most adaptive.timeout)
+    and hedging; with history, it first learns from each URL's successful
+    checks of the last `trend_hours` hours. Its counts are reported as
+    summary["adaptive"].
+
+    retry, if given, re-runs failed checks it selects (with backoff, within
+    its retry budget); attempt and retry counts are reported as
+    summary["retries"].
+
+    breaker, if given, skips the remaining checks of hosts that keep failing
+    to connect (see url_monitor.breaker); skipped checks are counted as
+    summary["skipped"], separately from exceptions.
+
+    shard, if given, checks only the URLs of the hosts it owns (see
+    url_monitor.shard); invalid input lines are reported by shard 0 only.
+    partial, if given, is where the run's partial summary is written for
+    `url-monitor merge` (shard or not).
+
+    processes > 1 runs the checks in that many worker processes, each
+    reading the input and checking the URLs of its share of the hosts with
+    `concurrency` checks at a time (see url_monitor.multiproc); results are
+    then in input order per worker only and invalid lines are grouped by
+    worker. The input is always read lazily (as with stream=True);
+    dns_cache, validators, adaptive and shard are not supported.
+
+    profiler, if given, records how long each stage of the run takes (see
+    url_monitor.profiling); with processes > 1 only the parent's stages
+    (summarize, render_report) are recorded.
+
+    metrics, if given, observes every result (latency histograms, status
+    class and exception counters; see url_monitor.metrics), e.g. for
+    write_textfile after the run.
+
+    dedupe=True checks each canonical URL once (see url_monitor.canonical)
+    and gives every alias a copy of its endpoint's result, so results still
+    come one per input URL, in input order; the counts (requests saved) are
+    reported as summary["dedup"]. Not supported with processes > 1.
+
+    report_path, if given, is where the report is written, line by line
+    (see url_monitor.report.write_report_md) rather than built as one
+    string; report_md is then "".
+    """
+    if processes > 1 and (
+        dns_cache is not None
+        or validators is not None
+        or adaptive is not None
+        or shard is not None
+        or dedupe
+    ):
+        raise ValueError(
+            "processes > 1 does not support dns_cache, validators, adaptive, "
+            "shard or dedupe"
+        )
+    structured = inventory_format(str(urls_path)) != "txt"
+    if processes > 1 and structured:
+        raise ValueError("processes > 1 reads plain URL lists only")
+
+    connections = ConnectionStats()
+    retry_stats = RetryStats() if retry is not None else None
+    acc = SummaryAccumulator(percentiles=percentiles)
+    aggregates = ReportAggregates()
+    index = UrlIndex() if dedupe else None
+    results: MutableSequence[CheckResult] | ResultStore = (
+        ResultStore() if compact else []
     )
+    if processes > 1:
+        invalids: list[str] = []
+        for chunk in iter_result_chunks(
+            urls_path,
+            processes=processes,
+            strict=strict,
+            acc=acc,
+            connections=connections,
+            retry_stats=retry_stats,
+            breaker_stats=breaker.stats if breaker is not None else None,
+            invalids=invalids,
+            timeout=timeout,
+            concurrency=concurrency,
+            backend=backend,
+            per_host=per_host,
+            pool_size=pool_size,
+            method=method,
+            max_bytes=max_bytes,
+            retry=retry,
+            breaker=breaker,
+        ):
+            # Workers have summarized the chunk already (merged into acc)
+            results.extend(chunk)
+            for r in chunk:
+                aggregates.add(r)
+            if metrics is not None:
+                metrics.observe_all(chunk)
+            if on_result is not None:
+                for r in chunk:
+                    on_result(r)
+    else:
+        urls: Iterable[Target]
+        if stream:
+            invalids = []
+            read = iter_targets if structured else iter_urls
+            urls = _valid_urls(
+                read(str(urls_path), strict=strict, profiler=profiler), invalids
+            )
+            if shard is not None:
+                urls = shard.select(urls)
+            if index is not None:
+                urls = index.unique(urls)
+            if profiler is not None:
+                urls = profiler.timed("load", urls)
+        else:
+            load = load_targets if structured else load_urls
+            if profiler is None:
+                urls, invalids = load(str(urls_path), strict=strict)
+            else:
+                with profiler.stage("load"):
+                    urls, invalids = load(
+                        str(urls_path), strict=strict, profiler=profiler
+                    )
+            if shard is not None:
+                urls = list(shard.select(urls))
+            if index is not None:
+                urls = list(index.unique(urls))
+            if dns_cache is not None:
+                dns_cache.prefetch(url_hostnames(target_url(u) for u in urls))
+
+        if adaptive is not None and history is not None:
+            with HistoryStore(history) as store:
+                adaptive.seed(
+                    store.recent_latencies(
+                        since=time.time() - trend_hours * HOUR_S,
+                        per_url=adaptive.samples,
+                    )
+                )
+
+        checked = iter_check_results(
+            urls,
+            timeout=timeout,
+            concurrency=concurrency,
+            backend=backend,
+            per_host=per_host,
+            pool_size=pool_size,
+            connections=connections,
+            dns_cache=dns_cache,
+            method=method,
+            max_bytes=max_bytes,
+            validators=validators,
+            adaptive=adaptive,
+            retry=retry,
+            retry_stats=retry_stats,
+            breaker=breaker,
+            profiler=profiler,
+        )
+        if index is not None:
+            checked = index.fan_out(checked)
+        for r in checked:
+            results.append(r)
+            if profiler is None:
+                acc.add(r)
+                aggregates.add(r)
+            else:
+                with profiler.stage("summarize"):
+                    acc.add(r)
+                    aggregates.add(r)
+            if metrics is not None:
+                metrics.observe(r)
+            if on_result is not None:
+                on_result(r)
+
+    with profiler.stage("summarize") if profiler is not None else nullcontext():
+        summary = acc.summary(
+            connections=connections,
+            dns=dns_cache.stats if dns_cache is not None else None,
+            conditional=validators.stats if validators is not None else None,
+            adaptive=adaptive.stats if adaptive is not None else None,
+            retry=retry_stats,
+            breaker=breaker.stats if breaker is not None else None,
+            dedup=index.stats if index is not None else None,
+        )
+    if method != "get":
+        summary["method"] = method
+    if processes > 1:
+        summary["processes"] = processes
+    if shard is not None:
+        summary["shard"] = str(shard)
+        if shard.index != 0:
+            invalids.clear()
+    if partial is not None:
+        write_partial(
+            partial,
+            source=str(urls_path),
+            shard=shard,
+            acc=acc,
+            summary=summary,
+            aggregates=aggregates,
+            invalids=invalids,
+        )
+    if history is not None:
+        with HistoryStore(history) as store:
+            store.record(results)
+            summary["trends"] = compute_trends(store, hours=trend_hours)
+    with profiler.stage("render_report") if profiler is not None else nullcontext():
+        if report_path is None:
+            report_md = render_report_md(
+                source=str(urls_path),
+                summary=summary,
+                invalids=invalids,
+                aggregates=aggregates,
+            )
+        else:
+            report_md = ""
+            with report_path.open("w", encoding="utf-8") as f:
+                write_report_md(
+                    f,
+                    source=str(urls_path),
+                    summary=summary,
+                    invalids=invalids,
+                    aggregates=aggregates,
+                )
     return results, summary, report_md, invalids
+
+
+def _valid_urls(
+    lines: Iterable[tuple[Target | None, str | None]], invalids: list[str]
+) -> Iterator[Target]:
+    for url, invalid in lines:
+        if url is not None:
+            yield url
+        else:
+            invalids.append(invalid or "")
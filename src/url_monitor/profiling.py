@@ -0,0 +1,215 @@
+# SPDX-License-Identifier: MIT
+"""Stage timings and queue sampling for one run (--profile).
+
+A Profiler is passed down the pipeline like the other run-level stats
+objects; every hook is behind `if profiler is not None`, so a run without
+one does no extra work. Stages:
+
+- load: reading the input (including validation)
+- validate: is_valid_url, part of load
+- schedule_wait: from a URL entering the host queue to its check starting
+- check: from a check starting to the dispatcher seeing its result (time
+  in the worker pool / event loop included)
+- network: the checks' own elapsed_ms (request until body read)
+- summarize: SummaryAccumulator and ReportAggregates work
+- render_report: rendering the report (the CLI writes it straight to
+  report.md)
+- save_outputs: writing results.json and metrics (CLI)
+
+check minus network is what the checks spent in url-monitor itself
+(building requests and results, waiting for a worker or the event loop).
+Stages that overlap (checks run concurrently) can add up to more than the
+wall time.
+
+The dispatcher also samples the number of queued checks (read ahead or
+waiting out a retry backoff) and checks in flight at most every
+`sample_interval` seconds.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, TypeVar
+
+from .model import CheckResult
+
+STAGES = (
+    "load",
+    "validate",
+    "schedule_wait",
+    "check",
+    "network",
+    "summarize",
+    "render_report",
+    "save_outputs",
+)
+
+T = TypeVar("T")
+
+
+class Profiler:
+    """
+    Accumulated time (ns) and call counts per stage, plus queue samples.
+
+    `add` may be called from any thread; the dispatcher hooks (`queued`,
+    `started`, `finished`, `sample`) from the dispatcher only.
+    """
+
+    def __init__(
+        self,
+        *,
+        sample_interval: float = 0.05,
+        max_samples: int = 2000,
+        clock: Callable[[], int] = time.perf_counter_ns,
+    ) -> None:
+        if sample_interval <= 0:
+            raise ValueError(f"sample_interval must be > 0 (got {sample_interval})")
+        if max_samples < 2:
+            raise ValueError(f"max_samples must be >= 2 (got {max_samples})")
+        self.clock = clock
+        self.sample_interval_ns = int(sample_interval * 1e9)
+        self.max_samples = max_samples
+        self.started_ns = clock()
+        self._lock = threading.Lock()
+        self._totals: dict[str, list[int]] = {}  # stage -> [total ns, calls]
+        self._queued_at: dict[int, int] = {}
+        self._started_at: dict[int, int] = {}
+        self._samples: list[tuple[int, int, int]] = []  # (t ns, queued, in flight)
+        self._next_sample = self.started_ns
+
+    def add(self, stage: str, ns: int, calls: int = 1) -> None:
+        with self._lock:
+            t = self._totals.get(stage)
+            if t is None:
+                self._totals[stage] = [ns, calls]
+            else:
+                t[0] += ns
+                t[1] += calls
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = self.clock()
+        try:
+            yield
+        finally:
+            self.add(name, self.clock() - t0)
+
+    def timed(self, name: str, items: Iterable[T]) -> Iterator[T]:
+        """items, with the time spent producing each one added to `name`."""
+        it = iter(items)
+        while True:
+            t0 = self.clock()
+            try:
+                item = next(it)
+            except StopIteration:
+                self.add(name, self.clock() - t0, calls=0)
+                return
+            self.add(name, self.clock() - t0)
+            yield item
+
+    # ---- dispatcher hooks ----
+
+    def queued(self, index: int) -> None:
+        self._queued_at[index] = self.clock()
+
+    def started(self, index: int) -> None:
+        now = self.clock()
+        queued_at = self._queued_at.pop(index, None)
+        if queued_at is not None:
+            self.add("schedule_wait", now - queued_at)
+        self._started_at[index] = now
+
+    def finished(self, index: int, r: CheckResult) -> None:
+        started_at = self._started_at.pop(index, None)
+        if started_at is not None:
+            self.add("check", self.clock() - started_at)
+        if r.elapsed_ms is not None:
+            self.add("network", int(r.elapsed_ms * 1e6))
+
+    def sample(self, *, queued: int, in_flight: int) -> None:
+        now = self.clock()
+        if now < self._next_sample:
+            return
+        self._samples.append((now - self.started_ns, queued, in_flight))
+        if len(self._samples) >= self.max_samples:
+            # Keep every other sample and halve the rate
+            del self._samples[1::2]
+            self.sample_interval_ns *= 2
+        self._next_sample = now + self.sample_interval_ns
+
+    # ---- output ----
+
+    def as_dict(self) -> dict[str, Any]:
+        wall_ns = self.clock() - self.started_ns
+        with self._lock:
+            totals = {k: tuple(v) for k, v in self._totals.items()}
+        stages = {
+            name: {
+                "total_ms": totals[name][0] / 1e6,
+                "calls": totals[name][1],
+                "avg_ms": (
+                    totals[name][0] / 1e6 / totals[name][1] if totals[name][1] else None
+                ),
+            }
+            for name in STAGES
+            if name in totals
+        }
+        samples = list(self._samples)
+        return {
+            "wall_ms": wall_ns / 1e6,
+            "stages": stages,
+            "queue": {
+                "samples": [[t / 1e6, q, n] for t, q, n in samples],
+                "max_queued": max((q for _t, q, _n in samples), default=0),
+                "max_in_flight": max((n for _t, _q, n in samples), default=0),
+                "avg_in_flight": (
+                    sum(n for _t, _q, n in samples) / len(samples) if samples else None
+                ),
+            },
+        }
+
+
+def render_profile(data: dict[str, Any]) -> str:
+    """Plain-text stage table of Profiler.as_dict() output."""
+    wall = data["wall_ms"]
+    lines = [
+        f"Profile (wall {wall:.1f} ms)",
+        f"{'stage':<14} {'calls':>8} {'total ms':>12} {'avg ms':>10} {'% wall':>7}",
+    ]
+    stages = data["stages"]
+    for name, st in stages.items():
+        avg = st["avg_ms"]
+        lines.append(
+            f"{name:<14} {st['calls']:>8} {st['total_ms']:>12.1f} "
+            f"{'' if avg is None else f'{avg:.3f}':>10} "
+            f"{st['total_ms'] / wall * 100.0 if wall else 0.0:>6.1f}%"
+        )
+    if "check" in stages and "network" in stages:
+        own = stages["check"]["total_ms"] - stages["network"]["total_ms"]
+        lines.append(f"check - network (url-monitor inside checks): {own:.1f} ms")
+    queue = data["queue"]
+    if queue["samples"]:
+        lines.append(
+            f"queued: max {queue['max_queued']}; in flight: max "
+            f"{queue['max_in_flight']}, avg {queue['avg_in_flight']:.1f}"
+        )
+    return "\n".join(lines)
+
+
+@contextmanager
+def cprofile(path: Path | None) -> Iterator[None]:
+    """Run the block under cProfile and dump pstats to path (None: no-op)."""
+    if path is None:
+        yield
+        return
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield
+    finally:
+        prof.disable()
+        prof.dump_stats(str(path))
@@ -1,12 +1,35 @@
 # SPDX-License-Identifier: MIT
-"""Render a Markdown report for URL check results."""
+"""Render a Markdown report for URL check results.
+
+The failure sections are built from a ReportAggregates (one pass over the
+results, or fed result by result while checks run) and are bounded, so
+the report's size and rendering time do not grow with the failure count:
+
+- HTTP failures: the 10 slowest failing URLs (exact, deduplicated by URL)
+- Exceptions: grouped by exception type and host, with counts and the
+  first few examples of each group; the largest groups are listed
+- Skipped checks (circuit breaker) and invalid input lines: capped lists
+
+write_report_md writes the report to a text stream line by line;
+render_report_md returns it as a string.
+"""
 
 from __future__ import annotations
 
+import heapq
+import io
+from collections import Counter
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Iterable, Optional, TextIO
 
 from .model import CheckResult
+from .validate import url_host
+
+TOP_HTTP_FAILURES = 10
+EXCEPTION_SAMPLES = 3
+MAX_EXCEPTION_GROUPS = 20
+MAX_SKIPPED_HOSTS = 20
+MAX_INVALID_LINES = 100
 
 
 def _fmt_ms(x: float | None) -> str:
@@ -26,136 +49,467 @@ def _md_escape(text: str) -> str:
     return text.replace("|", "\\|")
 
 
+class _ExceptionGroup:
+    __slots__ = ("count", "samples")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.samples: list[tuple[str, str]] = []  # (url, error), first few
+
+
+class ReportAggregates:
+    """
+    What the report's failure sections need, in memory bounded by the
+    number of distinct (exception type, host) pairs and skipped hosts
+    rather than by the number of results.
+
+    HTTP failures keep the slowest result of each URL among the current
+    top TOP_HTTP_FAILURES URLs (a min-heap). A URL's maximum only grows,
+    and the heap's minimum only rises, so a URL dropped from the heap can
+    only come back with a slower result; the top list is exact. Ties keep
+    the earlier result. Failures without a latency are listed after the
+    timed ones, in input order.
+
+    Aggregates serialize (to_dict/from_dict) and merge, so sharded runs
+    carry them in their partial summaries instead of their failed results.
+    """
+
+    def __init__(self) -> None:
+        self.http_failures = 0
+        # (elapsed_ms, -seq, url, status); one entry per URL
+        self._slow_http: list[tuple[float, int, str, int | None]] = []
+        self._slow_http_urls: set[str] = set()
+        # URL -> status of failures without a latency, first ones only
+        self._untimed_http: dict[str, int | None] = {}
+        self.exceptions: dict[tuple[str, str], _ExceptionGroup] = {}
+        self.skipped_by_host: Counter[str] = Counter()
+        self._seq = 0
+
+    @classmethod
+    def from_results(cls, results: Iterable[CheckResult]) -> ReportAggregates:
+        agg = cls()
+        for r in results:
+            agg.add(r)
+        return agg
+
+    def add(self, r: CheckResult) -> None:
+        seq = self._seq
+        self._seq += 1
+        if r.ok:
+            return
+        if r.skipped:
+            self.skipped_by_host[url_host(r.url)] += 1
+        elif r.error:
+            key = (r.error.partition(":")[0], url_host(r.url))
+            group = self.exceptions.get(key)
+            if group is None:
+                group = self.exceptions[key] = _ExceptionGroup()
+            group.count += 1
+            if len(group.samples) < EXCEPTION_SAMPLES:
+                group.samples.append((r.url, r.error))
+        elif r.status_code is not None:
+            self.http_failures += 1
+            if r.elapsed_ms is None:
+                if len(self._untimed_http) < 2 * TOP_HTTP_FAILURES:
+                    self._untimed_http.setdefault(r.url, r.status_code)
+            else:
+                self._add_slow_http((float(r.elapsed_ms), -seq, r.url, r.status_code))
+
+    def _add_slow_http(self, entry: tuple[float, int, str, int | None]) -> None:
+        heap = self._slow_http
+        url = entry[2]
+        if url in self._slow_http_urls:
+            for i, old in enumerate(heap):
+                if old[2] == url:
+                    if entry[0] > old[0]:
+                        heap[i] = entry
+                        heapq.heapify(heap)
+                    return
+        if len(heap) < TOP_HTTP_FAILURES:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            self._slow_http_urls.discard(heapq.heapreplace(heap, entry)[2])
+        else:
+            return
+        self._slow_http_urls.add(url)
+
+    def merge(self, other: ReportAggregates) -> None:
+        """Fold `other` in as if its results had been added after ours."""
+        offset = self._seq
+        self._seq += other._seq
+        self.http_failures += other.http_failures
+        for elapsed, neg_seq, url, status in other._slow_http:
+            self._add_slow_http((elapsed, neg_seq - offset, url, status))
+        for url, status in other._untimed_http.items():
+            if len(self._untimed_http) < 2 * TOP_HTTP_FAILURES:
+                self._untimed_http.setdefault(url, status)
+        for key, theirs in other.exceptions.items():
+            group = self.exceptions.get(key)
+            if group is None:
+                group = self.exceptions[key] = _ExceptionGroup()
+            group.count += theirs.count
+            room = EXCEPTION_SAMPLES - len(group.samples)
+            group.samples.extend(theirs.samples[:room])
+        self.skipped_by_host.update(other.skipped_by_host)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "seq": self._seq,
+            "http_failures": self.http_failures,
+            "slow_http": [list(e) for e in self._slow_http],
+            "untimed_http": list(self._untimed_http.items()),
+            "exceptions": [
+                [kind, host, g.count, [list(x) for x in g.samples]]
+                for (kind, host), g in self.exceptions.items()
+            ],
+            "skipped_by_host": dict(self.skipped_by_host),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> ReportAggregates:
+        agg = cls()
+        agg._seq = int(data["seq"])
+        agg.http_failures = int(data["http_failures"])
+        agg._slow_http = [
+            (float(elapsed), int(neg_seq), str(url), status)
+            for elapsed, neg_seq, url, status in data["slow_http"]
+        ]
+        heapq.heapify(agg._slow_http)
+        agg._slow_http_urls = {e[2] for e in agg._slow_http}
+        agg._untimed_http = {str(url): status for url, status in data["untimed_http"]}
+        for kind, host, count, samples in data["exceptions"]:
+            group = agg.exceptions[(kind, host)] = _ExceptionGroup()
+            group.count = int(count)
+            group.samples = [(str(url), str(error)) for url, error in samples]
+        agg.skipped_by_host = Counter(
+            {str(h): int(n) for h, n in data["skipped_by_host"].items()}
+        )
+        return agg
+
+    def top_http_failures(self) -> list[tuple[str, int | None, float | None]]:
+        """(url, status, elapsed_ms) of the slowest failing URLs."""
+        rows: list[tuple[str, int | None, float | None]] = [
+            (url, status, elapsed)
+            for elapsed, _seq, url, status in sorted(self._slow_http, reverse=True)
+        ]
+        for url, status in self._untimed_http.items():
+            if len(rows) >= TOP_HTTP_FAILURES:
+                break
+            if url not in self._slow_http_urls:
+                rows.append((url, status, None))
+        return rows
+
+
 def render_report_md(
     *,
     source: str,
     summary: dict[str, Any],
-    results: list[CheckResult],
+    results: Iterable[CheckResult] = (),
     invalids: list[str] | None = None,
+    aggregates: Optional[ReportAggregates] = None,
 ) -> str:
+    out = io.StringIO()
+    write_report_md(
+        out,
+        source=source,
+        summary=summary,
+        results=results,
+        invalids=invalids,
+        aggregates=aggregates,
+    )
+    return out.getvalue()
+
+
+def write_report_md(
+    out: TextIO,
+    *,
+    source: str,
+    summary: dict[str, Any],
+    results: Iterable[CheckResult] = (),
+    invalids: list[str] | None = None,
+    aggregates: Optional[ReportAggregates] = None,
+) -> None:
+    """
+    Write the report to `out`. The failure sections come from `aggregates`
+    if given (e.g. collected while the checks ran), else from one pass over
+    `results`.
+    """
+    if aggregates is None:
+        aggregates = ReportAggregates.from_results(results)
+
+    def w(line: str) -> None:
+        out.write(line)
+        out.write("\n")
+
     now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%SZ")
 
     total = summary.get("total", 0)
     ok = summary.get("ok", 0)
     fail = summary.get("fail", 0)
 
-    http_failures_rows = [
-        r
-        for r in results
-        if (not r.ok) and (r.status_code is not None) and (r.error is None)
-    ]
-    exceptions = [r for r in results if r.error]
-
-    lines: list[str] = []
-    lines.append("# URL Monitor Report")
-    lines.append("")
-    lines.append(f"- Generated (UTC): {now}")
-    lines.append(f"- Source: `{_md_escape(source)}`")
-    lines.append("")
+    w("# URL Monitor Report")
+    w("")
+    w(f"- Generated (UTC): {now}")
+    w(f"- Source: `{_md_escape(source)}`")
+    if summary.get("window_s") is not None:
+        w(f"- Window: last {summary['window_s']:g} s (watch mode)")
+    if summary.get("shard") is not None:
+        w(f"- Shard: {summary['shard']} (hosts of this shard only)")
+    if summary.get("partials") is not None:
+        w(f"- Merged from {summary['partials']} partial summaries")
+    w("")
 
     # ---- Summary ----
-    lines.append("## Summary")
-    lines.append(f"- Total checks: **{total}**")
-    lines.append(f"- OK: **{ok}**")
-    lines.append(f"- FAIL: **{fail}**")
-    lines.append(
-        f"  - HTTP failures (non-OK status): **{summary.get('http_failures', 0)}**"
-    )
-    lines.append(f"  - Exceptions: **{summary.get('exceptions', 0)}**")
-    lines.append(f"- Error rate: **{_fmt_pct(summary.get('error_rate'))}**")
-    lines.append(
-        f"- Success samples (latency): **{summary.get('success_samples', 0)}**"
-    )
-    lines.append(
-        f"- Max latency (success): **{_fmt_ms(summary.get('success_max_ms'))}**"
-    )
-    lines.append(
-        f"- Average latency (success): **{_fmt_ms(summary.get('success_avg_ms'))}**"
-    )
-    lines.append(
-        f"- p95 latency (success): **{_fmt_ms(summary.get('success_p95_ms'))}**"
-    )
-    lines.append(
-        f"- Failure samples (latency): **{summary.get('failure_samples', 0)}**"
-    )
-    lines.append(
-        f"- Average latency (failure): **{_fmt_ms(summary.get('failure_avg_ms'))}**"
-    )
-    lines.append(
-        f"- p95 latency (failure): **{_fmt_ms(summary.get('failure_p95_ms'))}**"
-    )
-    lines.append("")
+    w("## Summary")
+    w(f"- Total checks: **{total}**")
+    w(f"- OK: **{ok}**")
+    w(f"- FAIL: **{fail}**")
+    w(f"  - HTTP failures (non-OK status): **{summary.get('http_failures', 0)}**")
+    w(f"  - Exceptions: **{summary.get('exceptions', 0)}**")
+    if summary.get("skipped"):
+        w(f"  - Skipped (circuit open): **{summary['skipped']}**")
+    w(f"- Error rate: **{_fmt_pct(summary.get('error_rate'))}**")
+    w(f"- Success samples (latency): **{summary.get('success_samples', 0)}**")
+    w(f"- Max latency (success): **{_fmt_ms(summary.get('success_max_ms'))}**")
+    w(f"- Average latency (success): **{_fmt_ms(summary.get('success_avg_ms'))}**")
+    w(f"- p95 latency (success): **{_fmt_ms(summary.get('success_p95_ms'))}**")
+    w(f"- Failure samples (latency): **{summary.get('failure_samples', 0)}**")
+    w(f"- Average latency (failure): **{_fmt_ms(summary.get('failure_avg_ms'))}**")
+    w(f"- p95 latency (failure): **{_fmt_ms(summary.get('failure_p95_ms'))}**")
+    if summary.get("bytes_samples"):
+        total_bytes = summary.get("bytes_received", 0)
+        w(
+            f"- Body bytes received: **{total_bytes}** "
+            f"(avg {total_bytes / summary['bytes_samples']:.0f} per check)"
+        )
+    if summary.get("method") not in (None, "get"):
+        w(f"- Method: **{summary['method']}**")
+    w("")
+
+    # ---- Latency percentiles ----
+    success_pct = summary.get("success_percentiles_ms")
+    failure_pct = summary.get("failure_percentiles_ms")
+    if success_pct is not None or failure_pct is not None:
+        mode = summary.get("percentile_mode", "exact")
+        accuracy = summary.get("percentile_accuracy")
+        w("## Latency percentiles")
+        w(
+            f"- Mode: **{mode}**"
+            + (
+                f" (approximate, within {accuracy * 100:g}% relative error)"
+                if mode == "sketch" and accuracy is not None
+                else ""
+            )
+        )
+        w("| Percentile | Success | Failure |")
+        w("|---|---:|---:|")
+        for k in success_pct or failure_pct or {}:
+            w(
+                f"| {k} | {_fmt_ms((success_pct or {}).get(k))} | {_fmt_ms((failure_pct or {}).get(k))} |"
+            )
+        w("")
+
+    # ---- Phase breakdown (when phase timings are available) ----
+    phases = summary.get("phases_ms")
+    if phases is not None:
+        w("## Latency by phase")
+        w("| Phase | Samples | Avg | p95 |")
+        w("|---|---:|---:|---:|")
+        for name, ph in phases.items():
+            w(
+                f"| {name} | {ph.get('samples', 0)} | {_fmt_ms(ph.get('avg'))} | {_fmt_ms(ph.get('p95'))} |"
+            )
+        w("")
+
+    # ---- Connections (when pooling stats are available) ----
+    conns = summary.get("connections")
+    if conns is not None:
+        w("## Connections")
+        w(f"- New connections: **{conns.get('new', 0)}**")
+        w(f"- Reused connections (keep-alive): **{conns.get('reused', 0)}**")
+        w("")
+
+    # ---- Trends (when a history store is used) ----
+    trends = summary.get("trends")
+    if trends is not None:
+        w(f"## Trends (last {trends.get('hours', 24)} h)")
+        w(f"- p95 latency (success): **{_fmt_ms(trends.get('p95_ms'))}**")
+        hourly = trends.get("hourly", [])
+        if hourly:
+            w("")
+            w("| Hour (UTC) | Checks | Failures | Error rate |")
+            w("|---|---:|---:|---:|")
+            for h in hourly:
+                hour = datetime.fromtimestamp(h["hour_start"], tz=timezone.utc)
+                w(
+                    f"| {hour:%Y-%m-%d %H:00} | {h['total']} | {h['failures']} | {_fmt_pct(h['error_rate'])} |"
+                )
+        by_host = trends.get("by_host", [])
+        if by_host:
+            w("")
+            w("| Host | Checks | Error rate | p95 (success) |")
+            w("|---|---:|---:|---:|")
+            for h in by_host:
+                w(
+                    f"| `{_md_escape(h['host'])}` | {h['checks']} | {_fmt_pct(h['error_rate'])} | {_fmt_ms(h.get('p95_ms'))} |"
+                )
+        w("")
+
+    # ---- DNS cache (when one is used) ----
+    dns = summary.get("dns")
+    if dns is not None:
+        lookups = dns.get("hits", 0) + dns.get("misses", 0)
+        hit_rate = dns.get("hits", 0) / lookups if lookups else None
+        w("## DNS cache")
+        w(
+            f"- Hits: **{dns.get('hits', 0)}** / misses: **{dns.get('misses', 0)}** (hit rate: {_fmt_pct(hit_rate)})"
+        )
+        w(f"- Cached failures served: **{dns.get('negative_hits', 0)}**")
+        w(f"- Hosts prefetched: **{dns.get('prefetched', 0)}**")
+        w("")
+
+    # ---- Conditional requests (when a validator cache is used) ----
+    cond = summary.get("conditional")
+    if cond is not None:
+        sent = cond.get("conditional", 0)
+        not_modified = cond.get("not_modified", 0)
+        w("## Conditional requests")
+        w(f"- Conditional requests sent: **{sent}**")
+        w(
+            f"- 304 Not Modified: **{not_modified}** (hit rate: {_fmt_pct(not_modified / sent if sent else None)})"
+        )
+        w(f"- Body bytes saved: **{cond.get('bytes_saved', 0)}**")
+        w("")
+
+    # ---- Adaptive timeouts / hedging (when enabled) ----
+    adaptive = summary.get("adaptive")
+    if adaptive is not None:
+        w("## Adaptive timeouts")
+        w(f"- Checks with a learned timeout: **{adaptive.get('adapted', 0)}**")
+        w(
+            f"- Hedged requests: **{adaptive.get('hedged', 0)}** (won by the hedge: {adaptive.get('hedge_wins', 0)})"
+        )
+        w("")
+
+    # ---- Retries (when a retry policy is used or results were retried) ----
+    retries = summary.get("retries")
+    if retries is not None:
+        w("## Retries")
+        w(
+            f"- Checks retried: **{retries.get('checks_retried', 0)}** (recovered: {retries.get('recovered', 0)})"
+        )
+        w(f"- Retry attempts: **{retries.get('retries', 0)}**")
+        w(f"- Retries refused by the budget: **{retries.get('budget_denied', 0)}**")
+        by_kind = retries.get("by_kind") or {}
+        if by_kind:
+            kinds = ", ".join(f"{k}: {n}" for k, n in sorted(by_kind.items()))
+            w(f"- Retried failures by kind: {kinds}")
+        w("")
+
+    # ---- Circuit breaker (when one is used) ----
+    breaker = summary.get("circuit_breaker")
+    if breaker is not None:
+        w("## Circuit breaker")
+        w(f"- Host circuits opened: **{breaker.get('opened', 0)}**")
+        w(f"- Half-open probes: **{breaker.get('probes', 0)}**")
+        w(f"- Checks skipped: **{summary.get('skipped', 0)}**")
+        skipped_by_host = aggregates.skipped_by_host
+        if skipped_by_host:
+            w("")
+            w("| Host | Skipped |")
+            w("|---|---:|")
+            ranked = sorted(skipped_by_host.items(), key=lambda x: (-x[1], x[0]))
+            for host, n in ranked[:MAX_SKIPPED_HOSTS]:
+                w(f"| `{_md_escape(host)}` | {n} |")
+            _more(w, len(ranked) - MAX_SKIPPED_HOSTS, "hosts")
+        w("")
+
+    # ---- Deduplication (when enabled) ----
+    dedup = summary.get("dedup")
+    if dedup is not None:
+        w("## Deduplication")
+        w(
+            f"- Input URLs: **{dedup.get('urls', 0)}** / unique endpoints checked: **{dedup.get('unique', 0)}**"
+        )
+        w(f"- Requests saved (aliases): **{dedup.get('aliases', 0)}**")
+        w("")
 
     # ---- Status breakdown ----
-    lines.append("## Status breakdown")
-    lines.append("| Class | Count |")
-    lines.append("|---|---:|")
+    w("## Status breakdown")
+    w("| Class | Count |")
+    w("|---|---:|")
     by_class = summary.get("by_status_class", {})
     for k in ["2xx", "3xx", "4xx", "5xx", "other"]:
-        lines.append(f"| {k} | {by_class.get(k, 0)} |")
-    lines.append("")
+        w(f"| {k} | {by_class.get(k, 0)} |")
+    w("")
 
     # ---- Slowest ----
-    lines.append("## Slowest URLs (top 5)")
-    lines.append("| URL | Status | Elapsed |")
-    lines.append("|---|---:|---:|")
+    w("## Slowest URLs (top 5)")
+    w("| URL | Status | Elapsed |")
+    w("|---|---:|---:|")
     for item in summary.get("slowest", []):
         url = _md_escape(str(item.get("url", "")))
         status = item.get("status", None)
         elapsed_ms = item.get("elapsed_ms", None)
-        lines.append(
+        w(
             f"| `{url}` | {status if status is not None else 'n/a'} | {_fmt_ms(elapsed_ms)} |"
         )
-    lines.append("")
+    w("")
 
     # ---- HTTP failures (non-OK) ----
-    lines.append("## HTTP failures (non-OK status)")
-    if not http_failures_rows:
-        lines.append("- (none)")
-        lines.append("")
+    w("## HTTP failures (non-OK status)")
+    rows = aggregates.top_http_failures()
+    if not rows:
+        w("- (none)")
     else:
-        lines.append("| URL | Status | Elapsed |")
-        lines.append("|---|---:|---:|")
-
-        # Prefer rows sorted by elapsed_ms desc; include rows with elapsed_ms=None at the end.
-        items_with_elapsed = [r for r in http_failures_rows if r.elapsed_ms is not None]
-        items_no_elapsed = [r for r in http_failures_rows if r.elapsed_ms is None]
-
-        items_with_elapsed.sort(key=lambda r: r.elapsed_ms, reverse=True)  # type: ignore[arg-type]
-
-        # Deduplicate by URL; cap at top 10
-        seen: set[str] = set()
-        rows: list[CheckResult] = []
-        for r in items_with_elapsed + items_no_elapsed:
-            if r.url in seen:
-                continue
-            seen.add(r.url)
-            rows.append(r)
-            if len(rows) >= 10:
-                break
-
-        for r in rows:
-            lines.append(
-                f"| `{_md_escape(r.url)}` | {r.status_code if r.status_code is not None else 'n/a'} | {_fmt_ms(r.elapsed_ms)} |"
+        # Slowest first (deduplicated by URL), then failures without a latency
+        w("| URL | Status | Elapsed |")
+        w("|---|---:|---:|")
+        for url, status, elapsed_ms in rows:
+            w(
+                f"| `{_md_escape(url)}` | {status if status is not None else 'n/a'} | {_fmt_ms(elapsed_ms)} |"
+            )
+        if aggregates.http_failures > len(rows):
+            # Rows are URLs, the count is checks: say both
+            w(
+                f"- ... {aggregates.http_failures} failed checks in total "
+                f"({len(rows)} URLs shown)"
             )
-        lines.append("")
+    w("")
 
-    # ---- Exceptions ----
-    lines.append("## Exceptions")
-    if not exceptions:
-        lines.append("- (none)")
+    # ---- Exceptions (grouped by type and host) ----
+    w("## Exceptions")
+    if not aggregates.exceptions:
+        w("- (none)")
     else:
-        for r in exceptions:
-            lines.append(f"- `{_md_escape(r.url)}`: **{_md_escape(r.error or '')}**")
-    lines.append("")
+        groups = sorted(
+            aggregates.exceptions.items(), key=lambda x: (-x[1].count, x[0])
+        )
+        for (kind, host), group in groups[:MAX_EXCEPTION_GROUPS]:
+            w(
+                f"- **{_md_escape(kind)}** on `{_md_escape(host)}`: {group.count} "
+                + ("check" if group.count == 1 else "checks")
+            )
+            for url, error in group.samples:
+                w(f"  - `{_md_escape(url)}`: **{_md_escape(error)}**")
+        rest = groups[MAX_EXCEPTION_GROUPS:]
+        if rest:
+            w(
+                f"- ... and {len(rest)} more groups "
+                f"({sum(g.count for _k, g in rest)} exceptions)"
+            )
+    w("")
 
     # ---- Invalid inputs (when strict=False) ----
-    lines.append("## Invalid input lines")
+    w("## Invalid input lines")
     if not invalids:
-        lines.append("- (none)")
+        w("- (none)")
     else:
-        for msg in invalids:
-            lines.append(f"- {_md_escape(msg)}")
-    lines.append("")
+        for msg in invalids[:MAX_INVALID_LINES]:
+            w(f"- {_md_escape(msg)}")
+        _more(w, len(invalids) - MAX_INVALID_LINES, "invalid lines")
+
 
-    return "\n".join(lines)
+def _more(w: Any, n: int, what: str) -> None:
+    if n > 0:
+        w(f"- ... and {n} more {what}")
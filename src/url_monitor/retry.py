@@ -0,0 +1,183 @@
+# SPDX-License-Identifier: MIT
+"""Retry policy: which failures are retried, when, and how many in total."""
+
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from typing import Optional
+
+from .model import CheckResult, RetryStats
+from .validate import classify_status
+
+# What kind of failure a failed check was. Error kinds come from the
+# exception type recorded in CheckResult.error; "http" is a response with a
+# non-OK status.
+FAILURE_KINDS = ("timeout", "dns", "tls", "connection", "protocol", "http", "other")
+
+_KIND_BY_ERROR_TYPE = {
+    # requests / urllib3 (threads backend)
+    "ConnectTimeout": "timeout",
+    "ReadTimeout": "timeout",
+    "Timeout": "timeout",
+    "ConnectTimeoutError": "timeout",
+    "ReadTimeoutError": "timeout",
+    "NameResolutionError": "dns",
+    "SSLError": "tls",
+    "ConnectionError": "connection",
+    "NewConnectionError": "connection",
+    "ChunkedEncodingError": "protocol",
+    "ContentDecodingError": "protocol",
+    "InvalidHeader": "protocol",
+    "TooManyRedirects": "protocol",
+    # asyncio backend
+    "TimeoutError": "timeout",
+    "gaierror": "dns",
+    "SSLCertVerificationError": "tls",
+    "ConnectionRefusedError": "connection",
+    "ConnectionResetError": "connection",
+    "ConnectionAbortedError": "connection",
+    "BrokenPipeError": "connection",
+    "ConnectionClosed": "connection",
+    "OSError": "connection",
+    "ProtocolError": "protocol",
+    "IncompleteReadError": "protocol",
+}
+
+
+def classify_failure(r: CheckResult) -> Optional[str]:
+    """One of FAILURE_KINDS for a failed check; None if it succeeded."""
+    if r.ok:
+        return None
+    if r.error is None:
+        return "http" if r.status_code is not None else "other"
+    type_name, _, message = r.error.partition(": ")
+    kind = _KIND_BY_ERROR_TYPE.get(type_name, "other")
+    if type_name == "ConnectionError":
+        # requests wraps DNS failures and connect timeouts in ConnectionError
+        if "NameResolutionError" in message or "Failed to resolve" in message:
+            return "dns"
+        if "ConnectTimeoutError" in message:
+            return "timeout"
+    return kind
+
+
+DEFAULT_RETRY_ON = frozenset({"timeout", "connection", "429", "502", "503", "504"})
+
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    """
+    When a failed check is run again.
+
+    - `retry_on`: failure kinds (see FAILURE_KINDS, except "http"), status
+      classes ("5xx") and status codes ("503") that are retried
+    - `max_attempts`: attempts per check, including the first
+    - backoff before attempt n+1: uniform in [0, min(backoff_max,
+      backoff_base * 2**(n-1))] seconds ("full jitter"), so retries of many
+      checks failing at once spread out instead of arriving together
+    - budget: at most max(min_budget, budget * checks started) retries per
+      run, so a broad outage cannot multiply the run's requests
+    """
+
+    max_attempts: int = 3
+    retry_on: frozenset[str] = DEFAULT_RETRY_ON
+    backoff_base: float = 0.2
+    backoff_max: float = 5.0
+    budget: float = 0.1
+    min_budget: int = 3
+
+    def __post_init__(self) -> None:
+        if self.max_attempts < 1:
+            raise ValueError(f"max_attempts must be >= 1 (got {self.max_attempts})")
+        if self.backoff_base < 0 or self.backoff_max < self.backoff_base:
+            raise ValueError(
+                "backoff_base must be >= 0 and <= backoff_max "
+                f"(got {self.backoff_base}, {self.backoff_max})"
+            )
+        if not 0 <= self.budget <= 1:
+            raise ValueError(f"budget must be in [0, 1] (got {self.budget})")
+        if self.min_budget < 0:
+            raise ValueError(f"min_budget must be >= 0 (got {self.min_budget})")
+        for token in self.retry_on:
+            if not _valid_token(token):
+                raise ValueError(f"unknown retry_on entry: {token!r}")
+
+    def retry_kind(self, r: CheckResult) -> Optional[str]:
+        """The failure kind of r if the policy retries it, else None."""
+        kind = classify_failure(r)
+        if kind is None:
+            return None
+        if kind == "http":
+            assert r.status_code is not None
+            if (
+                str(r.status_code) in self.retry_on
+                or classify_status(r.status_code) in self.retry_on
+            ):
+                return kind
+            return None
+        return kind if kind in self.retry_on else None
+
+    def backoff(self, attempt: int, rng: random.Random) -> float:
+        """Delay (seconds) before the attempt following attempt `attempt`."""
+        cap = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return rng.uniform(0.0, cap)
+
+
+def _valid_token(token: str) -> bool:
+    if token in FAILURE_KINDS:
+        return token != "http"
+    if token in ("3xx", "4xx", "5xx"):
+        return True
+    return token.isdigit() and 300 <= int(token) <= 599
+
+
+def parse_retry_on(spec: str) -> frozenset[str]:
+    """Comma-separated retry_on entries, e.g. "timeout,connection,5xx"."""
+    tokens = frozenset(t.strip().lower() for t in spec.split(",") if t.strip())
+    for token in tokens:
+        if not _valid_token(token):
+            raise ValueError(f"unknown retry_on entry: {token!r}")
+    return tokens
+
+
+class Retrier:
+    """
+    Per-run retry decisions for a dispatcher: applies a RetryPolicy and
+    enforces its budget. Not thread-safe; the dispatcher calls it from one
+    thread (or the event loop).
+    """
+
+    def __init__(
+        self,
+        policy: RetryPolicy,
+        *,
+        stats: Optional[RetryStats] = None,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        self.policy = policy
+        self.stats = stats if stats is not None else RetryStats()
+        self.rng = rng or random.Random()
+        self.checks = 0
+
+    def started(self, n: int = 1) -> None:
+        """Count first attempts (the base of the retry budget)."""
+        self.checks += n
+
+    def next_delay(self, r: CheckResult, attempt: int) -> Optional[float]:
+        """
+        Seconds to wait before retrying the check whose attempt `attempt`
+        produced r; None if it is final.
+        """
+        if attempt >= self.policy.max_attempts:
+            return None
+        kind = self.policy.retry_kind(r)
+        if kind is None:
+            return None
+        allowed = max(self.policy.min_budget, self.policy.budget * self.checks)
+        if self.stats.retries + 1 > allowed:
+            self.stats.budget_denied += 1
+            return None
+        self.stats.retries += 1
+        self.stats.by_kind[kind] = self.stats.by_kind.get(kind, 0) + 1
+        return self.policy.backoff(attempt, self.rng)
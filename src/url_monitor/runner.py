@@ -0,0 +1,388 @@
+# SPDX-License-Identifier: MIT
+"""Run URL checks with a selectable backend and bounded concurrency."""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from .adaptive import AdaptiveTimeouts
+from .async_http import aiter_check_results
+from .breaker import CircuitBreaker, skipped_result
+from .dns import DnsCache
+from .http import ThreadSessions, check_target
+from .model import (
+    METHODS,
+    CheckResult,
+    ConnectionStats,
+    RetryStats,
+    Target,
+    target_url,
+)
+from .profiling import Profiler
+from .retry import Retrier, RetryPolicy
+from .schedule import HostQueue, RetryQueue, window_size
+from .validators import ValidatorCache
+
+BACKENDS = ("threads", "asyncio")
+
+
+def iter_check_results(
+    urls: Iterable[Target],
+    *,
+    timeout: float = 5.0,
+    concurrency: int = 1,
+    backend: str = "threads",
+    per_host: Optional[int] = None,
+    pool_size: int = 10,
+    connections: Optional[ConnectionStats] = None,
+    dns_cache: Optional[DnsCache] = None,
+    method: str = "get",
+    max_bytes: Optional[int] = None,
+    validators: Optional[ValidatorCache] = None,
+    adaptive: Optional[AdaptiveTimeouts] = None,
+    retry: Optional[RetryPolicy] = None,
+    retry_stats: Optional[RetryStats] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    profiler: Optional[Profiler] = None,
+) -> Iterator[CheckResult]:
+    """
+    Check URLs and yield CheckResults in input order.
+
+    backend:
+      - "threads": requests-based checks in a pool of `concurrency` worker
+        threads, each with its own requests session over shared connection
+        pools (concurrency=1 checks sequentially)
+      - "asyncio": asyncio-based checks on one event loop in a helper thread,
+        with at most `concurrency` checks in flight
+
+    Scheduling (both backends):
+      - hosts are served round-robin, at most `per_host` checks per host at
+        once (None: no cap)
+      - each host keeps up to `pool_size` keep-alive connections
+      - if `connections` is given, it is updated with new vs reused connection
+        counts once the iterator is exhausted
+      - host names are resolved through `dns_cache`, if given (otherwise on
+        every new connection)
+
+    method/max_bytes select how each URL is requested and `validators`
+    makes requests conditional (see check_url). urls may also hold
+    CheckSpecs (structured inventories); their own timeout, method,
+    headers and expected statuses apply (see check_target).
+
+    With `adaptive`, each check gets its URL's learned timeout (at most
+    `adaptive.timeout`, which replaces `timeout`) and, if hedging is on, a
+    second attempt once it runs past the URL's p95 (see url_monitor.adaptive).
+
+    With `retry`, failed checks the policy selects are put back into the
+    schedule after their backoff (other checks keep running meanwhile);
+    the yielded result is the last attempt's, with `attempts` set.
+    `retry_stats`, if given, is updated with retry and budget counts.
+
+    With `breaker`, a host whose circuit is open has its remaining checks
+    skipped (CheckResult.skipped, error "skipped: circuit open") instead of
+    each waiting out its timeout; see url_monitor.breaker.
+
+    With `profiler`, scheduling wait, check and network time and queue
+    depth are recorded (see url_monitor.profiling).
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be >= 1 (got {concurrency})")
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS} (got {backend!r})")
+    if pool_size < 1:
+        raise ValueError(f"pool_size must be >= 1 (got {pool_size})")
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS} (got {method!r})")
+
+    if backend == "asyncio":
+        yield from _iter_check_results_asyncio(
+            urls,
+            timeout=timeout,
+            concurrency=concurrency,
+            per_host=per_host,
+            pool_size=pool_size,
+            connections=connections,
+            dns_cache=dns_cache,
+            method=method,
+            max_bytes=max_bytes,
+            validators=validators,
+            adaptive=adaptive,
+            retry=retry,
+            retry_stats=retry_stats,
+            breaker=breaker,
+            profiler=profiler,
+        )
+        return
+
+    sessions = ThreadSessions(pool_size=pool_size, dns_cache=dns_cache)
+    base = functools.partial(
+        check_target,
+        timeout=timeout,
+        method=method,
+        max_bytes=max_bytes,
+        validators=validators,
+    )
+
+    def check(u: Target, **kwargs: Any) -> CheckResult:
+        # The session of whichever thread runs the attempt (worker or hedge)
+        return base(u, session=sessions.get(), **kwargs)
+
+    hedges: Optional[ThreadPoolExecutor] = None
+    if adaptive is not None:
+        if adaptive.hedge:
+            # Room for both attempts of every worker plus losers still running
+            hedges = ThreadPoolExecutor(
+                max_workers=3 * concurrency, thread_name_prefix="url-monitor-hedge"
+            )
+        check = functools.partial(adaptive.call, check, executor=hedges)
+    retrier = Retrier(retry, stats=retry_stats) if retry is not None else None
+
+    with sessions:
+        try:
+            if concurrency == 1 and retrier is None and breaker is None:
+                if profiler is None:
+                    for u in urls:
+                        yield check(u)
+                else:
+                    for i, u in enumerate(urls):
+                        profiler.started(i)
+                        r = check(u)
+                        profiler.finished(i, r)
+                        yield r
+            else:
+                yield from _iter_check_results_threads(
+                    urls,
+                    check=check,
+                    concurrency=concurrency,
+                    per_host=per_host,
+                    retrier=retrier,
+                    breaker=breaker,
+                    profiler=profiler,
+                )
+        finally:
+            if hedges is not None:
+                hedges.shutdown(wait=False, cancel_futures=True)
+            if connections is not None:
+                stats = sessions.connection_stats()
+                connections.new += stats.new
+                connections.reused += stats.reused
+
+
+def _iter_check_results_threads(
+    urls: Iterable[Target],
+    *,
+    check: Callable[..., CheckResult],
+    concurrency: int,
+    per_host: Optional[int],
+    retrier: Optional[Retrier] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    profiler: Optional[Profiler] = None,
+) -> Iterator[CheckResult]:
+    # The dispatcher runs in the consumer's thread: it reads ahead up to the
+    # window, hands ready checks to the pool and yields results in order.
+    # Retries wait in `delayed` until their backoff has passed; checks of a
+    # host whose circuit is open finish at once as skipped.
+    it = enumerate(urls)
+    exhausted = False
+    window = window_size(concurrency)
+    hosts = HostQueue(per_host=per_host)
+    in_flight: dict[Future[CheckResult], tuple[int, str, Target, Optional[int]]] = {}
+    delayed = RetryQueue()
+    done: dict[int, CheckResult] = {}
+    next_index = 0
+    buffered = 0  # read from input but not yet yielded
+
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="url-monitor"
+    ) as pool:
+        try:
+            while True:
+                while not exhausted and buffered < window:
+                    item = next(it, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    hosts.push(*item)
+                    buffered += 1
+                    if retrier is not None:
+                        retrier.started()
+                    if profiler is not None:
+                        profiler.queued(item[0])
+                delayed.push_due(hosts)
+
+                while len(in_flight) < concurrency:
+                    ready = hosts.pop_ready()
+                    if ready is None:
+                        break
+                    i, u, host = ready
+                    ticket = None if breaker is None else breaker.allow(host)
+                    if breaker is not None and ticket is None:
+                        hosts.release(host)
+                        done[i] = delayed.finish(i, skipped_result(target_url(u)))
+                        continue
+                    if profiler is not None:
+                        profiler.started(i)
+                    f = pool.submit(check, u)
+                    in_flight[f] = (i, host, u, ticket)
+
+                if profiler is not None:
+                    profiler.sample(
+                        queued=len(hosts) + len(delayed), in_flight=len(in_flight)
+                    )
+                if in_flight:
+                    finished, _ = wait(
+                        in_flight,
+                        timeout=delayed.wait_s(),
+                        return_when=FIRST_COMPLETED,
+                    )
+                    for f in finished:
+                        i, host, u, ticket = in_flight.pop(f)
+                        hosts.release(host)
+                        r = f.result()
+                        if profiler is not None:
+                            profiler.finished(i, r)
+                        if breaker is not None:
+                            breaker.record(host, r, ticket)
+                        final = delayed.settle(retrier, i, u, r)
+                        if final is not None:
+                            done[i] = final
+                elif delayed:
+                    time.sleep(delayed.wait_s() or 0.0)
+
+                while next_index in done:
+                    yield done.pop(next_index)
+                    next_index += 1
+                    buffered -= 1
+
+                if exhausted and not (in_flight or delayed or hosts):
+                    break
+        finally:
+            for f in in_flight:
+                f.cancel()
+
+
+def _iter_check_results_asyncio(
+    urls: Iterable[Target],
+    *,
+    timeout: float,
+    concurrency: int,
+    per_host: Optional[int],
+    pool_size: int,
+    connections: Optional[ConnectionStats],
+    dns_cache: Optional[DnsCache],
+    method: str,
+    max_bytes: Optional[int],
+    validators: Optional[ValidatorCache],
+    adaptive: Optional[AdaptiveTimeouts],
+    retry: Optional[RetryPolicy],
+    retry_stats: Optional[RetryStats],
+    breaker: Optional[CircuitBreaker],
+    profiler: Optional[Profiler],
+) -> Iterator[CheckResult]:
+    # The event loop runs in a helper thread so callers keep a plain iterator;
+    # None marks the end of the stream, an exception is re-raised here. The
+    # queue is bounded: when the caller falls behind, the loop stops taking
+    # results (and so dispatching checks) until it catches up.
+    out: queue.Queue[CheckResult | BaseException | None] = queue.Queue(
+        maxsize=2 * concurrency
+    )
+    stop = threading.Event()
+
+    async def _produce() -> None:
+        loop = asyncio.get_running_loop()
+        async for r in aiter_check_results(
+            urls,
+            timeout=timeout,
+            concurrency=concurrency,
+            per_host=per_host,
+            pool_size=pool_size,
+            connections=connections,
+            dns_cache=dns_cache,
+            method=method,
+            max_bytes=max_bytes,
+            validators=validators,
+            adaptive=adaptive,
+            retry=retry,
+            retry_stats=retry_stats,
+            breaker=breaker,
+            profiler=profiler,
+        ):
+            try:
+                out.put_nowait(r)
+            except queue.Full:
+                # Wait off the loop, so checks in flight keep running
+                await loop.run_in_executor(None, out.put, r)
+            if stop.is_set():
+                break
+
+    def _run() -> None:
+        try:
+            asyncio.run(_produce())
+            out.put(None)
+        except BaseException as e:
+            out.put(e)
+
+    t = threading.Thread(target=_run, name="url-monitor-asyncio", daemon=True)
+    t.start()
+    try:
+        while (item := out.get()) is not None:
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        # Unblock a producer waiting for space, then let it finish
+        while t.is_alive():
+            try:
+                out.get(timeout=0.05)
+            except queue.Empty:
+                pass
+        t.join()
+
+
+def check_urls(
+    urls: Iterable[Target],
+    *,
+    timeout: float = 5.0,
+    concurrency: int = 1,
+    backend: str = "threads",
+    per_host: Optional[int] = None,
+    pool_size: int = 10,
+    connections: Optional[ConnectionStats] = None,
+    dns_cache: Optional[DnsCache] = None,
+    method: str = "get",
+    max_bytes: Optional[int] = None,
+    validators: Optional[ValidatorCache] = None,
+    adaptive: Optional[AdaptiveTimeouts] = None,
+    retry: Optional[RetryPolicy] = None,
+    retry_stats: Optional[RetryStats] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    profiler: Optional[Profiler] = None,
+) -> list[CheckResult]:
+    """Check URLs and return CheckResults in input order."""
+    return list(
+        iter_check_results(
+            urls,
+            timeout=timeout,
+            concurrency=concurrency,
+            backend=backend,
+            per_host=per_host,
+            pool_size=pool_size,
+            connections=connections,
+            dns_cache=dns_cache,
+            method=method,
+            max_bytes=max_bytes,
+            validators=validators,
+            adaptive=adaptive,
+            retry=retry,
+            retry_stats=retry_stats,
+            breaker=breaker,
+            profiler=profiler,
+        )
+    )
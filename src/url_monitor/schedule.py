@@ -0,0 +1,130 @@
+# SPDX-License-Identifier: MIT
+"""Host-aware scheduling of URL checks."""
+
+from __future__ import annotations
+
+import dataclasses
+import heapq
+import time
+from collections import Counter, deque
+from typing import Callable, Optional
+
+from .model import CheckResult, Target
+from .retry import Retrier
+from .validate import url_host
+
+
+def window_size(concurrency: int) -> int:
+    """
+    How many input URLs a dispatcher reads ahead of the oldest unfinished
+    check: large enough to interleave hosts, small enough to keep memory flat.
+    """
+    return max(8 * concurrency, 64)
+
+
+class HostQueue:
+    """
+    Pending checks grouped by host and served round-robin.
+
+    - Each host has its own FIFO queue, so input order is kept per host.
+    - `pop_ready` rotates across hosts, so one host with many URLs (or a slow
+      one) cannot monopolise the workers.
+    - At most `per_host` checks per host are active at once (None: no cap).
+      Callers must `release(host)` when a check handed out by `pop_ready`
+      has finished.
+    """
+
+    def __init__(self, *, per_host: Optional[int] = None) -> None:
+        if per_host is not None and per_host < 1:
+            raise ValueError(f"per_host must be >= 1 (got {per_host})")
+        self.per_host = per_host
+        self._pending: dict[str, deque[tuple[int, Target]]] = {}
+        self._ready: deque[str] = deque()
+        self._active: Counter[str] = Counter()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, index: int, url: Target) -> None:
+        host = url_host(url) if isinstance(url, str) else url.host
+        q = self._pending.get(host)
+        if q is None:
+            q = self._pending[host] = deque()
+            self._ready.append(host)
+        q.append((index, url))
+        self._size += 1
+
+    def pop_ready(self) -> Optional[tuple[int, Target, str]]:
+        """Next (index, url, host) whose host is below its cap, or None."""
+        for _ in range(len(self._ready)):
+            host = self._ready.popleft()
+            if self.per_host is not None and self._active[host] >= self.per_host:
+                self._ready.append(host)
+                continue
+
+            q = self._pending[host]
+            index, url = q.popleft()
+            if q:
+                self._ready.append(host)
+            else:
+                del self._pending[host]
+            self._active[host] += 1
+            self._size -= 1
+            return index, url, host
+        return None
+
+    def release(self, host: str) -> None:
+        self._active[host] -= 1
+        if self._active[host] <= 0:
+            del self._active[host]
+
+
+class RetryQueue:
+    """
+    Checks waiting out their retry backoff, for a dispatcher.
+
+    `settle` decides (through a Retrier) whether a finished attempt is
+    final or the check goes back into the schedule after its delay;
+    `push_due` hands retries whose delay has passed to the HostQueue, so
+    they obey the same per-host caps as first attempts.
+    """
+
+    def __init__(self, *, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._heap: list[tuple[float, int, Target]] = []  # (due, index, url)
+        self._attempts: dict[int, int] = {}  # index -> attempt in flight
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push_due(self, hosts: HostQueue) -> None:
+        now = self._clock()
+        while self._heap and self._heap[0][0] <= now:
+            _due, index, url = heapq.heappop(self._heap)
+            hosts.push(index, url)
+
+    def wait_s(self) -> Optional[float]:
+        """Seconds until the next retry is due (None: nothing is waiting)."""
+        if not self._heap:
+            return None
+        return max(self._heap[0][0] - self._clock(), 0.0)
+
+    def settle(
+        self, retrier: Optional[Retrier], index: int, url: Target, r: CheckResult
+    ) -> Optional[CheckResult]:
+        """Final result of check `index`, or None if a retry was scheduled."""
+        if retrier is None:
+            return r
+        attempt = self._attempts.get(index, 1)
+        delay = retrier.next_delay(r, attempt)
+        if delay is not None:
+            self._attempts[index] = attempt + 1
+            heapq.heappush(self._heap, (self._clock() + delay, index, url))
+            return None
+        return self.finish(index, r)
+
+    def finish(self, index: int, r: CheckResult) -> CheckResult:
+        """r as the final result of check `index`, with its attempt count."""
+        attempt = self._attempts.pop(index, 1)
+        return r if attempt == 1 else dataclasses.replace(r, attempts=attempt)
@@ -0,0 +1,233 @@
+# SPDX-License-Identifier: MIT
+"""Sharded runs: split URLs across processes and merge their summaries.
+
+`Shard(index, count)` selects the URLs one of `count` runs checks. URLs are
+assigned by host with rendezvous (highest random weight) hashing, so all
+URLs of a host land on the same shard (per-host caps, keep-alive and the
+circuit breaker keep working), and changing `count` only moves the hosts
+of the added or removed shards.
+
+Each shard writes a partial summary (`write_partial`): the serialized
+SummaryAccumulator and ReportAggregates plus the run-level counters, all
+bounded in size however many checks fail. `merge_partials` combines
+partials into the summary and report of the whole run. Compared with one unsharded run over the same
+results:
+
+- counts, status classes, bytes, retry counts and run-level counters
+  (connections, DNS, conditional, adaptive, circuit breaker) are exact;
+  deduplication is per shard, so aliases that only differ in an explicit
+  default port (":80", ":443") may land on another shard and be checked
+  there too
+- max latency and the slowest-k URLs are exact; among equal latencies the
+  slowest list may pick a different URL
+- avg latency is exact up to float rounding (sums are added in a
+  different order)
+- percentiles are exact with percentiles="exact" (every sample is in the
+  partial); with "sketch" they stay within the sketch's relative accuracy
+- the slowest HTTP failures are exact (ties may pick another URL);
+  exception groups and skipped hosts are exact in their counts, and their
+  examples are the first ones in shard order, not input order
+- invalid input lines are reported by shard 0 only
+- history trends are not merged (each shard's trends cover its own hosts)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Sequence
+
+from .model import (
+    AdaptiveStats,
+    BreakerStats,
+    ConditionalStats,
+    ConnectionStats,
+    DedupStats,
+    DnsStats,
+    RetryStats,
+    Target,
+)
+from .report import ReportAggregates, render_report_md, write_report_md
+from .stats import SummaryAccumulator
+from .validate import url_host
+
+PARTIAL_VERSION = 2
+
+
+def _weight(host: str, index: int) -> int:
+    digest = hashlib.blake2b(f"{index}:{host}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def shard_of(host: str, count: int) -> int:
+    """The shard (0 <= shard < count) that owns host."""
+    return max(range(count), key=lambda i: _weight(host, i))
+
+
+@dataclass(frozen=True, slots=True)
+class Shard:
+    """Shard `index` (0-based) of `count`."""
+
+    index: int
+    count: int
+
+    def __post_init__(self) -> None:
+        if self.count < 1:
+            raise ValueError(f"shard count must be >= 1 (got {self.count})")
+        if not 0 <= self.index < self.count:
+            raise ValueError(
+                f"shard index must be in [0, {self.count - 1}] (got {self.index})"
+            )
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    def owns(self, url: Target) -> bool:
+        host = url_host(url) if isinstance(url, str) else url.host
+        return self.count == 1 or shard_of(host, self.count) == self.index
+
+    def select(self, urls: Iterable[Target]) -> Iterable[Target]:
+        """The URLs of urls this shard checks (lazily, in input order)."""
+        return (u for u in urls if self.owns(u))
+
+
+def parse_shard(spec: str) -> Shard:
+    """Shard from "i/N", e.g. "0/4" for the first of four shards."""
+    index, sep, count = spec.partition("/")
+    if not sep:
+        raise ValueError(f"shard must look like i/N (got {spec!r})")
+    try:
+        return Shard(int(index), int(count))
+    except ValueError as e:
+        if "shard" in str(e):
+            raise
+        raise ValueError(f"shard must look like i/N (got {spec!r})") from None
+
+
+# Counters kept by the run rather than by the accumulator, merged by adding
+# them up: summary key -> (SummaryAccumulator.summary keyword, stats class)
+_RUN_STATS: dict[str, tuple[str, type]] = {
+    "connections": ("connections", ConnectionStats),
+    "dns": ("dns", DnsStats),
+    "conditional": ("conditional", ConditionalStats),
+    "adaptive": ("adaptive", AdaptiveStats),
+    "circuit_breaker": ("breaker", BreakerStats),
+    "dedup": ("dedup", DedupStats),
+}
+
+
+def write_partial(
+    path: Path,
+    *,
+    source: str,
+    shard: Shard | None,
+    acc: SummaryAccumulator,
+    summary: dict[str, Any],
+    aggregates: ReportAggregates,
+    invalids: Sequence[str],
+) -> None:
+    """Write a run's partial summary to path (JSON)."""
+    stats = {k: summary[k] for k in _RUN_STATS if k in summary}
+    retries = summary.get("retries")
+    if retries is not None:
+        stats["retries"] = {
+            "budget_denied": retries["budget_denied"],
+            "by_kind": retries["by_kind"],
+        }
+    data = {
+        "version": PARTIAL_VERSION,
+        "source": source,
+        "shard": None if shard is None else [shard.index, shard.count],
+        "method": summary.get("method", "get"),
+        "accumulator": acc.to_dict(),
+        "stats": stats,
+        "report": aggregates.to_dict(),
+        "invalids": list(invalids),
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+
+def load_partial(path: Path) -> dict[str, Any]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(data, dict) or data.get("version") != PARTIAL_VERSION:
+        raise ValueError(f"{path}: not a url-monitor partial summary")
+    return data
+
+
+def _add_counts(into: dict[str, Any], other: dict[str, Any]) -> None:
+    for k, v in other.items():
+        if isinstance(v, dict):
+            _add_counts(into.setdefault(k, {}), v)
+        else:
+            into[k] = into.get(k, 0) + v
+
+
+def merge_partials(
+    paths: Sequence[Path],
+    *,
+    report_path: Path | None = None,
+) -> tuple[ReportAggregates, dict[str, Any], str, list[str]]:
+    """
+    Merge partial summaries into one summary and report.
+
+    Returns (aggregates, summary, report_md, invalids) like run_monitor,
+    except that the first item is the merged ReportAggregates (partials
+    do not carry results). With report_path, the report is written there
+    line by line and report_md is "".
+    """
+    if not paths:
+        raise ValueError("no partial summaries to merge")
+    acc: SummaryAccumulator | None = None
+    stats: dict[str, Any] = {}
+    aggregates = ReportAggregates()
+    invalids: list[str] = []
+    sources: list[str] = []
+    methods: set[str] = set()
+    for path in paths:
+        data = load_partial(path)
+        part = SummaryAccumulator.from_dict(data["accumulator"])
+        if acc is None:
+            acc = part
+        else:
+            acc.merge(part)
+        _add_counts(stats, data["stats"])
+        aggregates.merge(ReportAggregates.from_dict(data["report"]))
+        invalids.extend(data["invalids"])
+        if data["source"] not in sources:
+            sources.append(data["source"])
+        methods.add(data["method"])
+    assert acc is not None
+
+    run_stats: dict[str, Any] = {
+        kwarg: cls(**stats[key])
+        for key, (kwarg, cls) in _RUN_STATS.items()
+        if key in stats
+    }
+    if "retries" in stats:
+        run_stats["retry"] = RetryStats(**stats["retries"])
+    summary = acc.summary(**run_stats)
+    if methods != {"get"}:
+        summary["method"] = ", ".join(sorted(methods))
+    summary["partials"] = len(paths)
+
+    report_md = ""
+    if report_path is None:
+        report_md = render_report_md(
+            source=", ".join(sources),
+            summary=summary,
+            invalids=invalids,
+            aggregates=aggregates,
+        )
+    else:
+        with report_path.open("w", encoding="utf-8") as f:
+            write_report_md(
+                f,
+                source=", ".join(sources),
+                summary=summary,
+                invalids=invalids,
+                aggregates=aggregates,
+            )
+    return aggregates, summary, report_md, invalids
@@ -0,0 +1,124 @@
+# SPDX-License-Identifier: MIT
+"""Mergeable quantile sketch for latency percentiles (DDSketch-style).
+
+Values are counted in logarithmic buckets: bucket i holds values in
+(gamma**(i-1), gamma**i] with gamma = (1 + a) / (1 - a) for a relative
+accuracy `a`. The value reported for a bucket is within a relative error of
+`a` of every value in it, so any quantile is returned within `a` of the
+exact order statistic at that rank (e.g. a=0.01: 250 ms is reported as
+247.5..252.5 ms).
+
+Memory is bounded by the number of non-empty buckets, which grows with
+log(max/min) / log(gamma): about 1,100 buckets span 1 us .. 1 hour at
+a=0.01. If `max_buckets` is exceeded, the lowest buckets are collapsed
+together; the error bound then still holds for the upper quantiles that
+the report uses (p50 and above) unless more than half of the samples fall
+into collapsed buckets.
+
+Sketches with the same relative accuracy merge exactly (bucket counts are
+added), which makes them suitable for combining results from workers.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any
+
+# Values at or below this (ms) are counted in a dedicated zero bucket.
+MIN_VALUE = 1e-6
+
+
+class QuantileSketch:
+    def __init__(
+        self, *, relative_accuracy: float = 0.01, max_buckets: int = 2048
+    ) -> None:
+        if not 0.0 < relative_accuracy < 1.0:
+            raise ValueError(
+                f"relative_accuracy must be in (0, 1) (got {relative_accuracy})"
+            )
+        if max_buckets < 1:
+            raise ValueError(f"max_buckets must be >= 1 (got {max_buckets})")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self._gamma = (1.0 + relative_accuracy) / (1.0 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, x: float) -> None:
+        self.add_bucket(self.key(x), 1)
+
+    def key(self, x: float) -> int | None:
+        """Bucket index of x (None: the zero bucket), e.g. to store counts."""
+        if x <= MIN_VALUE:
+            return None
+        return math.ceil(math.log(x) / self._log_gamma)
+
+    def add_bucket(self, i: int | None, n: int) -> None:
+        """Count n values in bucket i (as returned by `key`)."""
+        self.count += n
+        if i is None:
+            self.zero_count += n
+            return
+        self._buckets[i] = self._buckets.get(i, 0) + n
+        if len(self._buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self) -> None:
+        keys = sorted(self._buckets)
+        excess = len(keys) - self.max_buckets
+        target = keys[excess]
+        for k in keys[:excess]:
+            self._buckets[target] += self._buckets.pop(k)
+
+    def _value(self, i: int) -> float:
+        # Midpoint (in relative terms) of (gamma**(i-1), gamma**i]
+        return 2.0 * self._gamma**i / (self._gamma + 1.0)
+
+    def quantile(self, q: float) -> float | None:
+        """Approximate q-quantile (0 <= q <= 1), or None if empty."""
+        if not 0.0 <= q <= 1.0:
+            raise ValueError(f"q must be in [0, 1] (got {q})")
+        if self.count == 0:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for i in sorted(self._buckets):
+            seen += self._buckets[i]
+            if rank < seen:
+                return self._value(i)
+        return self._value(max(self._buckets))
+
+    def merge(self, other: QuantileSketch) -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("cannot merge sketches with different accuracy")
+        for i, n in other._buckets.items():
+            self._buckets[i] = self._buckets.get(i, 0) + n
+        self.zero_count += other.zero_count
+        self.count += other.count
+        if len(self._buckets) > self.max_buckets:
+            self._collapse()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_buckets": self.max_buckets,
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "buckets": {str(i): n for i, n in sorted(self._buckets.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> QuantileSketch:
+        sk = cls(
+            relative_accuracy=float(data["relative_accuracy"]),
+            max_buckets=int(data["max_buckets"]),
+        )
+        sk.zero_count = int(data["zero_count"])
+        sk.count = int(data["count"])
+        sk._buckets = {int(i): int(n) for i, n in data["buckets"].items()}
+        return sk
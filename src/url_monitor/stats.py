@@ -3,82 +3,468 @@
 
 from __future__ import annotations
 
+import heapq
 import statistics
 from typing import Any, Iterable
 
-from .model import CheckResult
+from .model import (
+    AdaptiveStats,
+    BreakerStats,
+    CheckResult,
+    ConditionalStats,
+    ConnectionStats,
+    DedupStats,
+    DnsStats,
+    Phases,
+    RetryStats,
+)
+from .phases import PHASES
+from .sketch import QuantileSketch
+from .store import ResultStore
 from .validate import classify_status
 
+STATUS_CLASSES = ("2xx", "3xx", "4xx", "5xx", "other")
+PERCENTILE_MODES = ("exact", "sketch")
+
+# Reported percentiles, in per-mille so exact values use integer arithmetic
+# (same formula as statistics.quantiles(..., method="inclusive")).
+PERCENTILES = {"p50": 500, "p90": 900, "p95": 950, "p99": 990, "p99.9": 999}
+
+# Percentiles are only reported with at least this many samples
+MIN_PERCENTILE_SAMPLES = 20
+
 
 def _p95_inclusive(values: list[float]) -> float | None:
     # 95th percentile via n=20 (each 5%), inclusive method
-    if len(values) < 20:
+    if len(values) < MIN_PERCENTILE_SAMPLES:
         return None
     return statistics.quantiles(values, n=20, method="inclusive")[-1]
 
 
-def summarize(results: Iterable[CheckResult]) -> dict[str, Any]:
-    results = list(results)
-
-    total = len(results)
-    ok_count = sum(1 for r in results if r.ok)
-    fail_count = total - ok_count
-
-    http_failures = [
-        r
-        for r in results
-        if (not r.ok) and (r.status_code is not None) and (r.error is None)
-    ]
-    exceptions = [r for r in results if (not r.ok) and (r.error is not None)]
-
-    # Status breakdown (by status_code class; exceptions fall into "other")
-    by_class: dict[str, int] = {"2xx": 0, "3xx": 0, "4xx": 0, "5xx": 0, "other": 0}
-    for r in results:
-        by_class[classify_status(r.status_code)] += 1
-
-    # Success latency stats (only ok)
-    success_elapsed = [
-        r.elapsed_ms for r in results if r.ok and r.elapsed_ms is not None
-    ]
-    success_elapsed_f = [float(x) for x in success_elapsed]
-    success_avg = statistics.mean(success_elapsed_f) if success_elapsed_f else None
-    success_max = max(success_elapsed_f) if success_elapsed_f else None
-    success_p95 = _p95_inclusive(success_elapsed_f)
-
-    # Failure latency stats (non-ok; include both HTTP failures + exceptions if elapsed exists)
-    failure_elapsed = [
-        r.elapsed_ms for r in results if (not r.ok) and r.elapsed_ms is not None
-    ]
-    failure_elapsed_f = [float(x) for x in failure_elapsed]
-    failure_avg = statistics.mean(failure_elapsed_f) if failure_elapsed_f else None
-    failure_p95 = _p95_inclusive(failure_elapsed_f)
-
-    # Slowest (top 5) overall by elapsed_ms
-    slowest = sorted(
-        (r for r in results if r.elapsed_ms is not None),
-        key=lambda r: r.elapsed_ms,  # type: ignore[arg-type]
-        reverse=True,
-    )[:5]
-
-    error_rate = (fail_count / total) if total else 0.0
-
-    return {
-        "total": total,
-        "ok": ok_count,
-        "fail": fail_count,
-        "http_failures": len(http_failures),
-        "exceptions": len(exceptions),
-        "error_rate": error_rate,
-        "by_status_class": by_class,
-        "success_samples": len(success_elapsed_f),
-        "success_max_ms": success_max,
-        "success_avg_ms": success_avg,
-        "success_p95_ms": success_p95,
-        "failure_samples": len(failure_elapsed_f),
-        "failure_avg_ms": failure_avg,
-        "failure_p95_ms": failure_p95,
-        "slowest": [
-            {"url": r.url, "elapsed_ms": r.elapsed_ms, "status": r.status_code}
-            for r in slowest
-        ],
-    }
+def percentile_inclusive(data: list[float], m: int) -> float:
+    """
+    The m-per-mille percentile (e.g. m=950 for p95) of sorted, non-empty
+    data, interpolated like statistics.quantiles(..., method="inclusive").
+    """
+    j, delta = divmod(m * (len(data) - 1), 1000)
+    if delta == 0:
+        return data[j]
+    return (data[j] * (1000 - delta) + data[j + 1] * delta) / 1000
+
+
+class _Latency:
+    """
+    Running count/sum/max plus what is needed for percentiles:
+    every sample (exact mode) or a QuantileSketch (sketch mode).
+    """
+
+    __slots__ = ("count", "total", "max", "samples", "sketch")
+
+    def __init__(self, *, mode: str, relative_accuracy: float) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max: float | None = None
+        self.samples: list[float] | None = [] if mode == "exact" else None
+        self.sketch: QuantileSketch | None = (
+            QuantileSketch(relative_accuracy=relative_accuracy)
+            if mode == "sketch"
+            else None
+        )
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        self.total += x
+        if self.max is None or x > self.max:
+            self.max = x
+        if self.samples is not None:
+            self.samples.append(x)
+        else:
+            assert self.sketch is not None
+            self.sketch.add(x)
+
+    def merge(self, other: _Latency) -> None:
+        self.count += other.count
+        self.total += other.total
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        if self.samples is not None and other.samples is not None:
+            self.samples.extend(other.samples)
+        elif self.sketch is not None and other.sketch is not None:
+            self.sketch.merge(other.sketch)
+        else:
+            raise ValueError("cannot merge exact and sketch percentiles")
+
+    def to_dict(self) -> dict[str, Any]:
+        data: dict[str, Any] = {
+            "count": self.count,
+            "total": self.total,
+            "max": self.max,
+        }
+        if self.samples is not None:
+            data["samples"] = self.samples
+        else:
+            assert self.sketch is not None
+            data["sketch"] = self.sketch.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> _Latency:
+        sketch = data.get("sketch")
+        lat = cls(
+            mode="exact" if sketch is None else "sketch",
+            relative_accuracy=(
+                0.01 if sketch is None else float(sketch["relative_accuracy"])
+            ),
+        )
+        lat.count = int(data["count"])
+        lat.total = float(data["total"])
+        lat.max = None if data["max"] is None else float(data["max"])
+        if sketch is None:
+            lat.samples = [float(x) for x in data["samples"]]
+        else:
+            lat.sketch = QuantileSketch.from_dict(sketch)
+        return lat
+
+    @property
+    def avg(self) -> float | None:
+        return (self.total / self.count) if self.count else None
+
+    @property
+    def p95(self) -> float | None:
+        if self.samples is not None:
+            return _p95_inclusive(self.samples)
+        return self.percentiles()["p95"]
+
+    def percentiles(self) -> dict[str, float | None]:
+        if self.count < MIN_PERCENTILE_SAMPLES:
+            return dict.fromkeys(PERCENTILES)
+        if self.samples is not None:
+            data = sorted(self.samples)
+            return {k: percentile_inclusive(data, m) for k, m in PERCENTILES.items()}
+        assert self.sketch is not None
+        return {k: self.sketch.quantile(m / 1000) for k, m in PERCENTILES.items()}
+
+
+class SummaryAccumulator:
+    """
+    Single-pass, incremental version of `summarize`.
+
+    Feed CheckResults one at a time with `add` (e.g. while they stream in
+    from the runner) and call `summary()` at any point; the dict has the
+    same shape and values as `summarize` over the same results. Keys of
+    optional features (skipped checks, phases, connections, ...) are only
+    present when the feature is in use.
+    Accumulators with the same settings can be combined with `merge`, also
+    across processes: `to_dict` is a JSON-serializable snapshot of the state
+    and `from_dict` restores it.
+
+    - status classes and ok/fail/exception counts are plain counters
+    - latency avg/max are running values
+    - the top-k slowest results are kept in a bounded min-heap
+    - body bytes received (total over the results that record it)
+    - per-phase (dns/connect/tls/ttfb/body) avg and p95 over the results
+      that carry phase timings
+    - percentiles (p50/p90/p95/p99/p99.9):
+      - "exact": every latency sample is kept (statistics.quantiles,
+        inclusive method)
+      - "sketch": bounded memory via QuantileSketch; values are within
+        `relative_accuracy` (default 1%) of the exact order statistic
+    """
+
+    def __init__(
+        self,
+        *,
+        slowest_k: int = 5,
+        percentiles: str = "exact",
+        relative_accuracy: float = 0.01,
+    ) -> None:
+        if percentiles not in PERCENTILE_MODES:
+            raise ValueError(
+                f"percentiles must be one of {PERCENTILE_MODES} (got {percentiles!r})"
+            )
+        self.slowest_k = slowest_k
+        self.percentile_mode = percentiles
+        self.relative_accuracy = relative_accuracy
+        self.total = 0
+        self.ok = 0
+        self.http_failures = 0
+        self.exceptions = 0
+        self.skipped = 0
+        self.by_status_class: dict[str, int] = dict.fromkeys(STATUS_CLASSES, 0)
+        self.success = _Latency(mode=percentiles, relative_accuracy=relative_accuracy)
+        self.failure = _Latency(mode=percentiles, relative_accuracy=relative_accuracy)
+        # (elapsed_ms, -seq, url, status); -seq keeps earlier results on ties
+        self._slowest: list[tuple[float, int, str, int | None]] = []
+        self.bytes_samples = 0
+        self.bytes_received = 0
+        # Checks that took more than one attempt, extra attempts, and
+        # retried checks that ended OK
+        self.retried = 0
+        self.retries = 0
+        self.recovered = 0
+        # Created on the first result with phase timings
+        self.phases: dict[str, _Latency] | None = None
+
+    def add(self, r: CheckResult) -> None:
+        self.add_fields(
+            r.url,
+            r.ok,
+            r.status_code,
+            r.elapsed_ms,
+            r.error,
+            r.phases,
+            r.bytes_received,
+            r.attempts,
+            r.skipped,
+        )
+
+    def add_fields(
+        self,
+        url: str,
+        ok: bool,
+        status_code: int | None,
+        elapsed_ms: float | None,
+        error: str | None,
+        phases: Phases | None = None,
+        bytes_received: int | None = None,
+        attempts: int = 1,
+        skipped: bool = False,
+    ) -> None:
+        """`add` for a result given as plain fields (e.g. a ResultStore row)."""
+        if attempts > 1:
+            self.retried += 1
+            self.retries += attempts - 1
+            self.recovered += 1 if ok else 0
+        if phases is not None:
+            self._add_phases(phases)
+        if bytes_received is not None:
+            self.bytes_samples += 1
+            self.bytes_received += bytes_received
+
+        seq = self.total
+        self.total += 1
+
+        if ok:
+            self.ok += 1
+        elif skipped:
+            self.skipped += 1
+        elif error is not None:
+            self.exceptions += 1
+        elif status_code is not None:
+            self.http_failures += 1
+        self.by_status_class[classify_status(status_code)] += 1
+
+        if elapsed_ms is None:
+            return
+        elapsed = float(elapsed_ms)
+        (self.success if ok else self.failure).add(elapsed)
+
+        self._push_slowest((elapsed, -seq, url, status_code))
+
+    def _phase_latencies(self) -> dict[str, _Latency]:
+        if self.phases is None:
+            self.phases = {
+                name: _Latency(
+                    mode=self.percentile_mode,
+                    relative_accuracy=self.relative_accuracy,
+                )
+                for name in PHASES
+            }
+        return self.phases
+
+    def _add_phases(self, phases: Phases) -> None:
+        lat = self._phase_latencies()
+        for name, x in zip(
+            PHASES,
+            (
+                phases.dns_ms,
+                phases.connect_ms,
+                phases.tls_ms,
+                phases.ttfb_ms,
+                phases.body_ms,
+            ),
+        ):
+            if x is not None:
+                lat[name].add(x)
+
+    def _push_slowest(self, item: tuple[float, int, str, int | None]) -> None:
+        if len(self._slowest) < self.slowest_k:
+            heapq.heappush(self._slowest, item)
+        elif self.slowest_k and item > self._slowest[0]:
+            heapq.heapreplace(self._slowest, item)
+
+    def extend(self, results: Iterable[CheckResult]) -> None:
+        if isinstance(results, ResultStore):
+            # Read the columns directly instead of building CheckResult views
+            for row in results.rows():
+                self.add_fields(*row)
+            return
+        for r in results:
+            self.add(r)
+
+    def merge(self, other: SummaryAccumulator) -> None:
+        """Fold `other` in as if its results had been added after ours."""
+        offset = self.total
+        self.total += other.total
+        self.ok += other.ok
+        self.http_failures += other.http_failures
+        self.exceptions += other.exceptions
+        self.skipped += other.skipped
+        for k, n in other.by_status_class.items():
+            self.by_status_class[k] += n
+        self.success.merge(other.success)
+        self.failure.merge(other.failure)
+        self.bytes_samples += other.bytes_samples
+        self.bytes_received += other.bytes_received
+        self.retried += other.retried
+        self.retries += other.retries
+        self.recovered += other.recovered
+        if other.phases is not None:
+            lat = self._phase_latencies()
+            for name, other_lat in other.phases.items():
+                lat[name].merge(other_lat)
+        for elapsed, neg_seq, url, status in other._slowest:
+            self._push_slowest((elapsed, neg_seq - offset, url, status))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "slowest_k": self.slowest_k,
+            "percentiles": self.percentile_mode,
+            "relative_accuracy": self.relative_accuracy,
+            "total": self.total,
+            "ok": self.ok,
+            "http_failures": self.http_failures,
+            "exceptions": self.exceptions,
+            "skipped": self.skipped,
+            "by_status_class": dict(self.by_status_class),
+            "success": self.success.to_dict(),
+            "failure": self.failure.to_dict(),
+            "slowest": [list(item) for item in sorted(self._slowest, reverse=True)],
+            "bytes_samples": self.bytes_samples,
+            "bytes_received": self.bytes_received,
+            "retried": self.retried,
+            "retries": self.retries,
+            "recovered": self.recovered,
+            "phases": (
+                None
+                if self.phases is None
+                else {name: lat.to_dict() for name, lat in self.phases.items()}
+            ),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> SummaryAccumulator:
+        acc = cls(
+            slowest_k=int(data["slowest_k"]),
+            percentiles=str(data["percentiles"]),
+            relative_accuracy=float(data["relative_accuracy"]),
+        )
+        for name in (
+            "total",
+            "ok",
+            "http_failures",
+            "exceptions",
+            "skipped",
+            "bytes_samples",
+            "bytes_received",
+            "retried",
+            "retries",
+            "recovered",
+        ):
+            setattr(acc, name, int(data[name]))
+        acc.by_status_class.update(data["by_status_class"])
+        acc.success = _Latency.from_dict(data["success"])
+        acc.failure = _Latency.from_dict(data["failure"])
+        acc._slowest = [
+            (float(elapsed), int(neg_seq), str(url), status)
+            for elapsed, neg_seq, url, status in data["slowest"]
+        ]
+        heapq.heapify(acc._slowest)
+        if data.get("phases") is not None:
+            acc.phases = {
+                name: _Latency.from_dict(lat) for name, lat in data["phases"].items()
+            }
+        return acc
+
+    def summary(
+        self,
+        *,
+        connections: ConnectionStats | None = None,
+        dns: DnsStats | None = None,
+        conditional: ConditionalStats | None = None,
+        adaptive: AdaptiveStats | None = None,
+        retry: RetryStats | None = None,
+        breaker: BreakerStats | None = None,
+        dedup: DedupStats | None = None,
+    ) -> dict[str, Any]:
+        fail_count = self.total - self.ok
+        error_rate = (fail_count / self.total) if self.total else 0.0
+        slowest = sorted(self._slowest, reverse=True)
+
+        summary: dict[str, Any] = {
+            "total": self.total,
+            "ok": self.ok,
+            "fail": fail_count,
+            "http_failures": self.http_failures,
+            "exceptions": self.exceptions,
+            "error_rate": error_rate,
+            "by_status_class": dict(self.by_status_class),
+            "success_samples": self.success.count,
+            "success_max_ms": self.success.max,
+            "success_avg_ms": self.success.avg,
+            "success_p95_ms": self.success.p95,
+            "failure_samples": self.failure.count,
+            "failure_avg_ms": self.failure.avg,
+            "failure_p95_ms": self.failure.p95,
+            "percentile_mode": self.percentile_mode,
+            "success_percentiles_ms": self.success.percentiles(),
+            "failure_percentiles_ms": self.failure.percentiles(),
+            "slowest": [
+                {"url": url, "elapsed_ms": elapsed, "status": status}
+                for elapsed, _neg_seq, url, status in slowest
+            ],
+        }
+        if self.percentile_mode == "sketch":
+            summary["percentile_accuracy"] = self.relative_accuracy
+        if breaker is not None or self.skipped:
+            summary["skipped"] = self.skipped
+        if self.bytes_samples:
+            summary["bytes_received"] = self.bytes_received
+            summary["bytes_samples"] = self.bytes_samples
+        if self.phases is not None:
+            summary["phases_ms"] = {
+                name: {"samples": lat.count, "avg": lat.avg, "p95": lat.p95}
+                for name, lat in self.phases.items()
+            }
+        if connections is not None:
+            summary["connections"] = connections.as_dict()
+        if dns is not None:
+            summary["dns"] = dns.as_dict()
+        if conditional is not None:
+            summary["conditional"] = conditional.as_dict()
+        if adaptive is not None:
+            summary["adaptive"] = adaptive.as_dict()
+        if retry is not None or self.retried:
+            summary["retries"] = {
+                "checks_retried": self.retried,
+                "retries": self.retries,
+                "recovered": self.recovered,
+                "budget_denied": retry.budget_denied if retry is not None else 0,
+                "by_kind": dict(retry.by_kind) if retry is not None else {},
+            }
+        if breaker is not None:
+            summary["circuit_breaker"] = breaker.as_dict()
+        if dedup is not None:
+            summary["dedup"] = dedup.as_dict()
+        return summary
+
+
+def summarize(
+    results: Iterable[CheckResult],
+    *,
+    connections: ConnectionStats | None = None,
+    percentiles: str = "exact",
+) -> dict[str, Any]:
+    acc = SummaryAccumulator(percentiles=percentiles)
+    acc.extend(results)
+    return acc.summary(connections=connections)
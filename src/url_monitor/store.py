@@ -0,0 +1,204 @@
+# SPDX-License-Identifier: MIT
+"""Compact columnar storage for large numbers of check results."""
+
+from __future__ import annotations
+
+import math
+from array import array
+from typing import Iterable, Iterator, Optional, Sequence, overload
+
+from .model import CheckResult, Phases
+
+# A result as plain fields, in CheckResult field order
+Row = tuple[
+    str,
+    bool,
+    Optional[int],
+    Optional[float],
+    Optional[str],
+    Optional[Phases],
+    Optional[int],
+    int,
+    bool,
+]
+
+_NUM_PHASES = len(Phases.__slots__)
+
+
+class _Interned:
+    """Append-only string table: each distinct string is stored once."""
+
+    def __init__(self) -> None:
+        self.values: list[str] = []
+        self._ids: dict[str, int] = {}
+
+    def id_of(self, s: str) -> int:
+        i = self._ids.get(s)
+        if i is None:
+            i = self._ids[s] = len(self.values)
+            self.values.append(s)
+        return i
+
+    def __getstate__(self) -> list[str]:
+        return self.values
+
+    def __setstate__(self, values: list[str]) -> None:
+        self.values = values
+        self._ids = {s: i for i, s in enumerate(values)}
+
+
+class ResultStore(Sequence[CheckResult]):
+    """
+    CheckResults kept as typed columns instead of one object per result.
+
+    - url: interned string id (array of uint32)
+    - ok: array of int8
+    - status_code: array of int16 (-1 for None)
+    - elapsed_ms: array of float64 (NaN for None)
+    - error: deduplicated string id (array of int32, -1 for None)
+    - phases: offset into a float64 array holding the phase timings of the
+      results that have them (array of int32, -1 for None)
+    - bytes_received: array of int64 (-1 for None)
+    - attempts: array of uint16
+    - skipped: array of int8
+
+    Per result this is 34 bytes (+40 with phase timings) plus each distinct
+    URL/error string once, versus a CheckResult object plus its own strings. Indexing and
+    iteration return CheckResult views, so the store can be passed wherever
+    a list of results is expected; `rows()` skips building the views.
+    """
+
+    def __init__(self, results: Iterable[CheckResult] = ()) -> None:
+        self._urls = _Interned()
+        self._errors = _Interned()
+        self._url_ids = array("I")
+        self._ok = array("b")
+        self._status = array("h")
+        self._elapsed = array("d")
+        self._error_ids = array("i")
+        self._phase_ids = array("i")
+        self._phase_values = array("d")
+        self._bytes = array("q")
+        self._attempts = array("H")
+        self._skipped = array("b")
+        self.extend(results)
+
+    def append(self, r: CheckResult) -> None:
+        self._url_ids.append(self._urls.id_of(r.url))
+        self._ok.append(1 if r.ok else 0)
+        self._status.append(-1 if r.status_code is None else r.status_code)
+        self._elapsed.append(math.nan if r.elapsed_ms is None else r.elapsed_ms)
+        self._error_ids.append(-1 if r.error is None else self._errors.id_of(r.error))
+        if r.phases is None:
+            self._phase_ids.append(-1)
+        else:
+            self._phase_ids.append(len(self._phase_values))
+            self._phase_values.extend(
+                math.nan if x is None else x
+                for x in (
+                    r.phases.dns_ms,
+                    r.phases.connect_ms,
+                    r.phases.tls_ms,
+                    r.phases.ttfb_ms,
+                    r.phases.body_ms,
+                )
+            )
+        self._bytes.append(-1 if r.bytes_received is None else r.bytes_received)
+        self._attempts.append(r.attempts)
+        self._skipped.append(1 if r.skipped else 0)
+
+    def extend(self, results: Iterable[CheckResult]) -> None:
+        if isinstance(results, ResultStore):
+            self._extend_columns(results)
+            return
+        for r in results:
+            self.append(r)
+
+    def _extend_columns(self, other: ResultStore) -> None:
+        # Copy the columns, remapping string ids and phase offsets
+        url_ids = [self._urls.id_of(s) for s in other._urls.values]
+        error_ids = [self._errors.id_of(s) for s in other._errors.values]
+        phase_base = len(self._phase_values)
+        self._url_ids.extend(url_ids[i] for i in other._url_ids)
+        self._ok.extend(other._ok)
+        self._status.extend(other._status)
+        self._elapsed.extend(other._elapsed)
+        self._error_ids.extend(-1 if i < 0 else error_ids[i] for i in other._error_ids)
+        self._phase_ids.extend(
+            -1 if i < 0 else phase_base + i for i in other._phase_ids
+        )
+        self._phase_values.extend(other._phase_values)
+        self._bytes.extend(other._bytes)
+        self._attempts.extend(other._attempts)
+        self._skipped.extend(other._skipped)
+
+    def __len__(self) -> int:
+        return len(self._ok)
+
+    def _row(self, i: int) -> Row:
+        status = self._status[i]
+        elapsed = self._elapsed[i]
+        error_id = self._error_ids[i]
+        phase_id = self._phase_ids[i]
+        phases = None
+        if phase_id >= 0:
+            phases = Phases(
+                *(
+                    None if math.isnan(x) else x
+                    for x in self._phase_values[phase_id : phase_id + _NUM_PHASES]
+                )
+            )
+        nbytes = self._bytes[i]
+        return (
+            self._urls.values[self._url_ids[i]],
+            bool(self._ok[i]),
+            None if status < 0 else status,
+            None if math.isnan(elapsed) else elapsed,
+            None if error_id < 0 else self._errors.values[error_id],
+            phases,
+            None if nbytes < 0 else nbytes,
+            self._attempts[i],
+            bool(self._skipped[i]),
+        )
+
+    def rows(self) -> Iterator[Row]:
+        """Plain tuples of the CheckResult fields, in field order."""
+        for i in range(len(self)):
+            yield self._row(i)
+
+    @overload
+    def __getitem__(self, i: int) -> CheckResult: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> list[CheckResult]: ...
+
+    def __getitem__(self, i: int | slice) -> CheckResult | list[CheckResult]:
+        if isinstance(i, slice):
+            return [CheckResult(*self._row(j)) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("ResultStore index out of range")
+        return CheckResult(*self._row(i))
+
+    def __iter__(self) -> Iterator[CheckResult]:
+        for row in self.rows():
+            yield CheckResult(*row)
+
+    def nbytes(self) -> int:
+        """Bytes used by the fixed-size columns (excluding string tables)."""
+        return sum(
+            a.itemsize * len(a)
+            for a in (
+                self._url_ids,
+                self._ok,
+                self._status,
+                self._elapsed,
+                self._error_ids,
+                self._phase_ids,
+                self._phase_values,
+                self._bytes,
+                self._attempts,
+                self._skipped,
+            )
+        )
@@ -1,8 +1,9 @@
 # SPDX-License-Identifier: MIT
-"""Validate URLs."""
+"""Validate URLs and request headers."""
 
 from __future__ import annotations
 
+import re
 from typing import Optional
 from urllib.parse import urlparse
 
@@ -17,6 +18,22 @@ def is_valid_url(url: str) -> bool:
     return (p.scheme in ("http", "https")) and bool(p.netloc)
 
 
+# RFC 7230 token (header field name) and the characters a field value must
+# not contain, as they would end the header line (or the request head)
+_HEADER_NAME = re.compile(r"[!#$%&'*+.^_`|~0-9A-Za-z-]+")
+_HEADER_VALUE_FORBIDDEN = re.compile(r"[\r\n\0]")
+
+
+def check_header(name: str, value: str) -> None:
+    """Raise ValueError unless name: value can be sent as one header line."""
+    if not _HEADER_NAME.fullmatch(name):
+        raise ValueError(f"invalid header name (got {name!r})")
+    if _HEADER_VALUE_FORBIDDEN.search(value):
+        raise ValueError(
+            f"header {name} has CR, LF or NUL in its value (got {value!r})"
+        )
+
+
 def classify_status(status_code: Optional[int]) -> str:
     if status_code is None:
         return "other"
@@ -30,3 +47,19 @@ def classify_status(status_code: Optional[int]) -> str:
     if 500 <= status_code <= 599:
         return "5xx"
     return "other"
+
+
+def is_ok_status(status_code: int) -> bool:
+    """
+    Healthy response: any 2xx, or 304 Not Modified (the answer to a
+    conditional request whose cached copy is still current).
+    """
+    return 200 <= status_code <= 299 or status_code == 304
+
+
+def url_host(url: str) -> str:
+    """
+    Host key used for per-host scheduling: lower-cased netloc without userinfo
+    (e.g. "example.com:8080").
+    """
+    return urlparse(url).netloc.rpartition("@")[2].lower()
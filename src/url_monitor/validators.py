@@ -0,0 +1,151 @@
+# SPDX-License-Identifier: MIT
+"""Persistent ETag/Last-Modified cache for conditional requests."""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Mapping, Optional
+
+from .model import ConditionalStats
+
+CACHE_VERSION = 1
+
+
+class ValidatorCache:
+    """
+    Response validators per URL, kept between runs.
+
+    - `request_headers(url)` returns If-None-Match / If-Modified-Since for a
+      URL seen before (empty otherwise)
+    - `update(url, status, headers, body_bytes)` stores the ETag and
+      Last-Modified of a 2xx response together with its body size; a 304
+      counts as not modified and adds the remembered size to `bytes_saved`
+    - at most `max_entries` URLs are kept; the least recently used one is
+      evicted first
+    - `load`/`save` read and atomically write a small JSON file
+
+    Thread-safe: checks running in parallel share one cache.
+    """
+
+    def __init__(self, *, max_entries: int = 10_000) -> None:
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be >= 1 (got {max_entries})")
+        self.max_entries = max_entries
+        self.stats = ConditionalStats()
+        self._lock = threading.Lock()
+        # url -> (etag, last_modified, body_bytes)
+        self._entries: OrderedDict[str, tuple[Optional[str], Optional[str], int]] = (
+            OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def request_headers(self, url: str) -> dict[str, str]:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return {}
+            self._entries.move_to_end(url)
+            self.stats.conditional += 1
+        etag, last_modified, _size = entry
+        headers: dict[str, str] = {}
+        if etag is not None:
+            headers["If-None-Match"] = etag
+        if last_modified is not None:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def update(
+        self,
+        url: str,
+        status: int,
+        headers: Mapping[str, str],
+        body_bytes: Optional[int],
+    ) -> None:
+        """Record the response to a (possibly conditional) request for url."""
+        # Header lookups are by lower-case name (requests' headers are
+        # case-insensitive; the asyncio backend lower-cases them)
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        with self._lock:
+            if status == 304:
+                entry = self._entries.get(url)
+                if entry is None:
+                    return
+                self.stats.not_modified += 1
+                self.stats.bytes_saved += entry[2]
+                # A 304 may carry refreshed validators
+                self._put(url, etag or entry[0], last_modified or entry[1], entry[2])
+            elif 200 <= status <= 299 and (etag or last_modified):
+                if body_bytes is None:
+                    # Body not read in full: keep the size known from before
+                    old = self._entries.get(url)
+                    body_bytes = old[2] if old is not None else 0
+                self._put(url, etag, last_modified, body_bytes)
+            else:
+                self._entries.pop(url, None)
+
+    def _put(
+        self,
+        url: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        size: int,
+    ) -> None:
+        # Caller holds the lock
+        self._entries[url] = (etag, last_modified, size)
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    @classmethod
+    def load(cls, path: Path, *, max_entries: int = 10_000) -> ValidatorCache:
+        """Cache saved at path; empty if the file is missing or unreadable."""
+        cache = cls(max_entries=max_entries)
+        try:
+            data: Any = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return cache
+        if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+            return cache
+        try:
+            entries = [_entry(*item) for item in data.get("entries", [])]
+        except (ValueError, TypeError):
+            # Truncated or hand-edited: start over rather than fail the run
+            return cache
+        # Saved oldest first, so replaying keeps the LRU order
+        for entry in entries:
+            cache._put(*entry)
+        return cache
+
+    def save(self, path: Path) -> None:
+        with self._lock:
+            entries = [[url, *entry] for url, entry in self._entries.items()]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(
+            json.dumps({"version": CACHE_VERSION, "entries": entries}),
+            encoding="utf-8",
+        )
+        os.replace(tmp, path)
+
+
+def _entry(
+    url: Any, etag: Any, last_modified: Any, size: Any
+) -> tuple[str, Optional[str], Optional[str], int]:
+    # One saved entry, type-checked; TypeError if it is not what save() wrote
+    if not (
+        isinstance(url, str)
+        and all(v is None or isinstance(v, str) for v in (etag, last_modified))
+        and isinstance(size, int)
+        and not isinstance(size, bool)
+    ):
+        raise TypeError(
+            f"bad validator cache entry {[url, etag, last_modified, size]!r}"
+        )
+    return url, etag, last_modified, size
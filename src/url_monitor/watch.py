@@ -0,0 +1,243 @@
+# SPDX-License-Identifier: MIT
+"""Continuous monitoring: check URLs on a schedule and refresh outputs."""
+
+from __future__ import annotations
+
+import functools
+import heapq
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+
+from .adaptive import AdaptiveTimeouts
+from .dns import DnsCache, url_hostnames
+from .http import ThreadSessions, check_target
+from .metrics import MetricsRegistry
+from .model import CheckResult, ConnectionStats, Target, target_url
+from .outputs import save_outputs
+from .report import write_report_md
+from .stats import SummaryAccumulator
+
+
+class Watcher:
+    """
+    Long-running monitor over a fixed URL list.
+
+    - Every URL has its own schedule: it is first checked at a random offset
+      within `interval` and then every `interval` seconds, each time shifted
+      by up to +/- `jitter` * interval so checks do not synchronise.
+      Inventory entries (CheckSpec) may set their own interval, and their
+      own timeout, method, expected statuses and headers.
+    - A URL is never checked twice at once; an overrun check delays its next
+      run instead of piling up.
+    - One warm session (keep-alive pools per host) is shared by all checks,
+      optionally with a DnsCache (prefetched at start, refreshed per TTL).
+    - With `adaptive`, each URL's timeout follows its own recent latencies
+      (at most adaptive.timeout) and slow checks may be hedged.
+    - With `metrics`, every result is observed as it arrives (all time,
+      not only the window); serve it with a MetricsServer.
+    - Every `refresh` seconds report.md/results.json are rewritten from the
+      results of the last `window` seconds. Windows are trimmed by age and
+      capped per URL, so memory and per-refresh CPU stay flat over time.
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[Target],
+        *,
+        source: str,
+        out_dir: Path,
+        interval: float = 60.0,
+        jitter: float = 0.1,
+        window: float = 900.0,
+        refresh: float = 60.0,
+        timeout: float = 5.0,
+        concurrency: int = 4,
+        pool_size: int = 10,
+        invalids: Optional[list[str]] = None,
+        dns_cache: Optional[DnsCache] = None,
+        adaptive: Optional[AdaptiveTimeouts] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        if interval <= 0 or window <= 0 or refresh <= 0:
+            raise ValueError("interval, window and refresh must be > 0")
+        if not 0.0 <= jitter < 1.0:
+            raise ValueError(f"jitter must be in [0, 1) (got {jitter})")
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be >= 1 (got {concurrency})")
+
+        self.urls = list(urls)
+        self.source = source
+        self.out_dir = out_dir
+        self.interval = interval
+        self.jitter = jitter
+        self.window = window
+        self.refresh = refresh
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.pool_size = pool_size
+        self.invalids = invalids or []
+        self.dns_cache = dns_cache
+        self.adaptive = adaptive
+        self.metrics = metrics
+        self.clock = clock
+        self.rng = rng or random.Random()
+
+        self._intervals = [
+            interval if isinstance(u, str) or u.interval is None else u.interval
+            for u in self.urls
+        ]
+        self._windows: list[deque[tuple[float, CheckResult]]] = [
+            deque(maxlen=int(window / (every * (1.0 - jitter))) + 2)
+            for every in self._intervals
+        ]
+        self.refreshes = 0
+
+    def _next_due(self, i: int, due: float, now: float) -> float:
+        every = self._intervals[i]
+        offset = every * (1.0 + self.jitter * self.rng.uniform(-1.0, 1.0))
+        # Keep the phase when on time; restart from now after an overrun
+        return max(due, now) + offset
+
+    def window_results(self, now: float) -> list[CheckResult]:
+        """Results of the last `window` seconds, oldest URLs first."""
+        cutoff = now - self.window
+        out: list[CheckResult] = []
+        for w in self._windows:
+            while w and w[0][0] < cutoff:
+                w.popleft()
+            out.extend(r for _t, r in w)
+        return out
+
+    def write_outputs(
+        self, now: float, connections: Optional[ConnectionStats] = None
+    ) -> None:
+        results = self.window_results(now)
+        acc = SummaryAccumulator()
+        acc.extend(results)
+        summary = acc.summary(
+            connections=connections,
+            dns=self.dns_cache.stats if self.dns_cache is not None else None,
+            adaptive=self.adaptive.stats if self.adaptive is not None else None,
+        )
+        summary["window_s"] = self.window
+        save_outputs(
+            results=results,
+            summary=summary,
+            report_md=None,
+            source=self.source,
+            out_dir=self.out_dir,
+        )
+        with (self.out_dir / "report.md").open("w", encoding="utf-8") as f:
+            write_report_md(
+                f,
+                source=self.source,
+                summary=summary,
+                results=results,
+                invalids=self.invalids,
+            )
+        self.refreshes += 1
+
+    @staticmethod
+    def _check(sessions: ThreadSessions, url: Target, timeout: float) -> CheckResult:
+        # Runs on a worker (or hedge) thread, with that thread's session
+        return check_target(url, timeout=timeout, session=sessions.get())
+
+    def run(
+        self,
+        stop: Optional[threading.Event] = None,
+        *,
+        max_refreshes: Optional[int] = None,
+    ) -> None:
+        """Run until `stop` is set (or after `max_refreshes` output refreshes)."""
+        stop = stop or threading.Event()
+        if self.dns_cache is not None:
+            self.dns_cache.prefetch(url_hostnames(target_url(u) for u in self.urls))
+        now = self.clock()
+        schedule = [
+            (now + self.rng.uniform(0.0, every), i)
+            for i, every in enumerate(self._intervals)
+        ]
+        heapq.heapify(schedule)
+        next_refresh = now + self.refresh
+        in_flight: dict[Future[CheckResult], tuple[int, float]] = {}
+        hedges: Optional[ThreadPoolExecutor] = None
+        if self.adaptive is not None and self.adaptive.hedge:
+            hedges = ThreadPoolExecutor(
+                max_workers=3 * self.concurrency,
+                thread_name_prefix="url-monitor-hedge",
+            )
+
+        with (
+            ThreadSessions(
+                pool_size=self.pool_size, dns_cache=self.dns_cache
+            ) as sessions,
+            ThreadPoolExecutor(
+                max_workers=self.concurrency, thread_name_prefix="url-monitor-watch"
+            ) as pool,
+        ):
+            try:
+                while not stop.is_set():
+                    now = self.clock()
+
+                    while (
+                        schedule
+                        and schedule[0][0] <= now
+                        and len(in_flight) < self.concurrency
+                    ):
+                        due, i = heapq.heappop(schedule)
+                        if self.adaptive is None:
+                            f = pool.submit(
+                                self._check, sessions, self.urls[i], self.timeout
+                            )
+                        else:
+                            f = pool.submit(
+                                self.adaptive.call,
+                                functools.partial(self._check, sessions),
+                                self.urls[i],
+                                executor=hedges,
+                            )
+                        in_flight[f] = (i, due)
+
+                    if now >= next_refresh:
+                        self.write_outputs(now, connections=sessions.connection_stats())
+                        next_refresh += self.refresh
+                        if next_refresh <= now:
+                            next_refresh = now + self.refresh
+                        if max_refreshes is not None and (
+                            self.refreshes >= max_refreshes
+                        ):
+                            break
+
+                    wake = next_refresh
+                    if schedule and len(in_flight) < self.concurrency:
+                        wake = min(wake, schedule[0][0])
+                    sleep_s = max(wake - self.clock(), 0.0)
+
+                    if in_flight:
+                        finished, _ = wait(
+                            in_flight, timeout=sleep_s, return_when=FIRST_COMPLETED
+                        )
+                        done_at = self.clock()
+                        for f in finished:
+                            i, due = in_flight.pop(f)
+                            r = f.result()
+                            self._windows[i].append((done_at, r))
+                            if self.metrics is not None:
+                                self.metrics.observe(r)
+                            heapq.heappush(
+                                schedule, (self._next_due(i, due, done_at), i)
+                            )
+                    else:
+                        stop.wait(sleep_s)
+            finally:
+                for f in in_flight:
+                    f.cancel()
+                if hedges is not None:
+                    hedges.shutdown(wait=False, cancel_futures=True)
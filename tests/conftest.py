@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Stand-in HTTP server for socket-level tests (127.0.0.1 only).
+
+    Routes:
+      /ok, /status/<code>, /redirect (-> /ok), /redirect-to?url=URL,
+      /chunked, /slow?ms=N, /big?bytes=N,
+      /etag (304 when If-None-Match matches),
+      /drop (closes the connection without a response)
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def _send(self, code: int, body: bytes = b"", headers: dict | None = None):
+        self.send_response(code)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_HEAD(self) -> None:
+        self.do_GET()
+
+    def do_GET(self) -> None:
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        path = parts.path
+
+        if path == "/ok":
+            self._send(200, b"ok")
+        elif path.startswith("/status/"):
+            self._send(int(path.rsplit("/", 1)[1]), b"status")
+        elif path == "/redirect":
+            self._send(302, headers={"Location": "/ok"})
+        elif path == "/redirect-to":
+            self._send(302, headers={"Location": query["url"][0]})
+        elif path == "/chunked":
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for chunk in (b"hello ", b"chunked ", b"world"):
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+        elif path == "/slow":
+            time.sleep(int(query.get("ms", ["100"])[0]) / 1000.0)
+            self._send(200, b"slow")
+        elif path == "/big":
+            self._send(200, b"x" * int(query.get("bytes", ["1048576"])[0]))
+        elif path == "/no-head":
+            self._send(405 if self.command == "HEAD" else 200, b"no head")
+        elif path == "/etag":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.send_header("ETag", '"v1"')
+                self.end_headers()
+            else:
+                self._send(200, b"x" * 1000, headers={"ETag": '"v1"'})
+        elif path == "/drop":
+            self.close_connection = True
+        else:
+            self._send(404, b"not found")
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address) -> None:
+        # Clients in these tests time out or hang up on purpose
+        pass
+
+
+@pytest.fixture
+def local_server() -> Iterator[str]:
+    """Base URL (http://127.0.0.1:PORT) of a threaded stand-in HTTP server."""
+    server = _QuietServer(("127.0.0.1", 0), _Handler)
+    t = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    )
+    t.start()
+    try:
+        host, port = server.server_address[:2]
+        yield f"http://{host}:{port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+        t.join()
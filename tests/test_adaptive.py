@@ -0,0 +1,142 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from url_monitor.adaptive import AdaptiveTimeouts
+from url_monitor.cli import main
+from url_monitor.history import HistoryStore
+from url_monitor.model import CheckResult
+
+URL = "https://a.test/"
+
+
+def _ok(elapsed_ms: float, url: str = URL) -> CheckResult:
+    return CheckResult(url, True, 200, elapsed_ms, None)
+
+
+def test_timeouts_follow_recent_latencies_and_back_off():
+    adaptive = AdaptiveTimeouts(timeout=5.0, min_samples=5)
+    assert adaptive.timeout_for(URL) == 5.0  # nothing learned yet
+
+    adaptive.seed({URL: [400.0] * 5, "https://fast.test/": [10.0] * 5})
+    assert adaptive.timeout_for(URL) == pytest.approx(0.8)  # 2 x p99
+    assert adaptive.timeout_for("https://fast.test/") == 0.25  # min_timeout
+
+    adaptive.observe(CheckResult(URL, False, None, 800.0, "ReadTimeout: boom"))
+    assert adaptive.timeout_for(URL) == pytest.approx(1.6)
+    for _ in range(3):
+        adaptive.observe(CheckResult(URL, False, None, 1600.0, "ReadTimeout: boom"))
+    assert adaptive.timeout_for(URL) == 5.0  # capped at the global timeout
+
+    adaptive.observe(_ok(400.0))
+    assert adaptive.timeout_for(URL) == pytest.approx(0.8)
+
+
+def test_call_passes_learned_timeout():
+    adaptive = AdaptiveTimeouts(timeout=5.0)
+    adaptive.seed({URL: [400.0] * 5})
+    seen = []
+
+    def check(url, *, timeout, session):
+        seen.append((url, timeout, session))
+        return _ok(300.0, url)
+
+    adaptive.call(check, URL, session="s")
+
+    assert seen == [(URL, pytest.approx(0.8), "s")]
+    assert adaptive.stats.adapted == 1
+
+
+def test_hedged_call_returns_the_faster_attempt():
+    adaptive = AdaptiveTimeouts(timeout=5.0, adapt=False, hedge=True)
+    adaptive.seed({URL: [10.0] * 5})  # hedge after ~10 ms
+    release = threading.Event()
+    calls = []
+
+    def check(url, *, timeout):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            release.wait(2.0)
+            return _ok(2000.0, url)
+        return _ok(5.0, url)
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        r = adaptive.call(check, URL, executor=pool)
+        release.set()
+
+    assert r.elapsed_ms == 5.0
+    assert len(calls) == 2
+    assert adaptive.stats.as_dict() == {"adapted": 0, "hedged": 1, "hedge_wins": 1}
+
+
+@pytest.mark.enable_socket  # the event loop's self-pipe is a socketpair
+def test_async_hedge_cancels_the_slow_attempt():
+    adaptive = AdaptiveTimeouts(timeout=5.0, hedge=True)
+    adaptive.seed({URL: [10.0] * 5})
+    cancelled = []
+    calls = 0
+
+    async def check(url, *, timeout):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            try:
+                await asyncio.sleep(5.0)
+            except asyncio.CancelledError:
+                cancelled.append(url)
+                raise
+        return _ok(5.0, url)
+
+    r = asyncio.run(adaptive.acall(check, URL))
+
+    assert r.ok and calls == 2
+    assert cancelled == [URL]
+    assert adaptive.stats.hedge_wins == 1
+
+
+def test_no_hedge_without_enough_samples():
+    adaptive = AdaptiveTimeouts(timeout=5.0, hedge=True)
+    adaptive.seed({URL: [10.0] * 4})
+    assert adaptive.hedge_after(URL) is None
+
+
+def test_history_recent_latencies_seed_run_monitor(tmp_path, requests_mock):
+    from url_monitor.pipeline import run_monitor
+
+    db = tmp_path / "history.sqlite"
+    now = time.time()
+    with HistoryStore(db) as store:
+        for i in range(6):
+            store.record([_ok(100.0 + i)], ts=now - 600 + i)
+        store.record([CheckResult(URL, False, 500, 1.0, None)], ts=now - 1)
+        assert store.recent_latencies(since=now - 3600, per_url=3) == {
+            URL: [103.0, 104.0, 105.0]
+        }
+
+    p = tmp_path / "urls.txt"
+    p.write_text(URL + "\n", "utf-8")
+    requests_mock.get(URL, status_code=200)
+    adaptive = AdaptiveTimeouts(timeout=5.0)
+
+    _results, summary, report_md, _ = run_monitor(p, history=db, adaptive=adaptive)
+
+    assert summary["adaptive"]["adapted"] == 1
+    assert "## Adaptive timeouts" in report_md
+    assert "- Checks with a learned timeout: **1**" in report_md
+
+
+def test_cli_adaptive_timeout_accepts_short_timeouts(tmp_path, requests_mock, capsys):
+    requests_mock.get(URL, status_code=200)
+    input_path = tmp_path / "urls.txt"
+    input_path.write_text(URL + "\n", encoding="utf-8")
+    args = ["--input", str(input_path), "--out", str(tmp_path / "report.md")]
+
+    assert main([*args, "--timeout", "0.1", "--adaptive-timeout"]) == 0
+
+    with pytest.raises(SystemExit) as excinfo:
+        main([*args, "--timeout", "0", "--hedge"])
+    assert excinfo.value.code == 2
+    assert "min_timeout must be in (0, timeout]" in capsys.readouterr().err
@@ -0,0 +1,243 @@
+import asyncio
+import socket
+
+import pytest
+
+from url_monitor.async_http import ConnectionPool, check_url_async, check_urls_async
+from url_monitor.model import ConnectionStats
+from url_monitor.runner import check_urls
+
+pytestmark = pytest.mark.enable_socket
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_check_url_async_statuses(local_server):
+    async def _main():
+        return await asyncio.gather(
+            check_url_async(f"{local_server}/ok", timeout=2.0),
+            check_url_async(f"{local_server}/status/404", timeout=2.0),
+            check_url_async(f"{local_server}/redirect", timeout=2.0),
+            check_url_async(f"{local_server}/chunked", timeout=2.0),
+        )
+
+    ok, missing, redirected, chunked = asyncio.run(_main())
+
+    assert (ok.ok, ok.status_code, ok.error) == (True, 200, None)
+    assert (missing.ok, missing.status_code, missing.error) == (False, 404, None)
+    assert redirected.status_code == 200
+    assert chunked.status_code == 200
+    assert ok.elapsed_ms is not None and ok.elapsed_ms >= 0
+
+
+def test_check_url_async_exceptions(local_server):
+    refused = asyncio.run(
+        check_url_async(f"http://127.0.0.1:{_free_port()}/", timeout=1.0)
+    )
+    assert refused.ok is False
+    assert refused.status_code is None
+    assert refused.error is not None
+
+    timed_out = asyncio.run(
+        check_url_async(f"{local_server}/slow?ms=500", timeout=0.05)
+    )
+    assert timed_out.ok is False
+    assert timed_out.error is not None
+    assert timed_out.error.startswith("TimeoutError")
+
+
+def test_check_urls_async_keeps_order_with_small_cap(local_server):
+    urls = [
+        f"{local_server}/slow?ms={(7 * i) % 40}" if i % 4 else f"{local_server}/x{i}"
+        for i in range(30)
+    ]
+
+    results = asyncio.run(check_urls_async(urls, timeout=2.0, concurrency=3))
+
+    assert [r.url for r in results] == urls
+    assert [r.status_code for r in results] == [
+        200 if i % 4 else 404 for i in range(30)
+    ]
+
+
+def test_asyncio_backend_matches_threads_backend(local_server):
+    urls = [
+        f"{local_server}/ok",
+        f"{local_server}/status/503",
+        f"{local_server}/redirect",
+        f"{local_server}/drop",
+    ]
+
+    threads = check_urls(urls, timeout=2.0, concurrency=2, backend="threads")
+    aio = check_urls(urls, timeout=2.0, concurrency=2, backend="asyncio")
+
+    def _shape(r):
+        return (r.url, r.ok, r.status_code, r.error is None)
+
+    assert [_shape(r) for r in aio] == [_shape(r) for r in threads]
+
+
+@pytest.mark.parametrize("backend", ["threads", "asyncio"])
+def test_phase_timings_new_vs_reused_connection(local_server, backend):
+    urls = [f"{local_server}/slow?ms=30", f"{local_server}/ok"]
+
+    first, second = check_urls(urls, timeout=2.0, backend=backend)
+
+    assert first.phases is not None and second.phases is not None
+    assert first.phases.connect_ms is not None and first.phases.connect_ms > 0
+    assert first.phases.tls_ms == 0.0
+    assert first.phases.ttfb_ms is not None and first.phases.ttfb_ms >= 25.0
+    assert first.phases.body_ms is not None
+    # The second check reuses the keep-alive connection
+    assert (second.phases.dns_ms, second.phases.connect_ms) == (0.0, 0.0)
+    phase_total = sum(
+        x
+        for x in (
+            first.phases.dns_ms,
+            first.phases.connect_ms,
+            first.phases.ttfb_ms,
+            first.phases.body_ms,
+        )
+    )
+    assert phase_total <= first.elapsed_ms
+
+
+@pytest.mark.parametrize("backend", ["threads", "asyncio"])
+def test_phase_timings_stop_at_failed_phase(backend):
+    (r,) = check_urls([f"http://127.0.0.1:{_free_port()}/"], backend=backend)
+
+    assert r.ok is False
+    assert r.phases is not None
+    assert r.phases.dns_ms is not None and r.phases.connect_ms is not None
+    assert (r.phases.tls_ms, r.phases.ttfb_ms, r.phases.body_ms) == (None,) * 3
+
+
+@pytest.mark.parametrize("backend", ["threads", "asyncio"])
+def test_check_methods_and_body_cap(local_server, backend):
+    def check(path, **kwargs):
+        (r,) = check_urls([f"{local_server}{path}"], backend=backend, **kwargs)
+        assert r.error is None
+        return r.status_code, r.bytes_received
+
+    assert check("/big?bytes=300000") == (200, 300000)
+    assert check("/big?bytes=300000", max_bytes=1000) == (200, 1000)
+    assert check("/chunked", max_bytes=1000) == (200, len("hello chunked world"))
+    assert check("/big?bytes=300000", method="get-headers-only") == (200, 0)
+    assert check("/redirect", method="head") == (200, 0)
+    # HEAD rejected with 405: falls back to a headers-only GET
+    assert check("/no-head", method="head") == (200, 0)
+    assert check("/no-head") == (200, len("no head"))
+
+
+@pytest.mark.parametrize("backend", ["threads", "asyncio"])
+def test_body_cap_keeps_connection_only_when_body_fully_read(local_server, backend):
+    connections = ConnectionStats()
+    urls = [f"{local_server}/big?bytes=10", f"{local_server}/ok"]
+    check_urls(urls, backend=backend, max_bytes=100, connections=connections)
+    assert connections.reused == 1
+
+    results = check_urls(
+        [f"{local_server}/big?bytes=100000", f"{local_server}/ok"],
+        backend=backend,
+        max_bytes=100,
+    )
+    assert [r.status_code for r in results] == [200, 200]
+    assert results[1].phases is not None and results[1].phases.connect_ms > 0
+
+
+def test_pool_keeps_idle_connections_for_at_most_max_hosts():
+    async def _handle(reader, writer):
+        while await reader.readline():
+            while (await reader.readline()) not in (b"\r\n", b""):
+                pass
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+            await writer.drain()
+        writer.close()
+
+    async def _main():
+        servers = [
+            await asyncio.start_server(_handle, "127.0.0.1", 0) for _ in range(8)
+        ]
+        ports = [srv.sockets[0].getsockname()[1] for srv in servers]
+        pool = ConnectionPool(pool_size=2, max_hosts=3)
+        idle = []
+        try:
+            for port in ports:
+                r = await check_url_async(f"http://127.0.0.1:{port}/", pool=pool)
+                assert r.status_code == 200
+                idle.append(pool.idle_count())
+            # The most recently used hosts are still pooled
+            again = await check_url_async(f"http://127.0.0.1:{ports[-1]}/", pool=pool)
+            return idle, again, pool.stats
+        finally:
+            await pool.aclose()
+            for srv in servers:
+                srv.close()
+                await srv.wait_closed()
+
+    idle, again, stats = asyncio.run(_main())
+
+    assert idle == [1, 2, 3, 3, 3, 3, 3, 3]
+    assert again.ok is True
+    assert (stats.new, stats.reused) == (8, 1)
+
+
+def test_redirect_to_another_origin_drops_credentials(local_server):
+    seen = []
+
+    async def _record(reader, writer):
+        while line := await reader.readline():
+            path = line.split()[1].decode()
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b""):
+                name, _, value = line.decode().partition(":")
+                headers[name.strip().lower()] = value.strip()
+            seen.append((path, headers))
+            head = (
+                "HTTP/1.1 302 Found\r\nLocation: /end"
+                if path == "/hop"
+                else "HTTP/1.1 200 OK"
+            )
+            writer.write(f"{head}\r\nContent-Length: 0\r\n\r\n".encode())
+            await writer.drain()
+        writer.close()
+
+    headers = {"Authorization": "Bearer x", "Cookie": "s=1", "X-Probe": "1"}
+
+    async def _main():
+        srv = await asyncio.start_server(_record, "127.0.0.1", 0)
+        other = f"http://127.0.0.1:{srv.sockets[0].getsockname()[1]}"
+        try:
+            same = await check_url_async(f"{other}/hop", headers=headers)
+            cross = await check_url_async(
+                f"{local_server}/redirect-to?url={other}/end", headers=headers
+            )
+            return same, cross
+        finally:
+            srv.close()
+            await srv.wait_closed()
+
+    same, cross = asyncio.run(_main())
+
+    assert same.status_code == cross.status_code == 200
+    (hop, hop_headers), (end, end_headers), (cross_end, cross_headers) = seen
+    assert (hop, end, cross_end) == ("/hop", "/end", "/end")
+    # Same origin: every hop gets the entry's headers
+    assert hop_headers["authorization"] == end_headers["authorization"] == "Bearer x"
+    assert end_headers["cookie"] == "s=1"
+    # Another port: credentials are dropped, other headers kept
+    assert "authorization" not in cross_headers and "cookie" not in cross_headers
+    assert cross_headers["x-probe"] == "1"
+
+
+def test_header_that_would_split_the_request_is_not_sent(local_server):
+    result = asyncio.run(
+        check_url_async(f"{local_server}/ok", headers={"X": "a\r\nEvil: b"})
+    )
+
+    assert (result.ok, result.status_code) == (False, None)
+    assert result.error.startswith("ValueError: header X has CR, LF or NUL")
@@ -0,0 +1,43 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+
+from bench import run_case  # noqa: E402
+from compare import compare  # noqa: E402
+from farm import ServerFarm, make_urls, parse_mix  # noqa: E402
+
+
+@pytest.mark.enable_socket
+def test_bench_case_against_farm(tmp_path):
+    mix = parse_mix("ok=2,delay=1,error=1,drop=1")
+    with ServerFarm(servers=2) as farm:
+        urls = make_urls(farm.base_urls, 40, mix=mix, delay_ms=(5, 10))
+        urls_path = tmp_path / "urls.txt"
+        urls_path.write_text("".join(f"{u}\n" for u, _b, _d in urls))
+        case = run_case(
+            urls_path,
+            {u: d for u, _b, d in urls},
+            backend="threads",
+            concurrency=8,
+            processes=1,
+            timeout=2.0,
+            percentiles="exact",
+        )
+
+    behaviors = [b for _u, b, _d in urls]
+    assert case["urls"] == 40
+    assert case["ok"] == behaviors.count("ok") + behaviors.count("delay")
+    assert case["checks_per_s"] > 0 and case["peak_rss_mb"] > 0
+    assert 0 <= case["overhead_ms"]["p50"] <= case["overhead_ms"]["p99"]
+    json.dumps(case)
+
+    slower = dict(case, checks_per_s=case["checks_per_s"] * 0.5)
+    _lines, regressions = compare(
+        {"cases": [case]}, {"cases": [slower]}, threshold=10.0
+    )
+    assert len(regressions) == 1 and "checks/s" in regressions[0]
+    assert compare({"cases": [case]}, {"cases": [case]}, threshold=10.0)[1] == []
@@ -0,0 +1,174 @@
+import socket
+
+import pytest
+import requests
+
+from url_monitor.breaker import SKIPPED_ERROR, CircuitBreaker
+from url_monitor.model import CheckResult
+from url_monitor.report import render_report_md
+from url_monitor.runner import check_urls
+from url_monitor.stats import summarize
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _refused(url="https://dead.test/"):
+    return CheckResult(url, False, None, 1.0, "ConnectionError: refused")
+
+
+def test_circuit_opens_probes_and_closes():
+    clock = FakeClock()
+    breaker = CircuitBreaker(threshold=2, reset_after=10.0, clock=clock)
+    host = "dead.test"
+
+    breaker.record(host, _refused())
+    assert breaker.allow(host)
+    breaker.record(host, _refused())
+    assert not breaker.allow(host)
+
+    clock.now = 10.0
+    probe = breaker.allow(host)  # the half-open probe
+    assert probe
+    assert not breaker.allow(host)  # only one at a time
+    breaker.record(host, _refused(), probe)
+    assert not breaker.allow(host)  # re-opened for another 10 s
+
+    clock.now = 20.0
+    probe = breaker.allow(host)
+    assert probe
+    breaker.record(
+        host, CheckResult("https://dead.test/", False, 503, 1.0, None), probe
+    )
+    assert breaker.allow(host) and breaker.allow(host)
+    assert breaker.stats.as_dict() == {"opened": 1, "probes": 2}
+
+
+def test_only_the_probes_own_result_ends_half_open():
+    clock = FakeClock()
+    breaker = CircuitBreaker(threshold=1, reset_after=10.0, clock=clock)
+    host = "dead.test"
+
+    early = breaker.allow(host)  # dispatched before the circuit opened
+    breaker.record(host, _refused(), breaker.allow(host))
+    clock.now = 10.0
+    probe = breaker.allow(host)
+    assert probe and probe != early
+
+    # A late failure of the earlier check leaves the probe in flight
+    breaker.record(host, _refused(), early)
+    assert not breaker.allow(host)
+    assert breaker.stats.probes == 1
+
+    breaker.record(host, _refused(), probe)
+    assert not breaker.allow(host)  # re-opened by the probe
+    clock.now = 20.0
+    assert breaker.allow(host)
+    assert breaker.stats.as_dict() == {"opened": 1, "probes": 2}
+
+
+def test_http_errors_do_not_open_the_circuit():
+    breaker = CircuitBreaker(threshold=1)
+    breaker.record("a.test", CheckResult("https://a.test/", False, 500, 1.0, None))
+    breaker.record(
+        "a.test",
+        CheckResult("https://a.test/", False, None, 1.0, "ChunkedEncodingError: x"),
+    )
+    assert breaker.allow("a.test")
+    assert not breaker.is_open("a.test")
+
+
+@pytest.mark.parametrize(
+    ("error", "connect_failure"),
+    [
+        (
+            "ConnectTimeout: HTTPSConnectionPool(host='a.test', port=443): Max "
+            "retries exceeded with url: / (Caused by ConnectTimeoutError(...))",
+            True,
+        ),
+        ("ConnectTimeout: timed out after 1.0 s", True),  # asyncio
+        (
+            "ReadTimeout: HTTPSConnectionPool(host='a.test', port=443): "
+            "Read timed out. (read timeout=1.0)",
+            False,
+        ),
+        ("TimeoutError: timed out after 1.0 s", False),  # asyncio
+    ],
+)
+def test_only_connect_timeouts_open_the_circuit(error, connect_failure):
+    breaker = CircuitBreaker(threshold=1)
+    breaker.record("a.test", CheckResult("https://a.test/", False, None, 1.0, error))
+
+    assert breaker.is_open("a.test") is connect_failure
+
+
+def test_dead_host_is_skipped_and_counted_separately(requests_mock):
+    dead = [f"https://dead.test/{i}" for i in range(10)]
+    for u in dead:
+        requests_mock.get(u, exc=requests.exceptions.ConnectionError("refused"))
+    requests_mock.get("https://up.test/", status_code=200)
+    breaker = CircuitBreaker(threshold=3)
+
+    results = check_urls(dead + ["https://up.test/"], breaker=breaker)
+
+    assert [r.skipped for r in results] == [False] * 3 + [True] * 7 + [False]
+    assert results[5].error == SKIPPED_ERROR
+    assert results[5].elapsed_ms is None
+    assert results[-1].ok
+    assert requests_mock.call_count == 4
+
+    summary = summarize(results)
+    assert (summary["exceptions"], summary["skipped"], summary["fail"]) == (3, 7, 10)
+    summary["circuit_breaker"] = breaker.stats.as_dict()
+    report_md = render_report_md(source="x", summary=summary, results=results)
+    assert "  - Skipped (circuit open): **7**" in report_md
+    assert "| `dead.test` | 7 |" in report_md
+    assert f"`https://dead.test/5`: **{SKIPPED_ERROR}**" not in report_md
+
+
+@pytest.mark.enable_socket
+@pytest.mark.parametrize("backend", ["threads", "asyncio"])
+def test_breaker_sheds_refused_host(local_server, backend):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        closed_port = s.getsockname()[1]
+    urls = [f"http://127.0.0.1:{closed_port}/{i}" for i in range(6)]
+    urls.append(f"{local_server}/ok")
+
+    results = check_urls(
+        urls,
+        timeout=2.0,
+        concurrency=2,
+        backend=backend,
+        breaker=CircuitBreaker(threshold=2),
+    )
+
+    skipped = [r.skipped for r in results[:-1]]
+    assert sum(skipped) >= 3
+    assert not any(r.ok for r in results[:-1])
+    assert results[-1].ok and not results[-1].skipped
+
+
+@pytest.mark.enable_socket
+@pytest.mark.parametrize("backend", ["threads", "asyncio"])
+def test_slow_host_is_not_shed(backend):
+    # Connections are accepted (by the listen backlog) but never answered
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        s.listen(16)
+        port = s.getsockname()[1]
+        urls = [f"http://127.0.0.1:{port}/{i}" for i in range(3)]
+
+        results = check_urls(
+            urls,
+            timeout=0.2,
+            backend=backend,
+            breaker=CircuitBreaker(threshold=1),
+        )
+
+    assert not any(r.ok or r.skipped for r in results)
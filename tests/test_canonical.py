@@ -0,0 +1,100 @@
+import gc
+
+import pytest
+
+from url_monitor.canonical import UrlIndex, canonical_url
+from url_monitor.model import CheckResult
+from url_monitor.pipeline import run_monitor
+
+
+@pytest.mark.parametrize(
+    ("url", "expected"),
+    [
+        ("HTTPS://Example.COM", "https://example.com/"),
+        ("https://example.com:443/a/", "https://example.com/a/"),
+        ("https://example.com/api", "https://example.com/api"),
+        ("http://example.com:80/a#top", "http://example.com/a"),
+        ("http://example.com:8080/", "http://example.com:8080/"),
+        ("https://example.com:80/", "https://example.com:80/"),
+        (
+            "https://User@Example.com/Path?B=1&a=2",
+            "https://User@example.com/Path?B=1&a=2",
+        ),
+        ("http://[::1]:80/x//", "http://[::1]/x//"),
+    ],
+)
+def test_canonical_url(url, expected):
+    assert canonical_url(url) == expected
+
+
+def test_index_fans_results_out_in_input_order():
+    urls = [
+        "https://a.test/x",
+        "https://A.test/x",
+        "https://b.test/",
+        "https://a.test:443/x#frag",
+        "https://b.test",
+        "https://c.test/",
+        "https://a.test/x/",  # may be another endpoint: checked on its own
+    ]
+    index = UrlIndex()
+
+    unique = list(index.unique(urls))
+    assert unique == [
+        "https://a.test/x",
+        "https://b.test/",
+        "https://c.test/",
+        "https://a.test/x/",
+    ]
+
+    results = [CheckResult(u, True, 200, 1.0, None) for u in unique]
+    fanned = list(index.fan_out(results))
+    assert [r.url for r in fanned] == urls
+    assert fanned[3] == CheckResult(urls[3], True, 200, 1.0, None)
+    assert index.stats.as_dict() == {"urls": 7, "unique": 4, "aliases": 3}
+
+
+def test_fan_out_does_not_hold_result_objects():
+    urls = [f"https://h{i}.test/" for i in range(2000)] + ["https://H0.test"]
+    index = UrlIndex()
+    live = []
+
+    def check(unique):
+        for i, u in enumerate(unique):
+            if i == 1500:
+                gc.collect()
+                live.append(sum(isinstance(o, CheckResult) for o in gc.get_objects()))
+            yield CheckResult(u, True, 200, float(i), None)
+
+    last = None
+    for last in index.fan_out(check(index.unique(iter(urls)))):
+        pass
+
+    assert live[0] < 10
+    assert last == CheckResult("https://H0.test", True, 200, 0.0, None)
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_run_monitor_dedupe_checks_each_endpoint_once(tmp_path, requests_mock, stream):
+    requests_mock.get("https://a.test/", status_code=200)
+    requests_mock.get("https://b.test/p", status_code=503)
+    lines = [
+        "https://a.test/",
+        "https://A.TEST",
+        "https://b.test/p",
+        "https://b.test:443/p",
+        "https://a.test/#x",
+    ]
+    input_path = tmp_path / "urls.txt"
+    input_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    results, summary, report_md, _invalids = run_monitor(
+        input_path, concurrency=2, stream=stream, dedupe=True
+    )
+
+    assert requests_mock.call_count == 2
+    assert [r.url for r in results] == lines
+    assert [r.status_code for r in results] == [200, 200, 503, 503, 200]
+    assert summary["total"] == 5 and summary["http_failures"] == 2
+    assert summary["dedup"] == {"urls": 5, "unique": 2, "aliases": 3}
+    assert "- Requests saved (aliases): **3**" in report_md
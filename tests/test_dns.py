@@ -0,0 +1,142 @@
+import socket
+import threading
+
+import pytest
+
+from url_monitor.dns import DnsCache, url_hostnames
+from url_monitor.pipeline import run_monitor
+from url_monitor.runner import check_urls
+
+
+class FakeResolver:
+    def __init__(self, answers, *, delay=None):
+        self.answers = answers
+        self.calls = []
+        self.delay = delay
+
+    def __call__(self, host):
+        self.calls.append(host)
+        if self.delay is not None:
+            self.delay.wait(1.0)
+        answer = self.answers[host]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_dns_cache_ttl_and_negative_caching():
+    resolver = FakeResolver(
+        {
+            "a.test": [(socket.AF_INET, "10.0.0.1"), (socket.AF_INET6, "fd00::1")],
+            "nx.test": socket.gaierror(socket.EAI_NONAME, "Name or service not known"),
+        }
+    )
+    clock = FakeClock()
+    cache = DnsCache(ttl=60, negative_ttl=5, resolver=resolver, clock=clock)
+
+    assert cache.resolve("a.test") == ["10.0.0.1", "fd00::1"]
+    assert cache.resolve("A.test", socket.AF_INET) == ["10.0.0.1"]
+    with pytest.raises(socket.gaierror):
+        cache.resolve("nx.test")
+    with pytest.raises(socket.gaierror):
+        cache.resolve("nx.test")
+    assert resolver.calls == ["a.test", "nx.test"]
+
+    clock.now = 10.0  # negative entry expired, positive one still fresh
+    with pytest.raises(socket.gaierror):
+        cache.resolve("nx.test")
+    assert cache.resolve("a.test", socket.AF_INET6) == ["fd00::1"]
+    clock.now = 61.0
+    cache.resolve("a.test")
+
+    assert resolver.calls == ["a.test", "nx.test", "nx.test", "a.test"]
+    assert cache.stats.as_dict() == {
+        "hits": 2,
+        "misses": 4,
+        "negative_hits": 1,
+        "prefetched": 0,
+    }
+
+
+def test_dns_cache_single_lookup_for_concurrent_misses():
+    release = threading.Event()
+    resolver = FakeResolver({"a.test": [(socket.AF_INET, "10.0.0.1")]}, delay=release)
+    cache = DnsCache(resolver=resolver)
+    out = []
+
+    threads = [
+        threading.Thread(target=lambda: out.append(cache.resolve("a.test")))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert out == [["10.0.0.1"]] * 8
+    assert resolver.calls == ["a.test"]
+    assert (cache.stats.misses, cache.stats.hits) == (1, 7)
+
+
+def test_dns_cache_prefetch_and_lru_bound():
+    resolver = FakeResolver(
+        {f"h{i}.test": [(socket.AF_INET, f"10.0.0.{i}")] for i in range(5)}
+    )
+    cache = DnsCache(max_entries=3, resolver=resolver)
+    hosts = url_hostnames([f"https://H{i % 5}.test:8443/p{i}" for i in range(10)])
+
+    assert hosts == [f"h{i}.test" for i in range(5)]
+    cache.prefetch(hosts)
+
+    assert sorted(resolver.calls) == hosts
+    assert cache.stats.prefetched == 5
+    assert len(cache) == 3
+
+
+@pytest.mark.enable_socket
+@pytest.mark.parametrize("backend", ["threads", "asyncio"])
+def test_checks_resolve_through_shared_cache(local_server, backend):
+    port = local_server.rsplit(":", 1)[1]
+    resolver = FakeResolver({"monitor.test": [(socket.AF_INET, "127.0.0.1")]})
+    cache = DnsCache(resolver=resolver)
+    urls = [f"http://monitor.test:{port}/slow?ms=20" for _ in range(4)]
+
+    results = check_urls(
+        urls, timeout=2.0, concurrency=4, backend=backend, dns_cache=cache
+    )
+
+    assert [r.status_code for r in results] == [200] * 4
+    assert resolver.calls == ["monitor.test"]
+    assert cache.stats.misses == 1
+    assert cache.stats.hits == 3
+
+
+def test_run_monitor_prefetches_and_reports_dns(tmp_path, requests_mock):
+    p = tmp_path / "urls.txt"
+    p.write_text("https://a.test/1\nhttps://a.test/2\nhttps://b.test/\n", "utf-8")
+    requests_mock.get("https://a.test/1", status_code=200)
+    requests_mock.get("https://a.test/2", status_code=200)
+    requests_mock.get("https://b.test/", status_code=200)
+    resolver = FakeResolver(
+        {
+            "a.test": [(socket.AF_INET, "10.0.0.1")],
+            "b.test": [(socket.AF_INET, "10.0.0.2")],
+        }
+    )
+
+    _results, summary, report_md, _ = run_monitor(
+        p, dns_cache=DnsCache(resolver=resolver)
+    )
+
+    assert summary["dns"]["prefetched"] == 2
+    assert "## DNS cache" in report_md
+    assert "- Hosts prefetched: **2**" in report_md
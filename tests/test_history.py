@@ -0,0 +1,120 @@
+import random
+
+import pytest
+
+from url_monitor.history import HOUR_S, HistoryStore, compute_trends
+from url_monitor.model import CheckResult
+from url_monitor.pipeline import run_monitor
+from url_monitor.report import render_report_md
+from url_monitor.stats import summarize
+
+T0 = 1_700_000_000.0 - 1_700_000_000.0 % HOUR_S
+
+
+def _run(i: int) -> list[CheckResult]:
+    return [
+        CheckResult("https://a.test/x", True, 200, 10.0 + i, None),
+        CheckResult("https://a.test/y", True, 200, 20.0 + i, None),
+        CheckResult("https://b.test/", i % 2 == 0, 500 if i % 2 else 200, 5.0, None),
+    ]
+
+
+def test_history_percentile_and_hourly_error_rate(tmp_path):
+    db = tmp_path / "history.sqlite"
+    with HistoryStore(db) as store:
+        for i in range(4):
+            assert store.record(_run(i), ts=T0 + i * 1800) == 3
+
+    # Reopening keeps the data
+    with HistoryStore(db) as store:
+        assert store.hosts() == ["a.test", "b.test"]
+
+        # a.test samples: 10..13 and 20..23
+        assert store.latency_percentile(since=T0, host="A.test", permille=500) == 16.5
+        assert store.latency_percentile(
+            since=T0, url="https://a.test/x"
+        ) == pytest.approx(12.85)
+        assert store.latency_percentile(
+            since=T0 + HOUR_S, host="a.test"
+        ) == pytest.approx(22.85)
+        assert store.latency_percentile(since=T0, host="c.test") is None
+
+        assert store.error_rate_by_hour(since=T0, until=T0 + 2 * HOUR_S) == [
+            {"hour_start": T0, "total": 6, "failures": 1, "error_rate": 1 / 6},
+            {
+                "hour_start": T0 + HOUR_S,
+                "total": 6,
+                "failures": 1,
+                "error_rate": 1 / 6,
+            },
+        ]
+        assert store.error_rate_by_hour(since=T0, host="b.test")[0]["failures"] == 1
+
+
+def test_trends_render_in_report(tmp_path):
+    with HistoryStore(tmp_path / "h.sqlite") as store:
+        store.record(_run(1), ts=T0)
+        trends = compute_trends(store, now=T0 + 60)
+
+    assert trends["by_host"][0] == {
+        "host": "b.test",
+        "checks": 1,
+        "error_rate": 1.0,
+        "p95_ms": None,
+    }
+    summary = summarize(_run(1))
+    summary["trends"] = trends
+    md = render_report_md(source="urls.txt", summary=summary, results=_run(1))
+    assert "## Trends (last 24 h)" in md
+    assert "| `b.test` | 1 | 100.0% | n/a |" in md
+
+
+def test_trend_percentiles_come_from_the_hourly_rollup(tmp_path):
+    rng = random.Random(7)
+    with HistoryStore(tmp_path / "h.sqlite") as store:
+        store.record([CheckResult("https://gone.test/", True, 200, 1.0, None)], ts=0.0)
+        for i in range(6):
+            store.record(
+                [
+                    CheckResult(f"https://h{j % 3}.test/{j}", True, 200, x, None)
+                    for j, x in enumerate(rng.uniform(1, 900) for _ in range(300))
+                ]
+                + [CheckResult("https://h0.test/zero", True, 200, 0.0, None)],
+                ts=T0 + i * 1200,
+            )
+        now = T0 + 2 * HOUR_S
+        exact = store.latency_percentile(since=now - 24 * HOUR_S, until=now)
+        trends = compute_trends(store, now=now)
+        h1 = store.hourly_latency_percentile(
+            since=T0, until=now, host="h1.test", permille=500
+        )
+        h1_exact = store.latency_percentile(
+            since=T0, until=now, host="h1.test", permille=500
+        )
+
+    assert trends["p95_ms"] == pytest.approx(exact, rel=0.01)
+    assert h1 == pytest.approx(h1_exact, rel=0.01)
+    # Hosts without checks in the window are not looked at
+    assert sorted(h["host"] for h in trends["by_host"]) == [
+        "h0.test",
+        "h1.test",
+        "h2.test",
+    ]
+
+
+def test_run_monitor_appends_to_history(tmp_path, requests_mock):
+    urls = tmp_path / "urls.txt"
+    urls.write_text("https://a.test/\nhttps://b.test/\n", encoding="utf-8")
+    requests_mock.get("https://a.test/", status_code=200)
+    requests_mock.get("https://b.test/", status_code=503)
+    db = tmp_path / "history.sqlite"
+
+    run_monitor(urls, history=db)
+    _results, summary, report_md, _ = run_monitor(urls, history=db)
+
+    assert sum(h["total"] for h in summary["trends"]["hourly"]) == 4
+    assert {h["host"]: h["checks"] for h in summary["trends"]["by_host"]} == {
+        "a.test": 2,
+        "b.test": 2,
+    }
+    assert "## Trends" in report_md
@@ -1,5 +1,7 @@
+import pytest
 import requests
 
+from url_monitor.cli import main
 from url_monitor.http import check_url
 
 
@@ -37,3 +39,26 @@ def test_check_url_timeout(requests_mock):
     assert r.error is not None
     assert r.elapsed_ms is not None
     assert r.elapsed_ms >= 0
+
+
+def test_check_url_head_falls_back_to_get(requests_mock):
+    url = "https://example.test/no-head"
+    requests_mock.head(url, status_code=405)
+    requests_mock.get(url, status_code=200, content=b"x" * 50)
+
+    r = check_url(url, timeout=1.0, method="head")
+    assert r.ok is True
+    assert [h.method for h in requests_mock.request_history] == ["HEAD", "GET"]
+
+    full = check_url(url, timeout=1.0)
+    assert full.bytes_received == 50
+
+
+@pytest.mark.parametrize("method", ["head", "get-headers-only"])
+def test_cli_rejects_max_bytes_without_get(tmp_path, capsys, method):
+    urls = tmp_path / "urls.txt"
+    urls.write_text("https://a.test/\n", encoding="utf-8")
+
+    with pytest.raises(SystemExit):
+        main(["--input", str(urls), "--method", method, "--max-bytes", "100"])
+    assert "--max-bytes requires --method get" in capsys.readouterr().err
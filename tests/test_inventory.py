@@ -0,0 +1,221 @@
+import json
+
+import pytest
+
+from url_monitor import inventory
+from url_monitor.cli import main
+from url_monitor.inventory import compile_entry, iter_targets, load_targets
+from url_monitor.model import CheckSpec
+from url_monitor.pipeline import run_monitor
+from url_monitor.watch import Watcher
+
+ENTRIES = [
+    {
+        "url": "https://a.test/health",
+        "timeout": 2,
+        "expected_status": [200, 204],
+        "headers": {"Authorization": "Bearer x", "X-Probe": "1"},
+    },
+    {"url": "https://b.test/", "method": "head", "priority": 5, "interval": 30},
+]
+
+SPECS = [
+    CheckSpec(
+        url="https://a.test/health",
+        host="a.test",
+        timeout=2.0,
+        expected_status=frozenset({200, 204}),
+        headers={"Authorization": "Bearer x", "X-Probe": "1"},
+    ),
+    CheckSpec(
+        url="https://b.test/", host="b.test", method="head", priority=5, interval=30.0
+    ),
+]
+
+CSV = (
+    "url,timeout,method,expected_status,headers,priority,interval\n"
+    '"https://a.test/health",2,,"200, 204",'
+    '"{""Authorization"": ""Bearer x"", ""X-Probe"": ""1""}",,\n'
+    "https://b.test/,,head,,,5,30\n"
+)
+
+
+def _write(tmp_path, name, text):
+    p = tmp_path / name
+    p.write_text(text, encoding="utf-8")
+    return str(p)
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "json", "csv"])
+def test_formats_compile_to_the_same_specs(tmp_path, fmt):
+    text = {
+        "jsonl": "# inventory\n" + "\n".join(json.dumps(e) for e in ENTRIES) + "\n",
+        "json": json.dumps(ENTRIES, indent=2),
+        "csv": CSV,
+    }[fmt]
+    path = _write(tmp_path, f"inventory.{fmt}", text)
+
+    assert [t for t, _invalid in iter_targets(path)] == SPECS
+    # load_targets orders by priority, highest first
+    assert load_targets(path) == ([SPECS[1], SPECS[0]], [])
+
+
+def test_yaml_inventory(tmp_path):
+    pytest.importorskip("yaml")
+    path = _write(
+        tmp_path,
+        "inventory.yml",
+        "- url: https://a.test/health\n"
+        "  timeout: 2\n"
+        "  expected_status: [200, 204]\n"
+        "  headers: {Authorization: Bearer x, X-Probe: '1'}\n"
+        "- {url: https://b.test/, method: head, priority: 5, interval: 30}\n",
+    )
+
+    assert [t for t, _invalid in iter_targets(path)] == SPECS
+
+
+def test_csv_header_values_may_contain_semicolons(tmp_path):
+    path = _write(
+        tmp_path,
+        "inventory.csv",
+        "url,headers\n"
+        '"https://a.test/","{""Cookie"": ""a=1; b=2"", ""Accept"": ""text/html; q=0.9""}"\n'
+        "https://b.test/,Cookie: a=1\n",
+    )
+
+    targets, invalids = load_targets(path, strict=False)
+
+    assert [t.headers for t in targets] == [
+        {"Cookie": "a=1; b=2", "Accept": "text/html; q=0.9"}
+    ]
+    assert invalids[0].startswith("inventory.csv:3: headers must be a JSON object")
+
+
+def test_yaml_inventory_without_pyyaml_names_the_extra(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(inventory, "yaml", None)
+    path = _write(tmp_path, "inventory.yaml", "- https://a.test/\n")
+
+    with pytest.raises(SystemExit):
+        main(["--input", path])
+    assert "pip install 'url-monitor[yaml]'" in capsys.readouterr().err
+    with pytest.raises(ValueError, match=r"url-monitor\[yaml\]"):
+        load_targets(path)
+
+
+def test_plain_lists_still_yield_strings(tmp_path):
+    path = _write(tmp_path, "urls.txt", "https://a.test/\nhttps://b.test/\n")
+
+    assert load_targets(path) == (["https://a.test/", "https://b.test/"], [])
+
+
+@pytest.mark.parametrize(
+    ("entry", "message"),
+    [
+        ({"url": "ftp://a.test/"}, "Invalid URL"),
+        ({"url": "https://a.test/", "timeout": 0}, "timeout must be a number > 0"),
+        ({"url": "https://a.test/", "method": "post"}, "method must be one of"),
+        ({"url": "https://a.test/", "expected_status": [200, 700]}, "expected_status"),
+        ({"url": "https://a.test/", "headers": {"X": 1}}, "headers must map"),
+        ({"url": "https://a.test/", "headers": {"X Y": "1"}}, "invalid header name"),
+        ({"url": "https://a.test/", "priority": "high"}, "priority must be"),
+        ({"url": "https://a.test/", "retries": 3}, "unknown keys ['retries']"),
+        (["https://a.test/"], "entry must be a mapping"),
+    ],
+)
+def test_compile_entry_rejects_bad_settings(entry, message):
+    with pytest.raises(ValueError, match=message.replace("[", r"\[")):
+        compile_entry(entry)
+
+
+def test_header_values_cannot_inject_lines(tmp_path):
+    entry = {"url": "https://a.test/", "headers": {"X": "a\r\nEvil: b"}}
+    path = _write(tmp_path, "inventory.jsonl", json.dumps(entry) + "\n")
+
+    with pytest.raises(ValueError, match="header X has CR, LF or NUL"):
+        load_targets(path)
+
+
+def test_invalid_entries_are_reported_with_their_position(tmp_path):
+    path = _write(
+        tmp_path,
+        "inventory.jsonl",
+        '"https://a.test/"\n{"url": "https://b.test/", "timeout": -1}\n{oops\n',
+    )
+
+    targets, invalids = load_targets(path, strict=False)
+
+    assert targets == [CheckSpec(url="https://a.test/", host="a.test")]
+    assert invalids[0] == "inventory.jsonl:2: timeout must be a number > 0 (got -1)"
+    assert invalids[1].startswith("inventory.jsonl:3: invalid JSON")
+    with pytest.raises(ValueError, match="inventory.jsonl:2: timeout"):
+        load_targets(path, strict=True)
+
+
+def test_json_array_is_decoded_across_chunk_boundaries(tmp_path, monkeypatch):
+    monkeypatch.setattr(inventory, "_JSON_CHUNK", 7)
+    entries = [
+        {"url": f"https://a.test/{i}?q=[{i}]", "priority": 10 * i, "timeout": 1.5}
+        for i in range(20)
+    ]
+    path = _write(tmp_path, "inventory.json", " \n" + json.dumps(entries) + "\n")
+
+    specs = [t for t, _invalid in iter_targets(path)]
+
+    assert [s.url for s in specs] == [e["url"] for e in entries]
+    assert [s.priority for s in specs] == [e["priority"] for e in entries]
+
+    bad = _write(tmp_path, "bad.json", '[{"url": "https://a.test/"} {"url": 1}]')
+    with pytest.raises(ValueError, match="expected ',' or ']'"):
+        list(iter_targets(bad))
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_run_monitor_applies_per_entry_settings(tmp_path, requests_mock, stream):
+    requests_mock.get("https://a.test/maint", status_code=503)
+    requests_mock.get("https://a.test/auth", status_code=200)
+    requests_mock.head("https://b.test/", status_code=200)
+    requests_mock.get("https://c.test/", status_code=200)
+    path = _write(
+        tmp_path,
+        "inventory.jsonl",
+        "\n".join(
+            json.dumps(e)
+            for e in [
+                {"url": "https://a.test/maint", "expected_status": 503},
+                {"url": "https://a.test/auth", "headers": {"X-Token": "t"}},
+                {"url": "https://b.test/", "method": "head", "priority": 1},
+                "https://c.test/",
+            ]
+        ),
+    )
+
+    results, summary, _report, invalids = run_monitor(path, stream=stream)
+
+    assert invalids == []
+    assert all(r.ok for r in results)
+    assert summary["total"] == 4 and summary["ok"] == 4
+    history = requests_mock.request_history
+    auth = next(h for h in history if h.url == "https://a.test/auth")
+    assert auth.headers["X-Token"] == "t"
+    assert [h.method for h in history].count("HEAD") == 1
+    if not stream:
+        # the prioritized entry is checked first
+        assert history[0].url == "https://b.test/"
+
+
+def test_watcher_uses_per_entry_intervals(tmp_path):
+    urls = ["https://a.test/", CheckSpec(url="https://b.test/", host="b.test")]
+    urls.append(CheckSpec(url="https://c.test/", host="c.test", interval=5.0))
+
+    watcher = Watcher(urls, source="inv.jsonl", out_dir=tmp_path, interval=60.0)
+
+    assert watcher._intervals == [60.0, 60.0, 5.0]
+    assert watcher._windows[2].maxlen > watcher._windows[0].maxlen
+
+
+def test_cli_rejects_processes_with_structured_inventory(tmp_path):
+    path = _write(tmp_path, "inventory.jsonl", '"https://a.test/"\n')
+
+    with pytest.raises(SystemExit):
+        main(["--input", path, "--processes", "2"])
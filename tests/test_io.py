@@ -0,0 +1,49 @@
+import pytest
+
+from url_monitor.io import iter_urls, load_urls
+from url_monitor.pipeline import run_monitor
+
+
+def _write(tmp_path, text):
+    p = tmp_path / "urls.txt"
+    p.write_text(text, encoding="utf-8")
+    return p
+
+
+def test_iter_urls_is_lazy_and_keeps_strict_semantics(tmp_path):
+    p = _write(tmp_path, "# comment\nhttps://a.test\n\nnot-a-url\nhttps://b.test\n")
+
+    it = iter_urls(str(p), strict=True)
+    # The first URL is available before the invalid line is reached
+    assert next(it) == ("https://a.test", None)
+    with pytest.raises(ValueError, match=r"urls\.txt:4: Invalid URL: 'not-a-url'"):
+        next(it)
+
+
+def test_iter_urls_non_strict_yields_invalid_records(tmp_path):
+    p = _write(tmp_path, "https://a.test\nnot-a-url\n  https://b.test  \n")
+
+    assert list(iter_urls(str(p), strict=False)) == [
+        ("https://a.test", None),
+        (None, "urls.txt:2: Invalid URL: 'not-a-url'"),
+        ("https://b.test", None),
+    ]
+    assert load_urls(str(p), strict=False) == (
+        ["https://a.test", "https://b.test"],
+        ["urls.txt:2: Invalid URL: 'not-a-url'"],
+    )
+
+
+def test_run_monitor_stream_matches_buffered(tmp_path, requests_mock):
+    p = _write(tmp_path, "https://a.test\nbad\nhttps://b.test\n")
+    requests_mock.get("https://a.test", status_code=200)
+    requests_mock.get("https://b.test", status_code=500)
+
+    buffered = run_monitor(p, timeout=1.0, strict=False)
+    streamed = run_monitor(p, timeout=1.0, strict=False, stream=True, concurrency=2)
+
+    assert [(r.url, r.status_code) for r in streamed[0]] == [
+        (r.url, r.status_code) for r in buffered[0]
+    ]
+    assert streamed[3] == buffered[3] == ["urls.txt:2: Invalid URL: 'bad'"]
+    assert streamed[1]["total"] == buffered[1]["total"] == 2
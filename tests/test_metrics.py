@@ -0,0 +1,131 @@
+import re
+import urllib.request
+
+import pytest
+import requests
+
+from url_monitor.cli import main
+from url_monitor.metrics import MetricsRegistry, MetricsServer, write_textfile
+from url_monitor.model import CheckResult
+from url_monitor.pipeline import run_monitor
+
+
+def _samples(text):
+    """{'name{labels}': value} of the non-comment lines."""
+    out = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            key, _, value = line.rpartition(" ")
+            out[key] = float(value)
+    return out
+
+
+def test_histogram_buckets_are_cumulative():
+    m = MetricsRegistry(buckets=(0.01, 0.1, 1.0))
+    for ms in (5.0, 10.0, 50.0, 2000.0):
+        m.observe(CheckResult("https://a.test/x", True, 200, ms, None))
+    m.observe(CheckResult("https://a.test/x", False, None, None, "ConnectTimeout: x"))
+
+    s = _samples(m.render())
+    prefix = 'url_monitor_host_duration_seconds_bucket{host="a.test",le='
+    assert s[prefix + '"0.01"}'] == 2  # le is inclusive
+    assert s[prefix + '"0.1"}'] == 3
+    assert s[prefix + '"1"}'] == 3
+    assert s[prefix + '"+Inf"}'] == 4
+    assert s['url_monitor_host_duration_seconds_count{host="a.test"}'] == 4
+    assert s['url_monitor_host_duration_seconds_sum{host="a.test"}'] == pytest.approx(
+        2.065
+    )
+    url_labels = 'url="https://a.test/x",host="a.test"'
+    assert s[f"url_monitor_url_duration_seconds_count{{{url_labels}}}"] == 4
+    assert s['url_monitor_exceptions_total{host="a.test",type="ConnectTimeout"}'] == 1
+
+
+def test_counters_match_summary_status_classes(tmp_path, requests_mock):
+    urls = [f"https://m{i % 3}.test/{i}" for i in range(12)]
+    for i, u in enumerate(urls):
+        if i % 4 == 3:
+            requests_mock.get(u, exc=requests.exceptions.ConnectionError("down"))
+        else:
+            requests_mock.get(u, status_code=(200, 301, 503, 0)[i % 4])
+    input_path = tmp_path / "urls.txt"
+    input_path.write_text("\n".join(urls) + "\n", encoding="utf-8")
+    metrics = MetricsRegistry()
+
+    _results, summary, _report, _invalids = run_monitor(
+        input_path, concurrency=3, metrics=metrics
+    )
+
+    by_class = {k: 0 for k in summary["by_status_class"]}
+    exceptions = 0
+    for key, value in _samples(metrics.render()).items():
+        m = re.match(r'url_monitor_checks_total\{host=".*",status_class="(\w+)"\}', key)
+        if m:
+            by_class[m.group(1)] += int(value)
+        elif key.startswith("url_monitor_exceptions_total{"):
+            exceptions += int(value)
+    assert by_class == summary["by_status_class"]
+    assert exceptions == summary["exceptions"]
+
+
+def test_hosts_only_and_label_escaping():
+    m = MetricsRegistry(per_url=False)
+    m.preallocate(["https://b.test/a"])
+    m.observe(CheckResult('https://b.test/"q"', True, 200, 1.0, None))
+
+    text = m.render()
+    assert "url_monitor_url_duration_seconds" not in text
+    assert 'url_monitor_host_duration_seconds_count{host="b.test"} 1' in text
+
+    m = MetricsRegistry()
+    m.observe(CheckResult('https://b.test/"q"', True, 200, 1.0, None))
+    assert 'url="https://b.test/\\"q\\""' in m.render()
+
+
+def test_write_textfile_is_complete_and_atomic(tmp_path):
+    m = MetricsRegistry()
+    m.observe(CheckResult("https://a.test/", True, 200, 1.0, None))
+    path = tmp_path / "url_monitor.prom"
+
+    write_textfile(m, path, timestamp=1700000000.0)
+
+    text = path.read_text(encoding="utf-8")
+    assert text.endswith("url_monitor_last_run_timestamp_seconds 1700000000.0\n")
+    assert "# TYPE url_monitor_checks_total counter" in text
+    assert list(tmp_path.iterdir()) == [path]
+
+
+@pytest.mark.enable_socket
+def test_metrics_server_serves_metrics():
+    m = MetricsRegistry()
+    with MetricsServer(m, port=0) as server:
+        host, port = server.address
+        m.observe(CheckResult("https://a.test/", True, 200, 1.0, None))
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics") as resp:
+            assert resp.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            body = resp.read().decode("utf-8")
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"http://{host}:{port}/other")
+
+    assert 'url_monitor_checks_total{host="a.test",status_class="2xx"} 1' in body
+
+
+def test_cli_metrics_textfile(tmp_path, requests_mock):
+    requests_mock.get("https://a.test/", status_code=200)
+    input_path = tmp_path / "urls.txt"
+    input_path.write_text("https://a.test/\n", encoding="utf-8")
+    prom = tmp_path / "url_monitor.prom"
+
+    rc = main(
+        [
+            "--input",
+            str(input_path),
+            "--out",
+            str(tmp_path / "report.md"),
+            "--metrics-textfile",
+            str(prom),
+        ]
+    )
+
+    assert rc == 0
+    assert 'status_class="2xx"} 1' in prom.read_text(encoding="utf-8")
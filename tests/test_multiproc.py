@@ -0,0 +1,65 @@
+import zlib
+
+import pytest
+
+from url_monitor.io import partition_of
+from url_monitor.model import CheckResult
+from url_monitor.pipeline import run_monitor
+from url_monitor.store import ResultStore
+from url_monitor.validate import url_host
+
+
+def test_partition_follows_the_url_host():
+    urls = [
+        "https://Example.com/a",
+        "https://example.com?q=1",
+        "http://user:pw@example.com:8080/x#frag",
+        "https://b.test#top",
+        "https://b.test",
+    ]
+    for u in urls:
+        for n in (2, 3, 7):
+            assert partition_of(u, n) == zlib.crc32(url_host(u).encode()) % n
+
+
+@pytest.mark.enable_socket
+def test_processes_match_single_process_run(local_server, tmp_path):
+    port = local_server.rsplit(":", 1)[1]
+    urls = [
+        f"http://{host}:{port}/{path}"
+        for host in ("127.0.0.1", "localhost")
+        for path in ("ok", "status/503", "status/404", "redirect")
+    ]
+    input_path = tmp_path / "urls.txt"
+    input_path.write_text("\n".join([*urls, "ftp://bad"]) + "\n", encoding="utf-8")
+    seen: list[CheckResult] = []
+
+    results, summary, report_md, invalids = run_monitor(
+        input_path,
+        processes=2,
+        concurrency=2,
+        compact=True,
+        on_result=seen.append,
+    )
+    _results, single, _report_md, _invalids = run_monitor(input_path)
+
+    assert isinstance(results, ResultStore)
+    assert sorted(r.url for r in results) == sorted(urls)
+    assert list(results) == seen
+    for key in ("total", "ok", "http_failures", "by_status_class"):
+        assert summary[key] == single[key]
+    assert summary["processes"] == 2
+    assert summary["connections"]["new"] >= 2
+    assert len(invalids) == 1 and "ftp://bad" in invalids[0]
+    assert "ftp://bad" in report_md
+
+
+def test_processes_strict_raises_on_invalid_line(tmp_path):
+    input_path = tmp_path / "urls.txt"
+    input_path.write_text("ftp://bad\n", encoding="utf-8")
+
+    with pytest.raises(ValueError, match="Invalid URL"):
+        run_monitor(input_path, processes=2, strict=True)
+
+    with pytest.raises(ValueError, match="does not support"):
+        run_monitor(input_path, processes=2, validators=object())  # type: ignore[arg-type]
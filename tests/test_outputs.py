@@ -0,0 +1,99 @@
+import json
+from dataclasses import asdict
+
+import pytest
+
+from url_monitor.cli import main
+from url_monitor.model import CheckResult
+from url_monitor.outputs import JsonlSink, iter_jsonl, jsonl_to_json, save_outputs
+from url_monitor.stats import summarize
+
+RESULTS = [
+    CheckResult("https://a.test/ü", True, 200, 10.0, None),
+    CheckResult("https://b.test", False, 404, 20.5, None),
+    CheckResult("https://c.test", False, None, 5.0, "ConnectionError: x\ny"),
+]
+
+
+def test_save_outputs_matches_json_dumps(tmp_path):
+    summary = summarize(RESULTS)
+    save_outputs(
+        results=RESULTS,
+        summary=summary,
+        report_md="# r\n",
+        source="urls.txt",
+        out_dir=tmp_path,
+    )
+    expected = json.dumps(
+        {
+            "source": "urls.txt",
+            "summary": summary,
+            "results": [asdict(r) for r in RESULTS],
+        },
+        ensure_ascii=False,
+        indent=2,
+    )
+    assert (tmp_path / "results.json").read_text(encoding="utf-8") == expected
+
+
+@pytest.mark.parametrize("fsync", ["never", "batch", "always"])
+def test_jsonl_sink_roundtrips_to_results_json(tmp_path, fsync):
+    summary = summarize(RESULTS)
+    with JsonlSink(tmp_path / "results.jsonl", fsync=fsync, batch_size=2) as sink:
+        for r in RESULTS:
+            sink.write(r)
+        sink.write_summary(summary, source="urls.txt")
+
+    records = list(iter_jsonl(tmp_path / "results.jsonl"))
+    assert [r["type"] for r in records] == ["result"] * 3 + ["summary"]
+
+    jsonl_to_json(tmp_path / "results.jsonl", tmp_path / "from_jsonl.json")
+    save_outputs(
+        results=RESULTS,
+        summary=summary,
+        report_md="",
+        source="urls.txt",
+        out_dir=tmp_path,
+    )
+    assert (tmp_path / "from_jsonl.json").read_text(encoding="utf-8") == (
+        tmp_path / "results.json"
+    ).read_text(encoding="utf-8")
+
+
+def test_iter_jsonl_skips_torn_last_line(tmp_path):
+    path = tmp_path / "results.jsonl"
+    sink = JsonlSink(path, fsync="always")
+    sink.write(RESULTS[0])
+    sink.close()
+    with path.open("a", encoding="utf-8") as f:
+        f.write('{"type": "result", "url": "https://tor')
+
+    assert [r["url"] for r in iter_jsonl(path)] == ["https://a.test/ü"]
+
+
+def test_cli_jsonl_writes_incrementally(tmp_path, requests_mock, capsys):
+    urls = tmp_path / "urls.txt"
+    urls.write_text("https://a.test\nhttps://b.test\n", encoding="utf-8")
+    requests_mock.get("https://a.test", status_code=200)
+    requests_mock.get("https://b.test", status_code=500)
+    out_dir = tmp_path / "out"
+
+    rc = main(
+        [
+            "--input",
+            str(urls),
+            "--out-dir",
+            str(out_dir),
+            "--jsonl",
+            "--pretty-json",
+        ]
+    )
+
+    assert rc == 0
+    records = list(iter_jsonl(out_dir / "results.jsonl"))
+    assert [r.get("url") for r in records[:2]] == ["https://a.test", "https://b.test"]
+    assert records[-1]["summary"]["total"] == 2
+    payload = json.loads((out_dir / "results.json").read_text(encoding="utf-8"))
+    assert len(payload["results"]) == 2
+    assert (out_dir / "report.md").exists()
+    capsys.readouterr()
@@ -0,0 +1,96 @@
+import json
+import pstats
+
+import pytest
+
+from url_monitor.cli import main
+from url_monitor.model import CheckResult
+from url_monitor.pipeline import run_monitor
+from url_monitor.profiling import Profiler, render_profile
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_profiler_stages_and_dispatcher_hooks():
+    clock = FakeClock()
+    prof = Profiler(sample_interval=1e-6, max_samples=4, clock=clock)
+
+    with prof.stage("load"):
+        clock.now += 3_000_000
+    prof.queued(0)
+    clock.now += 1_000_000
+    prof.started(0)
+    clock.now += 5_000_000
+    prof.finished(0, CheckResult("https://a.test/", True, 200, 4.0, None))
+    for n in range(6):
+        clock.now += 1_000
+        prof.sample(queued=n, in_flight=1)
+
+    data = prof.as_dict()
+    assert data["wall_ms"] == pytest.approx(9.006)
+    assert data["stages"]["load"] == {"total_ms": 3.0, "calls": 1, "avg_ms": 3.0}
+    assert data["stages"]["schedule_wait"]["total_ms"] == 1.0
+    assert data["stages"]["check"]["total_ms"] == 5.0
+    assert data["stages"]["network"]["total_ms"] == 4.0
+    assert len(data["queue"]["samples"]) < 4  # decimated
+    assert data["queue"]["max_in_flight"] == 1
+    assert "check - network (url-monitor inside checks): 1.0 ms" in render_profile(data)
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_run_monitor_records_every_stage(tmp_path, requests_mock, stream):
+    urls = [f"https://p{i % 3}.test/{i}" for i in range(12)]
+    for u in urls:
+        requests_mock.get(u, status_code=200)
+    input_path = tmp_path / "urls.txt"
+    input_path.write_text("\n".join(urls) + "\n", encoding="utf-8")
+    prof = Profiler()
+
+    run_monitor(input_path, concurrency=3, stream=stream, profiler=prof)
+
+    stages = prof.as_dict()["stages"]
+    assert list(stages) == [
+        "load",
+        "validate",
+        "schedule_wait",
+        "check",
+        "network",
+        "summarize",
+        "render_report",
+    ]
+    assert stages["validate"]["calls"] == 12
+    assert stages["check"]["calls"] == stages["network"]["calls"] == 12
+    assert stages["summarize"]["calls"] == 13  # each result + summary()
+    assert prof.as_dict()["queue"]["max_in_flight"] <= 3
+
+
+def test_cli_profile_and_cprofile_dump(tmp_path, requests_mock, capsys):
+    requests_mock.get("https://a.test/", status_code=200)
+    input_path = tmp_path / "urls.txt"
+    input_path.write_text("https://a.test/\n", encoding="utf-8")
+    out_dir = tmp_path / "out"
+    dump = tmp_path / "run.pstats"
+
+    rc = main(
+        [
+            "--input",
+            str(input_path),
+            "--out-dir",
+            str(out_dir),
+            "--profile",
+            "--profile-dump",
+            str(dump),
+        ]
+    )
+
+    assert rc == 0
+    assert "Profile (wall" in capsys.readouterr().err
+    profile = json.loads((out_dir / "profile.json").read_text(encoding="utf-8"))
+    assert profile["stages"]["save_outputs"]["calls"] == 1
+    assert pstats.Stats(str(dump)).total_calls > 0
@@ -1,6 +1,14 @@
+import io
+import random
+
+import pytest
+
+from url_monitor import pipeline
+from url_monitor.breaker import skipped_result
+from url_monitor.cli import main
 from url_monitor.model import CheckResult
-from url_monitor.report import render_report_md
-from url_monitor.stats import summarize
+from url_monitor.report import ReportAggregates, render_report_md, write_report_md
+from url_monitor.stats import SummaryAccumulator, summarize
 
 
 def test_render_report_has_sections():
@@ -23,3 +31,144 @@ def test_render_report_has_sections():
     assert "## HTTP failures (non-OK status)" in md
     assert "## Exceptions" in md
     assert "## Invalid input lines" in md
+
+
+def _reference_top_http(results, k=10):
+    # The report's original definition: sort by elapsed desc (untimed
+    # last), deduplicate by URL, keep the first k
+    rows = [r for r in results if not r.ok and r.status_code and r.error is None]
+    timed = sorted(
+        (r for r in rows if r.elapsed_ms is not None), key=lambda r: -r.elapsed_ms
+    )
+    seen, out = set(), []
+    for r in timed + [r for r in rows if r.elapsed_ms is None]:
+        if r.url not in seen:
+            seen.add(r.url)
+            out.append((r.url, r.status_code, r.elapsed_ms))
+    return out[:k]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_streaming_top_http_failures_is_exact(seed):
+    rng = random.Random(seed)
+    results = [
+        CheckResult(
+            f"https://h.test/{rng.randrange(25)}",
+            False,
+            rng.choice((404, 500, 503)),
+            rng.choice((None, float(rng.randrange(50)))),
+            None,
+        )
+        for _ in range(400)
+    ]
+
+    agg = ReportAggregates.from_results(results)
+
+    assert agg.top_http_failures() == _reference_top_http(results)
+    assert agg.http_failures == 400
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_aggregates_merge_like_one_pass_after_round_trip(seed):
+    rng = random.Random(seed)
+    results = []
+    for i in range(300):
+        url = f"https://h{rng.randrange(6)}.test/{rng.randrange(20)}"
+        kind = rng.randrange(4)
+        if kind == 0:
+            results.append(CheckResult(url, True, 200, 1.0, None))
+        elif kind == 1:
+            elapsed = rng.choice((None, float(rng.randrange(50))))
+            results.append(CheckResult(url, False, 503, elapsed, None))
+        elif kind == 2:
+            error = f"{rng.choice(('ReadTimeout', 'ConnectionError'))}: {i}"
+            results.append(CheckResult(url, False, None, 1.0, error))
+        else:
+            results.append(skipped_result(url))
+
+    merged = ReportAggregates()
+    for start in range(0, len(results), 70):
+        part = ReportAggregates.from_results(results[start : start + 70])
+        merged.merge(ReportAggregates.from_dict(part.to_dict()))
+    expected = ReportAggregates.from_results(results)
+
+    assert merged.top_http_failures() == expected.top_http_failures()
+    assert merged.http_failures == expected.http_failures
+    assert merged.skipped_by_host == expected.skipped_by_host
+    assert {k: (g.count, g.samples) for k, g in merged.exceptions.items()} == {
+        k: (g.count, g.samples) for k, g in expected.exceptions.items()
+    }
+
+
+def test_http_failure_count_is_in_checks_not_urls():
+    results = [
+        CheckResult(f"https://h.test/{i % 3}", False, 503, float(i), None)
+        for i in range(12)
+    ]
+
+    md = render_report_md(
+        source="urls.txt", summary=summarize(results), results=results
+    )
+
+    section = md.split("## HTTP failures")[1].split("## Exceptions")[0]
+    assert section.count("| `https://h.test/") == 3
+    assert "- ... 12 failed checks in total (3 URLs shown)" in section
+
+
+@pytest.mark.parametrize(("accuracy", "text"), [(0.01, "1%"), (0.025, "2.5%")])
+def test_sketch_mode_states_its_own_accuracy(accuracy, text):
+    results = [
+        CheckResult(f"https://x{i}", True, 200, float(i), None) for i in range(25)
+    ]
+    acc = SummaryAccumulator(percentiles="sketch", relative_accuracy=accuracy)
+    acc.extend(results)
+
+    md = render_report_md(source="urls.txt", summary=acc.summary(), results=results)
+
+    assert f"- Mode: **sketch** (approximate, within {text} relative error)" in md
+
+
+def test_report_size_is_bounded_for_mass_failures():
+    results = [
+        CheckResult(f"https://h{i % 50}.test/{i}", False, None, 1.0, "ReadTimeout: x")
+        for i in range(20_000)
+    ] + [
+        CheckResult(f"https://h.test/{i}", False, 503, float(i), None)
+        for i in range(20_000)
+    ]
+    summary = summarize(results)
+
+    out = io.StringIO()
+    write_report_md(out, source="urls.txt", summary=summary, results=results)
+    md = out.getvalue()
+
+    assert len(md) < 10_000
+    assert "- **ReadTimeout** on `h0.test`: 400 checks" in md
+    assert md.count("  - `https://h0.test/") == 3  # bounded samples
+    assert "- ... and 30 more groups (12000 exceptions)" in md
+    assert "| `https://h.test/19999` | 503 | 19999.0 ms |" in md
+    assert "- ... 20000 failed checks in total (10 URLs shown)" in md
+    # Same text as render_report_md, minus the generation time
+    rendered = render_report_md(source="urls.txt", summary=summary, results=results)
+    assert rendered.splitlines()[3:] == md.splitlines()[3:]
+
+
+def test_cli_streams_the_report_to_its_file(tmp_path, requests_mock, monkeypatch):
+    requests_mock.get("https://a.test/", status_code=200)
+    requests_mock.get("https://b.test/", status_code=503)
+    input_path = tmp_path / "urls.txt"
+    input_path.write_text("https://a.test/\nhttps://b.test/\n", encoding="utf-8")
+
+    def no_string(**_kwargs):
+        raise AssertionError("the CLI must not build the report as a string")
+
+    monkeypatch.setattr(pipeline, "render_report_md", no_string)
+    out = tmp_path / "report.md"
+
+    assert main(["--input", str(input_path), "--out", str(out)]) == 0
+    assert main(["--input", str(input_path), "--out-dir", str(tmp_path / "o")]) == 0
+
+    for path in (out, tmp_path / "o" / "report.md"):
+        md = path.read_text(encoding="utf-8")
+        assert md.startswith("# URL Monitor Report\n")
+        assert "| `https://b.test/` | 503 |" in md
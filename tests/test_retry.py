@@ -0,0 +1,134 @@
+import time
+
+import pytest
+import requests
+
+from url_monitor.model import CheckResult, RetryStats
+from url_monitor.report import render_report_md
+from url_monitor.retry import RetryPolicy, classify_failure, parse_retry_on
+from url_monitor.runner import check_urls
+from url_monitor.stats import SummaryAccumulator
+from url_monitor.store import ResultStore
+
+NO_WAIT = dict(backoff_base=0.0, backoff_max=0.0)
+
+
+def _failed(error=None, status=None):
+    return CheckResult("https://a.test/", False, status, 1.0, error)
+
+
+def test_classify_failure():
+    assert (
+        classify_failure(CheckResult("https://a.test/", True, 200, 1.0, None)) is None
+    )
+    assert classify_failure(_failed(status=503)) == "http"
+    assert classify_failure(_failed("ReadTimeout: read timed out")) == "timeout"
+    assert classify_failure(_failed("TimeoutError: ")) == "timeout"
+    assert classify_failure(_failed("ConnectionError: reset by peer")) == "connection"
+    assert (
+        classify_failure(
+            _failed("ConnectionError: NameResolutionError: Failed to resolve 'x'")
+        )
+        == "dns"
+    )
+    assert classify_failure(_failed("gaierror: [Errno -2] not known")) == "dns"
+    assert classify_failure(_failed("SSLError: bad handshake")) == "tls"
+    assert classify_failure(_failed("ProtocolError: bad status line")) == "protocol"
+    assert classify_failure(_failed("ValueError: odd")) == "other"
+
+
+def test_policy_selects_kinds_and_statuses():
+    policy = RetryPolicy(retry_on=parse_retry_on("timeout, 5xx,429"))
+    assert policy.retry_kind(_failed("ReadTimeout: x")) == "timeout"
+    assert policy.retry_kind(_failed(status=500)) == "http"
+    assert policy.retry_kind(_failed(status=429)) == "http"
+    assert policy.retry_kind(_failed(status=404)) is None
+    assert policy.retry_kind(_failed("ConnectionError: x")) is None
+
+    with pytest.raises(ValueError, match="unknown retry_on entry"):
+        parse_retry_on("timeout,2xx")
+    with pytest.raises(ValueError, match="max_attempts"):
+        RetryPolicy(max_attempts=0)
+
+
+def test_transient_failures_are_retried(requests_mock):
+    requests_mock.get(
+        "https://a.test/flaky",
+        [
+            {"exc": requests.exceptions.ConnectionError("reset")},
+            {"status_code": 503},
+            {"status_code": 200},
+        ],
+    )
+    requests_mock.get("https://a.test/missing", status_code=404)
+    requests_mock.get("https://b.test/", status_code=200)
+    stats = RetryStats()
+
+    results = check_urls(
+        ["https://a.test/flaky", "https://a.test/missing", "https://b.test/"],
+        retry=RetryPolicy(**NO_WAIT),
+        retry_stats=stats,
+    )
+
+    assert [(r.ok, r.status_code, r.attempts) for r in results] == [
+        (True, 200, 3),
+        (False, 404, 1),
+        (True, 200, 1),
+    ]
+    assert stats.as_dict() == {
+        "retries": 2,
+        "budget_denied": 0,
+        "by_kind": {"connection": 1, "http": 1},
+    }
+
+    acc = SummaryAccumulator()
+    acc.extend(ResultStore(results))  # attempts survive the columnar store
+    summary = acc.summary(retry=stats)
+    assert summary["retries"]["checks_retried"] == 1
+    assert summary["retries"]["recovered"] == 1
+    report_md = render_report_md(source="x", summary=summary, results=results)
+    assert "- Checks retried: **1** (recovered: 1)" in report_md
+    assert "- Retried failures by kind: connection: 1, http: 1" in report_md
+
+
+def test_retry_budget_caps_retries(requests_mock):
+    urls = [f"https://down.test/{i}" for i in range(20)]
+    for u in urls:
+        requests_mock.get(u, status_code=503)
+    stats = RetryStats()
+
+    results = check_urls(
+        urls,
+        concurrency=4,
+        retry=RetryPolicy(max_attempts=5, budget=0.1, min_budget=0, **NO_WAIT),
+        retry_stats=stats,
+    )
+
+    assert [r.url for r in results] == urls
+    assert stats.retries == 2  # 10% of 20 checks
+    assert sum(r.attempts - 1 for r in results) == 2
+    assert stats.budget_denied > 0
+
+
+@pytest.mark.enable_socket
+@pytest.mark.parametrize("backend", ["threads", "asyncio"])
+def test_backoff_does_not_block_other_checks(local_server, backend, monkeypatch):
+    # One worker: a blocking retry would add its 0.4 s backoff to the
+    # 5 x 150 ms of the other checks; scheduled, it overlaps them.
+    monkeypatch.setattr(RetryPolicy, "backoff", lambda self, attempt, rng: 0.4)
+    urls = [f"{local_server}/status/503"] + [
+        f"{local_server}/slow?ms=150&i={i}" for i in range(5)
+    ]
+
+    t0 = time.monotonic()
+    results = check_urls(
+        urls,
+        timeout=2.0,
+        backend=backend,
+        retry=RetryPolicy(max_attempts=2),
+    )
+    elapsed = time.monotonic() - t0
+
+    assert [r.attempts for r in results] == [2, 1, 1, 1, 1, 1]
+    assert results[0].status_code == 503
+    assert elapsed < 1.05
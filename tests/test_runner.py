@@ -0,0 +1,79 @@
+import threading
+import time
+
+import pytest
+
+from url_monitor import runner
+from url_monitor.model import CheckResult
+from url_monitor.runner import check_urls, iter_check_results
+
+
+def test_check_urls_concurrent_keeps_input_order(requests_mock):
+    urls = [f"https://conc.test/{i}" for i in range(25)]
+    for i, u in enumerate(urls):
+        requests_mock.get(u, status_code=200 if i % 3 else 503)
+
+    results = check_urls(urls, timeout=1.0, concurrency=4)
+
+    assert [r.url for r in results] == urls
+    assert [r.status_code for r in results] == [
+        200 if i % 3 else 503 for i in range(len(urls))
+    ]
+
+
+def test_check_urls_concurrent_matches_sequential(requests_mock):
+    urls = [f"https://conc.test/{i}" for i in range(10)]
+    for u in urls:
+        requests_mock.get(u, status_code=200)
+
+    seq = check_urls(urls, timeout=1.0, concurrency=1)
+    par = check_urls(urls, timeout=1.0, concurrency=8)
+
+    assert [(r.url, r.ok, r.status_code, r.error) for r in seq] == [
+        (r.url, r.ok, r.status_code, r.error) for r in par
+    ]
+
+
+def test_each_worker_thread_has_its_own_session(monkeypatch):
+    seen = set()
+    started = threading.Barrier(4)
+
+    def fake_check(u, *, session, **_kwargs):
+        seen.add((threading.get_ident(), id(session)))
+        started.wait(timeout=2.0)
+        return CheckResult(u, True, 200, 1.0, None)
+
+    monkeypatch.setattr(runner, "check_target", fake_check)
+    urls = [f"https://conc.test/{i}" for i in range(8)]
+
+    assert [r.url for r in check_urls(urls, concurrency=4)] == urls
+    threads = {t for t, _s in seen}
+    sessions = {s for _t, s in seen}
+    assert len(threads) == len(sessions) == len(seen) == 4
+
+
+def test_check_urls_rejects_non_positive_concurrency():
+    with pytest.raises(ValueError):
+        check_urls(["https://conc.test/"], concurrency=0)
+
+
+@pytest.mark.enable_socket
+def test_asyncio_results_wait_for_a_slow_consumer(monkeypatch):
+    produced = 0
+
+    async def fake_aiter(urls, **_kwargs):
+        nonlocal produced
+        for u in urls:
+            produced += 1
+            yield CheckResult(u, True, 200, 1.0, None)
+
+    monkeypatch.setattr(runner, "aiter_check_results", fake_aiter)
+    urls = [f"https://slow.test/{i}" for i in range(200)]
+
+    it = iter_check_results(urls, concurrency=4, backend="asyncio")
+    next(it)
+    time.sleep(0.2)
+    # Queue (2 * concurrency) + the one taken + one waiting for space
+    assert produced <= 2 * 4 + 2
+    assert [r.url for r in it] == urls[1:]
+    assert produced == len(urls)
@@ -0,0 +1,79 @@
+import pytest
+
+from url_monitor.model import ConnectionStats
+from url_monitor.runner import check_urls
+from url_monitor.schedule import HostQueue
+from url_monitor.stats import summarize
+
+
+def test_host_queue_round_robin_across_hosts():
+    q = HostQueue()
+    urls = [
+        "https://a.test/1",
+        "https://a.test/2",
+        "https://a.test/3",
+        "https://b.test/1",
+        "https://c.test/1",
+    ]
+    for i, u in enumerate(urls):
+        q.push(i, u)
+
+    order = []
+    while (item := q.pop_ready()) is not None:
+        order.append(item[1])
+
+    assert order == [
+        "https://a.test/1",
+        "https://b.test/1",
+        "https://c.test/1",
+        "https://a.test/2",
+        "https://a.test/3",
+    ]
+    assert len(q) == 0
+
+
+def test_host_queue_respects_per_host_cap():
+    q = HostQueue(per_host=1)
+    for i, u in enumerate(["https://a.test/1", "https://A.test/2", "https://b.test/"]):
+        q.push(i, u)
+
+    first = q.pop_ready()
+    second = q.pop_ready()
+    assert first is not None and second is not None
+    assert (first[2], second[2]) == ("a.test", "b.test")
+    # a.test is at its cap until released
+    assert q.pop_ready() is None
+
+    q.release("a.test")
+    third = q.pop_ready()
+    assert third is not None
+    assert third[1] == "https://A.test/2"
+
+
+@pytest.mark.enable_socket
+@pytest.mark.parametrize("backend", ["threads", "asyncio"])
+def test_connections_are_reused_per_host(local_server, backend):
+    urls = [f"{local_server}/ok?i={i}" for i in range(20)]
+    connections = ConnectionStats()
+
+    results = check_urls(
+        urls,
+        timeout=2.0,
+        concurrency=4,
+        backend=backend,
+        per_host=2,
+        pool_size=2,
+        connections=connections,
+    )
+
+    assert [r.url for r in results] == urls
+    assert all(r.ok for r in results)
+    # per_host=2 means at most 2 connections are ever needed
+    assert 1 <= connections.new <= 2
+    assert connections.new + connections.reused == len(urls)
+
+    summary = summarize(results, connections=connections)
+    assert summary["connections"] == {
+        "new": connections.new,
+        "reused": connections.reused,
+    }
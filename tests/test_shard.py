@@ -0,0 +1,159 @@
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+import requests
+
+import url_monitor
+from url_monitor.cli import main
+from url_monitor.pipeline import run_monitor
+from url_monitor.shard import Shard, merge_partials, parse_shard, shard_of
+from url_monitor.stats import summarize
+from url_monitor.validate import url_host
+
+
+def test_parse_shard():
+    assert parse_shard("2/4") == Shard(2, 4)
+    assert str(Shard(0, 3)) == "0/3"
+    for bad in ("4/4", "-1/2", "1", "a/b", "0/0"):
+        with pytest.raises(ValueError, match="shard"):
+            parse_shard(bad)
+
+
+def test_hosts_are_spread_and_mostly_stay_when_shards_are_added():
+    hosts = [f"h{i}.test" for i in range(1000)]
+    four = [shard_of(h, 4) for h in hosts]
+    five = [shard_of(h, 5) for h in hosts]
+
+    assert all(150 < four.count(i) < 350 for i in range(4))
+    moved = [a for a, b in zip(four, five) if a != b]
+    assert all(b == 4 for a, b in zip(four, five) if a != b)
+    assert len(moved) < 300  # about 1/5 of the hosts
+
+    shards = [Shard(i, 4) for i in range(4)]
+    urls = [f"https://{h}/{k}" for h in hosts[:50] for k in range(3)]
+    owners = [[s.index for s in shards if s.owns(u)] for u in urls]
+    assert all(len(o) == 1 for o in owners)
+    by_host = {url_host(u): o[0] for u, o in zip(urls, owners)}
+    assert all(by_host[url_host(u)] == o[0] for u, o in zip(urls, owners))
+
+
+@pytest.mark.parametrize("percentiles", ["exact", "sketch"])
+def test_merged_partials_equal_summary_of_all_results(
+    tmp_path, requests_mock, percentiles
+):
+    urls = []
+    for h in range(12):
+        for k in range(4):
+            url = f"https://h{h}.test/{k}"
+            urls.append(url)
+            if k == 3 and h % 3 == 0:
+                requests_mock.get(url, exc=requests.exceptions.ConnectTimeout("x"))
+            else:
+                requests_mock.get(url, status_code=200 if k < 3 else 404)
+    input_path = tmp_path / "urls.txt"
+    input_path.write_text("\n".join(urls + ["not a url"]) + "\n", encoding="utf-8")
+
+    all_results = []
+    partials = []
+    for i in range(3):
+        partial = tmp_path / f"partial-{i}.json"
+        results, summary, report_md, invalids = run_monitor(
+            input_path, percentiles=percentiles, shard=Shard(i, 3), partial=partial
+        )
+        assert summary["shard"] == f"{i}/3"
+        assert f"- Shard: {i}/3" in report_md
+        assert len(invalids) == (1 if i == 0 else 0)
+        all_results.extend(results)
+        partials.append(partial)
+
+    assert sorted(r.url for r in all_results) == sorted(urls)
+    _aggregates, merged, report_md, invalids = merge_partials(partials)
+    expected = summarize(all_results, percentiles=percentiles)
+    for key in ("slowest", "success_avg_ms", "failure_avg_ms"):
+        assert merged.pop(key) == pytest.approx(expected.pop(key))
+    assert merged.pop("connections") == {"new": 0, "reused": 0}
+    assert merged.pop("partials") == 3
+    assert merged == expected
+
+    assert len(invalids) == 1 and "not a url" in invalids[0]
+    assert "- Merged from 3 partial summaries" in report_md
+    assert "| `https://h0.test/3` |" not in report_md  # exception, not HTTP
+    assert "- `https://h0.test/3`: **ConnectTimeout: x**" in report_md
+    assert "| `https://h1.test/3` | 404 |" in report_md
+
+
+def test_partials_carry_bounded_report_aggregates(tmp_path, requests_mock):
+    urls = [f"https://o{i % 7}.test/{i}" for i in range(300)]
+    requests_mock.get(re.compile(r"https://o\d\.test/"), status_code=503)
+    input_path = tmp_path / "urls.txt"
+    input_path.write_text("\n".join(urls) + "\n", encoding="utf-8")
+
+    partials = []
+    for i in range(2):
+        partial = tmp_path / f"partial-{i}.json"
+        run_monitor(input_path, shard=Shard(i, 2), partial=partial)
+        data = json.loads(partial.read_text(encoding="utf-8"))
+        assert "failures" not in data
+        assert len(data["report"]["slow_http"]) <= 10
+        partials.append(partial)
+
+    aggregates, merged, report_md, _invalids = merge_partials(partials)
+
+    assert merged["http_failures"] == aggregates.http_failures == 300
+    assert len(aggregates.top_http_failures()) == 10
+    assert "- ... 300 failed checks in total (10 URLs shown)" in report_md
+
+
+@pytest.mark.enable_socket
+def test_shards_in_separate_processes_merge(local_server, tmp_path, capsys):
+    urls = [
+        f"http://{host}:{local_server.rsplit(':', 1)[1]}/{path}"
+        for host in ("127.0.0.1", "localhost")
+        for path in ("ok", "status/500", "redirect", "slow?ms=20")
+    ]
+    input_path = tmp_path / "urls.txt"
+    input_path.write_text("\n".join(urls) + "\n", encoding="utf-8")
+    env = {"PYTHONPATH": str(Path(url_monitor.__file__).parents[1])}
+
+    procs = [
+        subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "url_monitor",
+                "--input",
+                str(input_path),
+                "--out",
+                str(tmp_path / f"report-{i}.md"),
+                "--shard",
+                f"{i}/2",
+                "--partial",
+                str(tmp_path / f"partial-{i}.json"),
+            ],
+            env=env,
+            stdout=subprocess.DEVNULL,
+        )
+        for i in range(2)
+    ]
+    assert [p.wait(timeout=60) for p in procs] == [0, 0]
+
+    out_dir = tmp_path / "merged"
+    assert (
+        main(
+            ["merge", *(str(tmp_path / f"partial-{i}.json") for i in range(2))]
+            + ["--out-dir", str(out_dir)]
+        )
+        == 0
+    )
+    summary = json.loads((out_dir / "summary.json").read_text(encoding="utf-8"))
+    assert (summary["total"], summary["ok"], summary["http_failures"]) == (8, 6, 2)
+    assert summary["by_status_class"]["5xx"] == 2
+    assert len(summary["slowest"]) == 5
+    assert summary["slowest"][0]["elapsed_ms"] >= 20
+    assert "- Merged from 2 partial summaries" in (out_dir / "report.md").read_text(
+        encoding="utf-8"
+    )
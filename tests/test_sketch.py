@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from url_monitor.sketch import QuantileSketch
+
+
+def _exact(sorted_values, q):
+    return sorted_values[round(q * (len(sorted_values) - 1))]
+
+
+def test_sketch_quantiles_within_relative_accuracy():
+    rng = random.Random(1234)
+    values = [rng.lognormvariate(3.0, 1.0) for _ in range(20_000)]
+    sk = QuantileSketch(relative_accuracy=0.01)
+    for v in values:
+        sk.add(v)
+
+    data = sorted(values)
+    for q in (0.5, 0.9, 0.95, 0.99, 0.999):
+        assert sk.quantile(q) == pytest.approx(_exact(data, q), rel=0.01)
+    assert sk.count == len(values)
+
+
+def test_sketch_merge_equals_single_sketch():
+    rng = random.Random(7)
+    values = [rng.uniform(1.0, 500.0) for _ in range(5_000)]
+
+    whole = QuantileSketch()
+    left, right = QuantileSketch(), QuantileSketch()
+    for i, v in enumerate(values):
+        whole.add(v)
+        (left if i % 2 else right).add(v)
+    left.merge(right)
+
+    assert left.to_dict() == whole.to_dict()
+
+
+def test_sketch_roundtrip_and_bounded_buckets():
+    sk = QuantileSketch(max_buckets=16)
+    for i in range(1, 10_000):
+        sk.add(float(i))
+    assert len(sk.to_dict()["buckets"]) <= 16
+
+    restored = QuantileSketch.from_dict(sk.to_dict())
+    assert restored.quantile(0.99) == sk.quantile(0.99)
+    assert QuantileSketch().quantile(0.5) is None
@@ -31,3 +31,13 @@ def test_cli_parser_defaults() -> None:
     assert args.out_dir is None
     assert args.timeout == 5.0
     assert args.strict is False
+    assert args.concurrency == 1
+
+
+def test_cli_watch_help_exits_zero(capsys) -> None:
+    from url_monitor.cli import main
+
+    with pytest.raises(SystemExit) as excinfo:
+        main(["watch", "--help"])
+    assert excinfo.value.code == 0
+    assert "url-monitor watch" in capsys.readouterr().out
@@ -1,7 +1,10 @@
+import json
+
 import pytest
 
-from url_monitor.model import CheckResult
-from url_monitor.stats import summarize
+from url_monitor.model import CheckResult, Phases
+from url_monitor.report import render_report_md
+from url_monitor.stats import SummaryAccumulator, summarize
 
 
 def test_summarize_counts_smoke():
@@ -34,3 +37,190 @@ def test_p95_demo_offline_is_deterministic():
     p95 = s["success_p95_ms"]
     assert p95 is not None, "expected p95 to be computed (got None)"
     assert p95 == pytest.approx(19.05, abs=1e-9)
+
+
+def test_accumulator_matches_summarize():
+    results = [
+        CheckResult("https://a", True, 200, 10.0, None),
+        CheckResult("https://b", False, 404, 30.0, None),
+        CheckResult("https://c", False, None, 5.0, "Timeout"),
+        CheckResult("https://d", True, 301, None, None),
+        CheckResult("https://e", True, 204, 30.0, None),
+        CheckResult("https://f", False, 503, 40.0, None),
+        CheckResult("https://g", True, 200, 1.0, None),
+    ] + [CheckResult(f"https://x{i}", True, 200, float(i), None) for i in range(25)]
+
+    acc = SummaryAccumulator()
+    for r in results:
+        acc.add(r)
+
+    assert acc.summary() == summarize(results)
+    # summarize() before it was built on the accumulator, plus the percentiles
+    baseline = {
+        "total": 32,
+        "ok": 29,
+        "fail": 3,
+        "http_failures": 2,
+        "exceptions": 1,
+        "error_rate": 0.09375,
+        "by_status_class": {"2xx": 28, "3xx": 1, "4xx": 1, "5xx": 1, "other": 1},
+        "success_samples": 28,
+        "success_max_ms": 30.0,
+        "success_avg_ms": pytest.approx(12.178571428571429),
+        "success_p95_ms": pytest.approx(23.65),
+        "failure_samples": 3,
+        "failure_avg_ms": 25.0,
+        "failure_p95_ms": None,
+        "slowest": [
+            {"url": "https://f", "elapsed_ms": 40.0, "status": 503},
+            {"url": "https://b", "elapsed_ms": 30.0, "status": 404},
+            {"url": "https://e", "elapsed_ms": 30.0, "status": 204},
+            {"url": "https://x24", "elapsed_ms": 24.0, "status": 200},
+            {"url": "https://x23", "elapsed_ms": 23.0, "status": 200},
+        ],
+    }
+    summary = acc.summary()
+    assert {k: summary[k] for k in baseline} == baseline
+    assert set(summary) - set(baseline) == {
+        "percentile_mode",
+        "success_percentiles_ms",
+        "failure_percentiles_ms",
+    }
+    ok_elapsed = [r.elapsed_ms for r in results if r.ok and r.elapsed_ms is not None]
+    assert acc.summary()["success_avg_ms"] == pytest.approx(
+        sum(ok_elapsed) / len(ok_elapsed)
+    )
+    assert acc.summary()["success_max_ms"] == max(ok_elapsed)
+    # Ties keep input order, like a stable sort
+    assert [s["url"] for s in acc.summary()["slowest"]][:3] == [
+        "https://f",
+        "https://b",
+        "https://e",
+    ]
+
+
+def test_accumulator_empty():
+    s = SummaryAccumulator().summary()
+    assert s["total"] == 0
+    assert s["error_rate"] == 0.0
+    assert s["success_avg_ms"] is None
+    assert s["slowest"] == []
+
+
+def test_percentiles_exact_and_sketch_modes():
+    results = [
+        CheckResult(f"https://x{i}.test", True, 200, float(i), None)
+        for i in range(1, 21)
+    ]
+
+    exact = summarize(results)
+    assert exact["percentile_mode"] == "exact"
+    assert exact["success_percentiles_ms"]["p95"] == pytest.approx(19.05, abs=1e-9)
+    assert exact["success_percentiles_ms"]["p50"] == pytest.approx(10.5, abs=1e-9)
+    assert exact["failure_percentiles_ms"]["p99"] is None
+
+    approx = summarize(results, percentiles="sketch")
+    assert approx["percentile_mode"] == "sketch"
+    for k in ("p50", "p90", "p95", "p99", "p99.9"):
+        # The sketch reports a nearest-rank order statistic (within 1%), not an
+        # interpolated value, so small samples differ by up to one rank step
+        assert approx["success_percentiles_ms"][k] == pytest.approx(
+            exact["success_percentiles_ms"][k], rel=0.06
+        )
+    assert approx["success_p95_ms"] == approx["success_percentiles_ms"]["p95"]
+
+
+@pytest.mark.parametrize("mode", ["exact", "sketch"])
+def test_accumulator_merge_matches_single_pass(mode):
+    results = [
+        CheckResult(f"https://m{i}.test", i % 5 != 0, 200 if i % 5 else 500, i, None)
+        for i in range(1, 61)
+    ]
+
+    whole = SummaryAccumulator(percentiles=mode)
+    whole.extend(results)
+    left = SummaryAccumulator(percentiles=mode)
+    left.extend(results[:25])
+    right = SummaryAccumulator(percentiles=mode)
+    right.extend(results[25:])
+    left.merge(right)
+
+    assert left.summary() == whole.summary()
+
+
+@pytest.mark.parametrize("mode", ["exact", "sketch"])
+def test_accumulator_round_trips_through_dict(mode):
+    results = [
+        CheckResult(
+            f"https://r{i}.test",
+            i % 4 != 0,
+            200 if i % 4 else 503,
+            float(i),
+            None,
+            Phases(1.0, 2.0, None, float(i), 0.5) if i % 2 else None,
+            100,
+            2 if i == 3 else 1,
+        )
+        for i in range(1, 31)
+    ]
+    acc = SummaryAccumulator(percentiles=mode)
+    acc.extend(results)
+
+    restored = SummaryAccumulator.from_dict(json.loads(json.dumps(acc.to_dict())))
+
+    assert restored.summary() == acc.summary()
+    restored.merge(acc)
+    twice = SummaryAccumulator(percentiles=mode)
+    twice.extend(results + results)
+    assert restored.summary()["by_status_class"] == twice.summary()["by_status_class"]
+    assert restored.summary()["success_percentiles_ms"] == pytest.approx(
+        twice.summary()["success_percentiles_ms"]
+    )
+
+
+def test_phase_breakdown_only_with_phase_timings():
+    plain = [CheckResult(f"https://p{i}.test", True, 200, 10.0, None) for i in range(3)]
+    assert "phases_ms" not in summarize(plain)
+
+    timed = [
+        CheckResult(
+            f"https://p{i}.test",
+            True,
+            200,
+            10.0 + i,
+            None,
+            Phases(
+                dns_ms=0.0 if i else 2.0,
+                connect_ms=0.0 if i else 1.0,
+                tls_ms=0.0,
+                ttfb_ms=float(i),
+                body_ms=None if i == 39 else 0.5,
+            ),
+        )
+        for i in range(40)
+    ]
+    summary = summarize(plain + timed)
+
+    phases = summary["phases_ms"]
+    assert list(phases) == ["dns", "connect", "tls", "ttfb", "body"]
+    assert phases["dns"] == {"samples": 40, "avg": 0.05, "p95": 0.0}
+    assert phases["ttfb"]["avg"] == pytest.approx(19.5)
+    assert phases["ttfb"]["p95"] == pytest.approx(37.05)
+    assert phases["body"]["samples"] == 39
+    md = render_report_md(source="urls.txt", summary=summary, results=plain + timed)
+    assert "## Latency by phase" in md
+    assert "| ttfb | 40 | 19.5 ms | 37.0 ms |" in md
+
+
+def test_bytes_received_totals_in_summary_and_report():
+    results = [
+        CheckResult("https://a", True, 200, 1.0, None, bytes_received=100),
+        CheckResult("https://b", True, 200, 1.0, None, bytes_received=0),
+        CheckResult("https://c", False, None, 1.0, "Timeout"),
+    ]
+    summary = summarize(results)
+
+    assert (summary["bytes_received"], summary["bytes_samples"]) == (100, 2)
+    md = render_report_md(source="urls.txt", summary=summary, results=results)
+    assert "- Body bytes received: **100** (avg 50 per check)" in md
+    assert "bytes_received" not in summarize(results[2:])
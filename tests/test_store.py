@@ -0,0 +1,105 @@
+import pickle
+from array import array
+
+from url_monitor.model import CheckResult, Phases
+from url_monitor.pipeline import run_monitor
+from url_monitor.report import render_report_md
+from url_monitor.stats import summarize
+from url_monitor.store import ResultStore
+
+RESULTS = [
+    CheckResult("https://a.test", True, 200, 10.0, None),
+    CheckResult("https://b.test", False, 404, 20.0, None),
+    CheckResult("https://c.test", False, None, None, "Timeout"),
+    CheckResult("https://a.test", True, 200, 12.5, None),
+    CheckResult("https://d.test", False, None, 7.0, "Timeout"),
+]
+
+
+def test_store_yields_equal_checkresult_views():
+    store = ResultStore(RESULTS)
+
+    assert len(store) == len(RESULTS)
+    assert list(store) == RESULTS
+    assert store[-1] == RESULTS[-1]
+    assert store[1:3] == RESULTS[1:3]
+    # Repeated URLs and errors are stored once
+    assert store._urls.values == [
+        "https://a.test",
+        "https://b.test",
+        "https://c.test",
+        "https://d.test",
+    ]
+    assert store._errors.values == ["Timeout"]
+
+
+def test_summarize_and_report_consume_store_directly():
+    store = ResultStore(RESULTS)
+
+    assert summarize(store) == summarize(RESULTS)
+    md = render_report_md(source="urls.txt", summary=summarize(store), results=store)
+    assert "`https://c.test`: **Timeout**" in md
+
+
+def test_store_pickles():
+    store = ResultStore(RESULTS)
+    restored = pickle.loads(pickle.dumps(store))
+    assert list(restored) == RESULTS
+    restored.append(CheckResult("https://a.test", True, 200, 1.0, None))
+    assert restored._urls.values[0] == "https://a.test"
+    assert len(restored._urls.values) == 4
+
+
+def test_run_monitor_compact(tmp_path, requests_mock):
+    p = tmp_path / "urls.txt"
+    p.write_text("https://a.test\nhttps://b.test\n", encoding="utf-8")
+    requests_mock.get("https://a.test", status_code=200)
+    requests_mock.get("https://b.test", status_code=500)
+
+    results, summary, _md, _inv = run_monitor(p, compact=True)
+
+    assert isinstance(results, ResultStore)
+    assert [r.status_code for r in results] == [200, 500]
+    assert summary["total"] == 2
+
+
+def test_store_keeps_phase_timings():
+    timed = CheckResult(
+        "https://e.test", True, 200, 3.0, None, Phases(0.1, 0.2, None, 1.5, 0.4)
+    )
+    store = ResultStore([*RESULTS, timed])
+
+    assert store[-1] == timed
+    assert store[0].phases is None
+    assert summarize(store) == summarize([*RESULTS, timed])
+
+
+def test_extend_with_another_store_copies_columns():
+    timed = CheckResult(
+        "https://b.test", True, 200, 3.0, None, Phases(0.1, 0.2, None, 1.5, 0.4)
+    )
+    first = ResultStore([timed, *RESULTS[:2]])
+    second = ResultStore([*RESULTS[2:], timed])
+
+    first.extend(second)
+
+    assert list(first) == [timed, *RESULTS, timed]
+    assert first._urls.values.count("https://b.test") == 1
+
+
+def test_docstring_bytes_per_result_match_the_columns():
+    timed = CheckResult(
+        "https://e.test", True, 200, 3.0, None, Phases(0.1, 0.2, None, 1.5, 0.4)
+    )
+    store = ResultStore([timed])
+    arrays = {k: v for k, v in vars(store).items() if isinstance(v, array)}
+    phase_values = arrays.pop("_phase_values")
+    # One entry per result in every other column
+    assert {len(a) for a in arrays.values()} == {1}
+
+    per_result = sum(a.itemsize for a in arrays.values())
+    per_phases = len(phase_values) * phase_values.itemsize
+
+    assert f"{per_result} bytes (+{per_phases} with phase timings)" in " ".join(
+        ResultStore.__doc__.split()
+    )
@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from url_monitor.pipeline import run_monitor
+from url_monitor.runner import check_urls
+from url_monitor.validators import ValidatorCache
+
+
+def test_validators_make_second_request_conditional(requests_mock):
+    url = "https://example.test/page"
+    cache = ValidatorCache()
+    requests_mock.get(
+        url,
+        [
+            {
+                "status_code": 200,
+                "content": b"x" * 500,
+                "headers": {"ETag": '"abc"', "Last-Modified": "Mon, 01 Jan 2024"},
+            },
+            {"status_code": 304, "headers": {"ETag": '"abc"'}},
+        ],
+    )
+
+    first, second = check_urls([url, url], validators=cache)
+
+    assert "If-None-Match" not in requests_mock.request_history[0].headers
+    sent = requests_mock.request_history[1].headers
+    assert sent["If-None-Match"] == '"abc"'
+    assert sent["If-Modified-Since"] == "Mon, 01 Jan 2024"
+    assert (first.ok, second.ok, second.status_code) == (True, True, 304)
+    assert cache.stats.as_dict() == {
+        "conditional": 1,
+        "not_modified": 1,
+        "bytes_saved": 500,
+    }
+
+
+def test_validators_dropped_on_error_and_lru_bound():
+    cache = ValidatorCache(max_entries=2)
+    for i in range(3):
+        cache.update(f"https://a.test/{i}", 200, {"etag": f'"{i}"'}, 10)
+    assert len(cache) == 2
+    assert cache.request_headers("https://a.test/0") == {}
+
+    cache.update("https://a.test/1", 404, {}, 0)
+    assert cache.request_headers("https://a.test/1") == {}
+    assert cache.request_headers("https://a.test/2") == {"If-None-Match": '"2"'}
+
+
+def test_validator_cache_save_load_round_trip(tmp_path):
+    path = tmp_path / "validators.json"
+    cache = ValidatorCache()
+    cache.update("https://a.test/", 200, {"etag": '"e"'}, 42)
+    cache.update("https://b.test/", 200, {"last-modified": "yesterday"}, 7)
+    cache.save(path)
+
+    loaded = ValidatorCache.load(path, max_entries=1)
+    assert len(loaded) == 1  # the most recently used entry survives
+    assert loaded.request_headers("https://b.test/") == {
+        "If-Modified-Since": "yesterday"
+    }
+    assert len(ValidatorCache.load(tmp_path / "missing.json")) == 0
+
+
+@pytest.mark.parametrize(
+    "entries",
+    [
+        [["https://a.test/", '"e"', None]],
+        [["https://a.test/", '"e"', None, "42"]],
+        [["https://a.test/", 5, None, 42]],
+        [None],
+        "abcd",
+    ],
+)
+def test_validator_cache_with_bad_entries_loads_empty(tmp_path, entries):
+    path = tmp_path / "validators.json"
+    path.write_text(json.dumps({"version": 1, "entries": entries}), encoding="utf-8")
+
+    assert len(ValidatorCache.load(path)) == 0
+
+
+@pytest.mark.enable_socket
+@pytest.mark.parametrize("backend", ["threads", "asyncio"])
+def test_conditional_requests_over_the_wire(local_server, backend):
+    url = f"{local_server}/etag"
+    cache = ValidatorCache()
+
+    results = check_urls([url, url], timeout=2.0, backend=backend, validators=cache)
+
+    assert [r.status_code for r in results] == [200, 304]
+    assert all(r.ok for r in results)
+    assert cache.stats.bytes_saved == 1000
+
+
+def test_run_monitor_reports_conditional_requests(tmp_path, requests_mock):
+    p = tmp_path / "urls.txt"
+    p.write_text("https://a.test/\n", "utf-8")
+    requests_mock.get("https://a.test/", status_code=304)
+    cache = ValidatorCache()
+    cache.update("https://a.test/", 200, {"etag": '"e"'}, 2048)
+
+    _results, summary, report_md, _ = run_monitor(p, validators=cache)
+
+    assert summary["ok"] == 1
+    assert summary["conditional"]["not_modified"] == 1
+    assert "## Conditional requests" in report_md
+    assert "- 304 Not Modified: **1** (hit rate: 100.0%)" in report_md
+    assert "- Body bytes saved: **2048**" in report_md
@@ -0,0 +1,82 @@
+import json
+import random
+
+import pytest
+
+from url_monitor.metrics import MetricsRegistry
+from url_monitor.model import CheckResult
+from url_monitor.watch import Watcher
+
+
+def test_watcher_refreshes_outputs_from_rolling_window(tmp_path, requests_mock):
+    urls = ["https://w.test/a", "https://w.test/b"]
+    requests_mock.get(urls[0], status_code=200)
+    requests_mock.get(urls[1], status_code=503)
+
+    watcher = Watcher(
+        urls,
+        source="urls.txt",
+        out_dir=tmp_path,
+        interval=0.02,
+        jitter=0.2,
+        window=0.1,
+        refresh=0.15,
+        concurrency=2,
+        rng=random.Random(0),
+    )
+    watcher.run(max_refreshes=2)
+
+    assert watcher.refreshes == 2
+    payload = json.loads((tmp_path / "results.json").read_text(encoding="utf-8"))
+    assert payload["source"] == "urls.txt"
+    assert payload["summary"]["window_s"] == 0.1
+    assert payload["summary"]["total"] == len(payload["results"]) > 0
+    assert {r["url"] for r in payload["results"]} <= set(urls)
+    assert "Window: last 0.1 s" in (tmp_path / "report.md").read_text(encoding="utf-8")
+
+
+def test_watcher_window_is_trimmed_by_age_and_capped(tmp_path):
+    now = 0.0
+    watcher = Watcher(
+        ["https://w.test/a"],
+        source="urls.txt",
+        out_dir=tmp_path,
+        interval=10.0,
+        jitter=0.0,
+        window=30.0,
+        clock=lambda: now,
+    )
+    w = watcher._windows[0]
+    for t in range(0, 100, 10):
+        w.append((float(t), CheckResult("https://w.test/a", True, 200, 1.0, None)))
+
+    # Capped at window / interval + 2 entries regardless of run time
+    assert len(w) == 5
+    assert len(watcher.window_results(95.0)) == 3
+
+
+def test_watcher_rejects_bad_jitter(tmp_path):
+    with pytest.raises(ValueError):
+        Watcher(["https://w.test/"], source="x", out_dir=tmp_path, jitter=1.5)
+
+
+def test_watcher_observes_every_result_into_metrics(tmp_path, requests_mock):
+    requests_mock.get("https://w.test/a", status_code=200)
+    metrics = MetricsRegistry()
+    watcher = Watcher(
+        ["https://w.test/a"],
+        source="urls.txt",
+        out_dir=tmp_path,
+        interval=0.02,
+        jitter=0.0,
+        window=0.05,
+        refresh=0.15,
+        metrics=metrics,
+        rng=random.Random(0),
+    )
+    watcher.run(max_refreshes=1)
+
+    # All-time counts: more than the window holds
+    line = 'url_monitor_checks_total{host="w.test",status_class="2xx"} '
+    count = int(metrics.render().split(line)[1].split()[0])
+    assert count > len(watcher.window_results(watcher.clock()))